@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+# Compare the time it takes to classify an Areena series page and extract
+# its playlist data by scanning the raw HTML (yledl.pagescan) and by
+# building a full lxml tree (the method used before the scanner).
+#
+# Usage:
+#
+# PYTHONPATH=. python scripts/benchmark_page_scanner.py [saved_series_page.html]
+#
+# Without an argument, the benchmark runs on a synthetic page that has
+# a similar structure and size as a real Areena series page.
+
+import json
+import sys
+import timeit
+import lxml.html
+from yledl.areena_playlist_parser import AreenaPlaylistParser
+from yledl.pagescan import ScannedPage
+
+
+def synthetic_series_page() -> bytes:
+    episodes = [
+        {
+            'type': 'card',
+            'title': f'Jakso {i}: Otsikko',
+            'description': 'Kuvaus ' * 30,
+            'pointer': {'uri': f'yleareena://items/1-{1000 + i}'},
+            'labels': [{'type': 'generic', 'formatted': '1.1.2024'}],
+        }
+        for i in range(200)
+    ]
+    next_data = {
+        'props': {
+            'pageProps': {
+                'meta': {'item': {'type': 'TVSeries'}},
+                'view': {
+                    'tabs': [
+                        {
+                            'slug': 'jaksot',
+                            'content': [
+                                {
+                                    'source': {'uri': 'yleareena://playlist/1-1'},
+                                    'filters': [
+                                        {
+                                            'options': [
+                                                {
+                                                    'title': f'Kausi {n}',
+                                                    'parameters': {'season': str(n)},
+                                                }
+                                                for n in range(1, 6)
+                                            ]
+                                        }
+                                    ],
+                                    'items': episodes,
+                                }
+                            ],
+                        }
+                    ]
+                },
+            }
+        }
+    }
+    cards = ''.join(
+        f'<div class="Card"><a href="/1-{1000 + i}"><span>Jakso {i}</span></a></div>'
+        for i in range(2000)
+    )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Sarja</title>'
+        f'</head><body><div id="__next"><main>{cards}</main></div>'
+        '<script id="__NEXT_DATA__" type="application/json">'
+        f'{json.dumps(next_data, ensure_ascii=False)}</script></body></html>'
+    ).encode('utf-8')
+
+
+def dom_path(content: bytes):
+    tree = lxml.html.fromstring(content.decode('utf-8'))
+    # Classification
+    next_data_tag = tree.xpath('//script[@id="__NEXT_DATA__"]')
+    next_data = json.loads(next_data_tag[0].text)
+    is_series = next_data['props']['pageProps']['meta']['item']['type'] == 'TVSeries'
+    # Playlist data
+    next_data = json.loads(tree.xpath('//script[@id="__NEXT_DATA__"]')[0].text)
+    tabs = next_data['props']['pageProps']['view']['tabs']
+    return is_series, tabs[0]['content'][0]['source']['uri']
+
+
+def scanner_path(content: bytes):
+    page = ScannedPage(content, 'utf-8')
+    is_series = AreenaPlaylistParser._is_tv_series_page(page)
+    playlist_data = AreenaPlaylistParser(None)._series_playlist_data(page)
+    return is_series, playlist_data.base_url
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'rb') as f:
+            content = f.read()
+    else:
+        content = synthetic_series_page()
+
+    if dom_path(content) != scanner_path(content):
+        sys.exit('The results differ')
+
+    print(f'Page size: {len(content) / 1024:.0f} kB')
+    for name, func in [('lxml tree', dom_path), ('scanner', scanner_path)]:
+        number = 50
+        best = min(timeit.repeat(lambda: func(content), number=number, repeat=5))
+        print(f'{name:>10}: {1000 * best / number:.2f} ms per page')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+from utils import FixedOffset, MockIOContext
+from yledl import AsyncYleDlDownloader, StreamFilters, RD_SUCCESS, RD_FAILED
+from yledl.backends import BaseDownloader, DASHHLSBackend
+from yledl.clip import Clip
+from yledl.errors import ExternalApplicationNotFoundError, TransientDownloadError
+from yledl.extractors import StreamFlavor
+from yledl.geolocation import AreenaGeoLocation
+from yledl.hlsfetch import SegmentedStream
+from yledl.http import HttpClient
+from yledl.retry import RetryPolicy
+from yledl.subprocess import (
+    TERMINATE_TIMEOUT,
+    check_output_async,
+    execute_pipe_async,
+    execute_with_input_async,
+)
+from yledl.titleformatter import TitleFormatter
+
+
+class MockExtractor:
+    supports_download_archive = True
+
+    def __init__(self, clips_by_url):
+        self.clips_by_url = clips_by_url
+        self.title_formatter = TitleFormatter()
+
+    def iter_playlist(self, url, latest_only=False):
+        return iter(self.clips_by_url.keys())
+
+    def extract_clip(self, url, origin_url):
+        return self.clips_by_url[url]
+
+    def drop_cached_preview(self, clip_url):
+        pass
+
+    def program_id_from_url(self, url):
+        return url
+
+
+def python_command(code):
+    return [sys.executable, '-c', code]
+
+
+def create_clip(backend, title):
+    return Clip(
+        webpage='https://areena.yle.fi/1-1234567',
+        flavors=[StreamFlavor(media_type='video', streams=[backend])],
+        title=title,
+        duration_seconds=950,
+        region='Finland',
+        publish_timestamp=datetime(2018, 7, 1, tzinfo=FixedOffset(3)),
+        expiration_timestamp=datetime(2019, 1, 1, tzinfo=FixedOffset(3)),
+    )
+
+
+def mock_backend(side_effect):
+    backend = BaseDownloader('https://yledl.test/video.mp4', 'ffmpeg')
+    backend.save_stream = Mock(side_effect=side_effect)
+    return backend
+
+
+def async_downloader(clips_by_url):
+    mockhttpclient = HttpClient(MockIOContext)
+    return AsyncYleDlDownloader(
+        AreenaGeoLocation(mockhttpclient),
+        TitleFormatter(),
+        mockhttpclient,
+        lambda *args: MockExtractor(clips_by_url),
+        retry_policy=RetryPolicy(uniform=lambda low, high: 0),
+    )
+
+
+def test_execute_pipe_async_returns_exit_status():
+    res = asyncio.run(execute_pipe_async([python_command('import sys; sys.exit(3)')]))
+
+    assert res == 3
+
+
+def test_execute_pipe_async_connects_pipes():
+    commands = [
+        python_command('print("hello")'),
+        python_command('import sys; sys.exit(sys.stdin.read() != "hello\\n")'),
+    ]
+
+    assert asyncio.run(execute_pipe_async(commands)) == 0
+
+
+def test_execute_pipe_async_missing_application():
+    with pytest.raises(ExternalApplicationNotFoundError):
+        asyncio.run(execute_pipe_async([['/nonexistent/yledl-test-binary']]))
+
+
+def test_cancellation_interrupts_the_process():
+    command = python_command('import time; time.sleep(60)')
+
+    start = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(execute_pipe_async([command]), 0.5))
+
+    # The process has been stopped and waited for, not left running
+    assert time.monotonic() - start < TERMINATE_TIMEOUT
+
+
+def test_execute_with_input_async_feeds_the_chunks():
+    command = python_command('import sys; sys.exit(sys.stdin.read() != "abcdef")')
+
+    res = asyncio.run(execute_with_input_async(command, iter([b'abc', b'def'])))
+
+    assert res == 0
+
+
+def test_cancelling_segmented_download_stops_ffmpeg(tmp_path, monkeypatch):
+    pid_file = tmp_path / 'pid'
+    release_segments = threading.Event()
+
+    def blocking_segments(*args):
+        yield b'segment'
+        release_segments.wait(10)
+
+    monkeypatch.setattr('yledl.backends.fetch_segments', blocking_segments)
+    backend = DASHHLSBackend('https://yledl.test/master.m3u8', program_id=0)
+    backend._segmented_stream = Mock(
+        return_value=SegmentedStream(segment_uris=['seg0.ts'], subtitles=[])
+    )
+    backend._segmented_stream_args = Mock(
+        return_value=python_command(
+            'import os, sys, time\n'
+            f'open({str(pid_file)!r}, "w").write(str(os.getpid()))\n'
+            'sys.stdin.buffer.read(7)\n'
+            'time.sleep(60)'
+        )
+    )
+    io = MockIOContext(destdir=str(tmp_path), connections=4, ffprobe_binary=None)
+    clip = create_clip(backend, 'Clip')
+
+    async def cancel_download():
+        task = asyncio.create_task(
+            backend.save_stream_async(str(tmp_path / 'clip.mkv'), clip, io)
+        )
+        while not pid_file.exists() or not pid_file.read_text():
+            await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        finally:
+            release_segments.set()
+
+    asyncio.run(cancel_download())
+
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+
+def test_check_output_async():
+    output = asyncio.run(check_output_async(python_command('print("out")'), 10))
+
+    assert output.strip() == b'out'
+
+
+def test_check_output_async_failure():
+    with pytest.raises(subprocess.CalledProcessError):
+        asyncio.run(check_output_async(python_command('raise SystemExit(1)'), 10))
+
+
+def test_download_clips():
+    backends = [mock_backend([RD_SUCCESS]) for _ in range(3)]
+    clips = {
+        f'https://areena.yle.fi/1-{i}': create_clip(b, f'Clip {i}')
+        for i, b in enumerate(backends)
+    }
+    io = MockIOContext(destdir='/tmp/', jobs=2)
+
+    res = asyncio.run(
+        async_downloader(clips).download_clips(
+            'https://areena.yle.fi/1-1', io, StreamFilters()
+        )
+    )
+
+    assert res == RD_SUCCESS
+    for backend in backends:
+        backend.save_stream.assert_called_once()
+
+
+def test_download_clips_retries_transient_errors():
+    backend = mock_backend([TransientDownloadError('Failed!'), RD_SUCCESS])
+    clips = {'https://areena.yle.fi/1-1': create_clip(backend, 'Clip')}
+
+    res = asyncio.run(
+        async_downloader(clips).download_clips(
+            'https://areena.yle.fi/1-1', MockIOContext(destdir='/tmp/'), StreamFilters()
+        )
+    )
+
+    assert res == RD_SUCCESS
+    assert backend.save_stream.call_count == 2
+
+
+def test_download_clips_failure():
+    backend = mock_backend([RD_FAILED])
+    clips = {'https://areena.yle.fi/1-1': create_clip(backend, 'Clip')}
+
+    res = asyncio.run(
+        async_downloader(clips).download_clips(
+            'https://areena.yle.fi/1-1', MockIOContext(destdir='/tmp/'), StreamFilters()
+        )
+    )
+
+    assert res == RD_FAILED
+
+
+def test_hls_without_segment_plan_runs_ffmpeg_as_asyncio_subprocess():
+    backend = DASHHLSBackend('https://yledl.test/master.m3u8', program_id=0)
+    backend._segmented_stream = Mock(return_value=None)
+    backend.save_stream = Mock()
+    backend.external_downloader_async = AsyncMock(return_value=RD_SUCCESS)
+    io = MockIOContext(destdir='/tmp/', connections=4, ffprobe_binary=None)
+    clip = create_clip(backend, 'Clip')
+
+    res = asyncio.run(backend.save_stream_async('/tmp/clip.mkv', clip, io))
+
+    assert res == RD_SUCCESS
+    backend.external_downloader_async.assert_awaited_once()
+    backend.save_stream.assert_not_called()
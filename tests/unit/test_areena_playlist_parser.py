@@ -0,0 +1,269 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+from urllib.parse import parse_qs, urlparse
+import pytest
+from yledl.areena_playlist_parser import AreenaPlaylistParser
+from yledl.play_list_data import PlaylistData
+from yledl.sync import SeriesSyncState
+
+
+class FakeHttpClient:
+    def __init__(
+        self,
+        episodes_by_season,
+        report_count=True,
+        failing_offsets=(),
+        numbered=True,
+        unnumbered_seasons=(),
+        dated=False,
+    ):
+        self.episodes_by_season = episodes_by_season
+        self.report_count = report_count
+        self.numbered = numbered
+        self.unnumbered_seasons = set(unnumbered_seasons)
+        self.dated = dated
+        self.failing_offsets = set(failing_offsets)
+        self.requested_pages = []
+
+    def download_json(self, url):
+        query = parse_qs(urlparse(url).query)
+        season = query.get('season', [None])[0]
+        offset = int(query['offset'][0])
+        limit = int(query['limit'][0])
+        self.requested_pages.append((season, offset))
+        if offset in self.failing_offsets:
+            return None
+
+        program_ids = self.episodes_by_season[season]
+        numbered = self.numbered and season not in self.unnumbered_seasons
+        labels = (
+            [{'type': 'generic', 'formatted': 'pe 15.3.2019'}] if self.dated else []
+        )
+        response = {
+            'data': [
+                {
+                    'title': f'Jakso {offset + i + 1}' if numbered else 'Uutiset',
+                    'pointer': {'uri': f'yleareena://items/{program_id}'},
+                    'labels': labels,
+                }
+                for i, program_id in enumerate(program_ids[offset : offset + limit])
+            ]
+        }
+        if self.report_count:
+            response['meta'] = {'offset': offset, 'count': len(program_ids)}
+        return response
+
+
+def episode_ids(n):
+    return [f'1-{i}' for i in range(n)]
+
+
+def test_season_numbers_from_season_titles():
+    httpclient = FakeHttpClient({'a': ['1-100', '1-101'], 'b': ['1-200']})
+    playlist_data = PlaylistData(
+        'https://areena.api.yle.fi/v1/ui/content/list',
+        [{'season': 'a'}, {'season': 'b'}],
+        [3, None],
+    )
+    parser = AreenaPlaylistParser(httpclient)
+
+    playlist = parser._download_playlist_or_latest(playlist_data)
+
+    assert playlist == [
+        'https://areena.yle.fi/1-100',
+        'https://areena.yle.fi/1-101',
+        'https://areena.yle.fi/1-200',
+    ]
+    assert parser.episodes['https://areena.yle.fi/1-100'].season == 3
+    assert parser.episodes['https://areena.yle.fi/1-101'].episode_number == 2
+    # Unknown if the title doesn't include a season number
+    assert parser.episodes['https://areena.yle.fi/1-200'].season is None
+
+
+def test_no_season_number_without_seasons():
+    httpclient = FakeHttpClient({None: ['1-100']})
+    playlist_data = PlaylistData('https://areena.api.yle.fi/v1/ui/content/list', [])
+    parser = AreenaPlaylistParser(httpclient)
+
+    parser._download_playlist_or_latest(playlist_data)
+
+    assert parser.episodes['https://areena.yle.fi/1-100'].season is None
+
+
+@pytest.mark.parametrize('report_count', [True, False])
+def test_all_pages_are_downloaded(report_count):
+    httpclient = FakeHttpClient(
+        {'a': episode_ids(250), 'b': episode_ids(1000)[300:]}, report_count
+    )
+    playlist_data = PlaylistData(
+        'https://areena.api.yle.fi/v1/ui/content/list',
+        [{'season': 'a'}, {'season': 'b'}],
+    )
+    parser = AreenaPlaylistParser(httpclient, max_workers=4)
+
+    playlist = parser._download_playlist_or_latest(playlist_data)
+
+    assert len(playlist) == 250 + 700
+    assert len(set(playlist)) == len(playlist)
+    assert parser.episodes['https://areena.yle.fi/1-249'].episode_number == 250
+
+
+def test_failed_page_truncates_the_season(caplog):
+    httpclient = FakeHttpClient({None: episode_ids(350)}, failing_offsets=[200])
+    playlist_data = PlaylistData('https://areena.api.yle.fi/v1/ui/content/list', [])
+    parser = AreenaPlaylistParser(httpclient, max_workers=4)
+
+    playlist = parser._download_playlist_or_latest(playlist_data)
+
+    assert len(playlist) == 200
+    assert 'Playlist failed at offset 200' in caplog.text
+
+
+def test_stream_playlist_yields_a_season_before_downloading_the_next():
+    httpclient = FakeHttpClient({'a': episode_ids(250), 'b': episode_ids(1000)[300:]})
+    playlist_data = PlaylistData(
+        'https://areena.api.yle.fi/v1/ui/content/list',
+        [{'season': 'a'}, {'season': 'b'}],
+    )
+    parser = AreenaPlaylistParser(httpclient, max_workers=4)
+
+    playlist = parser._stream_playlist(playlist_data)
+
+    assert next(playlist) == 'https://areena.yle.fi/1-0'
+    assert ('b', 100) not in httpclient.requested_pages
+    assert parser.episodes['https://areena.yle.fi/1-0'].episode_number == 1
+    assert len(list(playlist)) == 250 + 700 - 1
+
+
+def test_stream_playlist_collects_unnumbered_seasons_before_ordering():
+    seasons = {'a': episode_ids(250), 'b': episode_ids(1000)[300:]}
+    playlist_data = PlaylistData(
+        'https://areena.api.yle.fi/v1/ui/content/list',
+        [{'season': 'a'}, {'season': 'b'}],
+    )
+    httpclient = FakeHttpClient(seasons, numbered=False)
+    parser = AreenaPlaylistParser(httpclient, max_workers=4)
+
+    playlist = parser._stream_playlist(playlist_data)
+    first = next(playlist)
+
+    assert ('b', 600) in httpclient.requested_pages
+    complete = AreenaPlaylistParser(
+        FakeHttpClient(seasons, numbered=False), max_workers=4
+    )._download_playlist_or_latest(playlist_data)
+    assert [first] + list(playlist) == complete
+
+
+def test_stream_playlist_waits_if_later_seasons_may_be_sorted_by_date():
+    seasons = {
+        'a': episode_ids(100),
+        'b': episode_ids(250)[100:],
+        'c': episode_ids(400)[250:],
+    }
+    playlist_data = PlaylistData(
+        'https://areena.api.yle.fi/v1/ui/content/list',
+        [{'season': 'a'}, {'season': 'b'}, {'season': 'c'}],
+    )
+
+    def client():
+        return FakeHttpClient(seasons, unnumbered_seasons=['b', 'c'], dated=True)
+
+    httpclient = client()
+    parser = AreenaPlaylistParser(httpclient, max_workers=4)
+
+    playlist = parser._stream_playlist(playlist_data)
+    first = next(playlist)
+
+    assert ('c', 100) in httpclient.requested_pages
+    complete = AreenaPlaylistParser(
+        client(), max_workers=4
+    )._download_playlist_or_latest(playlist_data)
+    assert [first] + list(playlist) == complete
+
+
+def test_latest_episode_from_the_last_page():
+    httpclient = FakeHttpClient({'a': [], 'b': episode_ids(350)})
+    playlist_data = PlaylistData(
+        'https://areena.api.yle.fi/v1/ui/content/list',
+        [{'season': 'a'}, {'season': 'b'}],
+    )
+    parser = AreenaPlaylistParser(httpclient)
+
+    playlist = parser._download_playlist_or_latest(playlist_data, True)
+
+    assert playlist == ['https://areena.yle.fi/1-349']
+    assert httpclient.requested_pages == [('b', 0), ('b', 300)]
+
+
+@pytest.mark.parametrize('report_count,numbered', [(False, True), (True, False)])
+def test_latest_episode_falls_back_to_downloading_the_season(report_count, numbered):
+    httpclient = FakeHttpClient(
+        {None: episode_ids(350)}, report_count=report_count, numbered=numbered
+    )
+    playlist_data = PlaylistData('https://areena.api.yle.fi/v1/ui/content/list', [])
+    parser = AreenaPlaylistParser(httpclient)
+
+    playlist = parser._download_playlist_or_latest(playlist_data, True)
+
+    assert playlist == ['https://areena.yle.fi/1-349']
+    assert (None, 100) in httpclient.requested_pages
+    assert (None, 200) in httpclient.requested_pages
+
+
+def sync_new_episodes(episodes_by_season, state):
+    httpclient = FakeHttpClient(episodes_by_season)
+    playlist_data = PlaylistData(
+        'https://areena.api.yle.fi/v1/ui/content/list',
+        [{'season': season} for season in episodes_by_season],
+    )
+    parser = AreenaPlaylistParser(httpclient, max_workers=4)
+    new_episodes = parser._download_new_episodes(playlist_data, state)
+    state.add_episodes(new_episodes)
+    return new_episodes, httpclient.requested_pages
+
+
+def test_sync_lists_only_new_episodes(tmp_path):
+    state = SeriesSyncState(str(tmp_path / 'state.json'), 'https://areena.yle.fi/1-1')
+    episodes_by_season = {'a': episode_ids(250), 'b': episode_ids(1000)[300:420]}
+
+    new_episodes, _ = sync_new_episodes(episodes_by_season, state)
+    assert len(new_episodes) == 250 + 120
+
+    # Nothing has changed: only the first pages are downloaded
+    new_episodes, requested = sync_new_episodes(episodes_by_season, state)
+    assert new_episodes == []
+    assert sorted(requested) == [('a', 0), ('b', 0)]
+
+    # New episodes on season b: the pages before the last synced page are skipped
+    episodes_by_season['b'] = episode_ids(1000)[300:550]
+    new_episodes, requested = sync_new_episodes(episodes_by_season, state)
+    assert new_episodes == [f'https://areena.yle.fi/1-{i}' for i in range(420, 550)]
+    assert sorted(requested) == [('a', 0), ('b', 0), ('b', 100), ('b', 200)]
+    assert len(state.episodes) == 250 + 250
+
+
+def test_sync_does_not_record_an_incomplete_season(tmp_path):
+    state = SeriesSyncState(str(tmp_path / 'state.json'), 'https://areena.yle.fi/1-1')
+    httpclient = FakeHttpClient({None: episode_ids(350)}, failing_offsets=[200])
+    playlist_data = PlaylistData('https://areena.api.yle.fi/v1/ui/content/list', [])
+    parser = AreenaPlaylistParser(httpclient, max_workers=4)
+
+    new_episodes = parser._download_new_episodes(playlist_data, state)
+
+    assert len(new_episodes) == 200
+    assert state.season_counts == {}
@@ -15,10 +15,23 @@
 # You should have received a copy of the GNU General Public License
 # along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
 
+import os
 from datetime import datetime
-from yledl import RD_SUCCESS
-from yledl.backends import DASHHLSBackend, WgetBackend
+from io import BytesIO
+from yledl import RD_FAILED, RD_SUCCESS
+from yledl.backends import (
+    DASHHLSBackend,
+    HttpRangeBackend,
+    VideoAndSubtitlesHttpBackend,
+    WgetBackend,
+)
 from yledl.clip import Clip
+from yledl.ffmpeg import optional_stream
+from yledl.hls import HlsRendition
+from yledl.hlsfetch import SegmentedStream, SegmentJournal
+from yledl.http import HttpClient
+from yledl.ratelimit import TokenBucket
+from yledl.subtitles import Subtitle
 from utils import FixedOffset, MockIOContext
 
 tv1_url = 'https://yletv-lh.akamaihd.net/i/yletv1hls_1@103188/master.m3u8'
@@ -53,9 +66,11 @@ class MockWgetBackend(WgetBackend):
         super().__init__(url, file_extension)
 
         self.executed_commands = None
+        self.executed_env = None
 
     def external_downloader(self, commands, env=None):
         self.executed_commands = commands
+        self.executed_env = env
         return RD_SUCCESS
 
     def full_stream_already_downloaded(self, filename, clip, io):
@@ -100,3 +115,185 @@ def test_wget_backend_pipe():
     assert res == RD_SUCCESS
     assert len(backend.executed_commands) == 1
     assert tv1_url in backend.executed_commands[0]
+
+
+def test_hls_backend_downloads_through_a_rate_limiting_relay():
+    backend = MockHLSBackend(tv1_url, program_id=0)
+    limited_io = MockIOContext(destdir='/tmp/', bandwidth=TokenBucket(100 * 1024))
+
+    backend.save_stream('test.mkv', clip=mock_clip, io=limited_io)
+
+    args = backend.executed_commands[0]
+    proxy = args[args.index('-http_proxy') + 1]
+    assert proxy.startswith('http://127.0.0.1:')
+
+
+def test_wget_backend_uses_the_bandwidth_share():
+    backend = MockWgetBackend(tv1_url, file_extension='.mkv')
+    limited_io = MockIOContext(destdir='/tmp/', bandwidth=TokenBucket(250 * 1024))
+
+    backend.save_stream('test.mkv', clip=mock_clip, io=limited_io)
+
+    assert not any(
+        arg.startswith('--limit-rate') for arg in backend.executed_commands[0]
+    )
+    assert backend.executed_env['https_proxy'].startswith('http://127.0.0.1:')
+    assert backend.executed_env['http_proxy'] == backend.executed_env['https_proxy']
+
+
+def test_backend_uses_the_shared_http_client():
+    backend = DASHHLSBackend(tv1_url, program_id=0)
+    httpclient = HttpClient(io)
+
+    shared_io = MockIOContext(destdir='/tmp/', httpclient=httpclient)
+
+    assert backend.http_client(shared_io) is httpclient
+    assert backend.http_client(io) is not httpclient
+
+
+def test_http_range_backend_uses_the_shared_http_client():
+    backend = HttpRangeBackend(tv1_url, '.mp4')
+    httpclient = HttpClient(io)
+    shared_io = MockIOContext(destdir='/tmp/', httpclient=httpclient)
+
+    assert backend.range_download(tv1_url, shared_io).httpclient is httpclient
+
+
+class MockVideoAndSubtitlesHttpBackend(VideoAndSubtitlesHttpBackend):
+    def __init__(self, video_url, subtitles, video_status):
+        super().__init__(video_url, subtitles, '.mp4')
+
+        self.video_status = video_status
+        self.downloaded = []
+
+    def download_file(self, url, output_name, io):
+        self.downloaded.append((url, output_name))
+        return self.video_status if url == self.url else RD_SUCCESS
+
+
+def test_http_backend_downloads_subtitles_even_if_the_video_fails():
+    sub_url = 'https://yledl.test/subtitles.srt'
+    backend = MockVideoAndSubtitlesHttpBackend(
+        tv1_url, [Subtitle(sub_url, 'fin', 'ohjelmatekstitys')], RD_FAILED
+    )
+
+    backend.save_stream('/tmp/video.mp4', mock_clip, io)
+
+    assert backend.downloaded == [
+        (tv1_url, '/tmp/video.mp4'),
+        (sub_url, '/tmp/video.srt'),
+    ]
+
+
+def segment_generator(segments):
+    yield from segments
+
+
+def test_resumed_segmented_download_feeds_the_part_file_to_ffmpeg(
+    tmp_path, monkeypatch
+):
+    output_name = str(tmp_path / 'video.mkv')
+    uris = [f'https://yledl.test/seg{i}.ts' for i in range(3)]
+    journal = SegmentJournal(output_name, uris)
+    journal.completed_segments()
+    list(journal.record_segments(segment_generator([b'aaa']), 0))
+
+    fetched_uris = []
+    ffmpeg_input = BytesIO()
+
+    def fake_fetch_segments(segment_uris, *args):
+        fetched_uris.extend(segment_uris)
+        return segment_generator([b'bbb', b'ccc'])
+
+    def fake_execute_with_input(args, write_input):
+        write_input(ffmpeg_input)
+        return 0
+
+    monkeypatch.setattr('yledl.backends.fetch_segments', fake_fetch_segments)
+    monkeypatch.setattr('yledl.backends.execute_with_input', fake_execute_with_input)
+    backend = DASHHLSBackend(tv1_url, program_id=0)
+    stream = SegmentedStream(segment_uris=uris, subtitles=[])
+    resume_io = MockIOContext(
+        destdir=str(tmp_path), resume=True, resumable_segments=True
+    )
+
+    res = backend._save_segmented_stream(stream, output_name, mock_clip, resume_io)
+
+    assert res == RD_SUCCESS
+    assert fetched_uris == uris[1:]
+    assert ffmpeg_input.getvalue() == b'aaabbbccc'
+    assert not os.path.exists(journal.part_filename)
+
+
+def test_segments_are_not_journaled_by_default(tmp_path, monkeypatch):
+    output_name = str(tmp_path / 'video.mkv')
+    ffmpeg_input = BytesIO()
+
+    def fake_execute_with_input(args, write_input):
+        write_input(ffmpeg_input)
+        return 0
+
+    monkeypatch.setattr(
+        'yledl.backends.fetch_segments',
+        lambda *args: segment_generator([b'aaa', b'bbb']),
+    )
+    monkeypatch.setattr('yledl.backends.execute_with_input', fake_execute_with_input)
+    backend = DASHHLSBackend(tv1_url, program_id=0)
+    stream = SegmentedStream(segment_uris=['seg0.ts', 'seg1.ts'], subtitles=[])
+    resume_io = MockIOContext(destdir=str(tmp_path), resume=True, connections=2)
+
+    res = backend._save_segmented_stream(stream, output_name, mock_clip, resume_io)
+
+    assert res == RD_SUCCESS
+    assert ffmpeg_input.getvalue() == b'aaabbb'
+    assert os.listdir(tmp_path) == []
+
+
+def test_hls_backend_segmented_stream_args():
+    backend = DASHHLSBackend(tv1_url, program_id=0)
+    stream = SegmentedStream(
+        segment_uris=['https://yledl.test/segment0.ts'],
+        subtitles=[
+            HlsRendition('https://yledl.test/fi.m3u8', 'subs', 'fi'),
+            HlsRendition('https://yledl.test/sv.m3u8', 'subs', 'sv'),
+        ],
+    )
+    io_fin = MockIOContext(destdir='/tmp/', subtitles='fin')
+
+    args = backend._segmented_stream_args(
+        stream, 'pipe:0', 'test.mkv', mock_clip, io_fin
+    )
+
+    assert args[args.index('-f') + 1] == 'mpegts'
+    assert 'pipe:0' in args
+    assert 'https://yledl.test/fi.m3u8' in args
+    assert 'https://yledl.test/sv.m3u8' not in args
+    assert '1:s' in args
+    assert args[-1] == 'file:test.mkv'
+
+
+def test_hls_backend_delays_subtitles_in_the_download_command():
+    backend = MockHLSBackend(tv1_url, program_id=0)
+    io_delay = MockIOContext(destdir='/tmp/', subtitles='all', subtitle_delay_s=2.5)
+
+    res = backend.save_stream('test.mkv', clip=mock_clip, io=io_delay)
+
+    assert res == RD_SUCCESS
+    assert len(backend.executed_commands) == 1
+    args = backend.executed_commands[0]
+    assert args.count(tv1_url) == 2
+    offset_index = args.index('-itsoffset')
+    assert args[offset_index + 1] == '2.5'
+    assert tv1_url in args[offset_index:]
+    assert optional_stream('1:p:0:s', io_delay.ffmpeg_version()) in args
+
+
+def test_hls_backend_no_subtitle_input_without_delay():
+    backend = MockHLSBackend(tv1_url, program_id=0)
+    io_all = MockIOContext(destdir='/tmp/', subtitles='all')
+
+    backend.save_stream('test.mkv', clip=mock_clip, io=io_all)
+
+    args = backend.executed_commands[0]
+    assert args.count(tv1_url) == 1
+    assert '-itsoffset' not in args
@@ -0,0 +1,185 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import os
+import requests
+from yledl.cache import DiskCache
+from yledl.extractors import AreenaExtractor
+from yledl.http import HttpClient
+from yledl.io import IOContext
+from yledl.localization import TranslationChooser
+from yledl.titleformatter import TitleFormatter
+
+PREVIEW_URL = 'https://player.api.yle.fi/v1/preview/1-1234.json'
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers, timeout):
+        self.requests.append(dict(headers))
+        status_code, response_headers, body = self.responses.pop(0)
+        r = requests.Response()
+        r.status_code = status_code
+        r.url = url
+        r.headers.update(response_headers)
+        r.encoding = 'utf-8'
+        r._content = body
+        return r
+
+
+def cached_httpclient(tmp_path, responses):
+    httpclient = HttpClient(IOContext(cache_dir=str(tmp_path)))
+    session = FakeSession(responses)
+    httpclient._session = session
+    return httpclient, session
+
+
+def test_disk_cache_roundtrip(tmp_path):
+    cache = DiskCache(str(tmp_path), max_size_bytes=10000)
+    cache.put('key', {'a': 1}, b'payload')
+
+    entry = cache.get('key')
+    assert entry.metadata == {'a': 1}
+    assert entry.data == b'payload'
+    assert cache.get('another key') is None
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_size_bytes=400)
+    cache.put('first', {}, b'x' * 100)
+    cache.put('second', {}, b'x' * 100)
+    # Make "first" the most recently used entry
+    meta_path = cache._paths('second')[0]
+    os.utime(meta_path, (0, 0))
+    cache.get('first')
+    cache.put('third', {}, b'x' * 100)
+
+    assert cache.get('first') is not None
+    assert cache.get('second') is None
+    assert cache.get('third') is not None
+
+
+def test_http_cache_serves_fresh_response_from_disk(tmp_path):
+    httpclient, session = cached_httpclient(
+        tmp_path, [(200, {'ETag': '"v1"'}, b'{"ok": true}')]
+    )
+
+    assert httpclient.download_json(PREVIEW_URL) == {'ok': True}
+    assert httpclient.download_json(PREVIEW_URL) == {'ok': True}
+    assert len(session.requests) == 1
+    assert httpclient._cache.stats == {'hit': 1, 'revalidated': 0, 'miss': 1}
+
+
+def test_http_cache_revalidates_stale_response(tmp_path, monkeypatch):
+    httpclient, session = cached_httpclient(
+        tmp_path,
+        [
+            (200, {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jun 2026'}, b'[1]'),
+            (304, {}, b''),
+        ],
+    )
+    httpclient.download_json(PREVIEW_URL)
+
+    monkeypatch.setattr(httpclient._cache, 'ttl', lambda url: 0)
+
+    assert httpclient.download_json(PREVIEW_URL) == [1]
+    assert session.requests[1]['If-None-Match'] == '"v1"'
+    assert session.requests[1]['If-Modified-Since'] == 'Mon, 01 Jun 2026'
+    assert httpclient._cache.stats['revalidated'] == 1
+
+
+def test_http_cache_ignores_uncacheable_urls(tmp_path):
+    httpclient, session = cached_httpclient(
+        tmp_path, [(200, {}, b'first'), (200, {}, b'second')]
+    )
+
+    url = 'https://locations.api.yle.fi/v3/address/current'
+    assert httpclient.download_page(url) == 'first'
+    assert httpclient.download_page(url) == 'second'
+
+
+def test_http_cache_respects_no_store(tmp_path):
+    httpclient, session = cached_httpclient(
+        tmp_path,
+        [(200, {'Cache-Control': 'no-store'}, b'[1]'), (200, {}, b'[2]')],
+    )
+
+    assert httpclient.download_json(PREVIEW_URL) == [1]
+    assert httpclient.download_json(PREVIEW_URL) == [2]
+
+
+def test_disk_cache_scans_the_directory_only_when_evicting(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), max_size_bytes=10000)
+    scans = []
+    original_scan = cache._scan_entries
+    monkeypatch.setattr(
+        cache, '_scan_entries', lambda: scans.append(1) or original_scan()
+    )
+
+    for i in range(20):
+        cache.put(f'key{i}', {}, b'x' * 10)
+
+    assert len(scans) == 1
+
+
+def test_http_cache_key_includes_the_referer(tmp_path):
+    httpclient, session = cached_httpclient(
+        tmp_path, [(200, {}, b'[1]'), (200, {}, b'[2]')]
+    )
+
+    first = httpclient.download_json(PREVIEW_URL, {'Referer': 'https://a.test/'})
+    second = httpclient.download_json(PREVIEW_URL, {'Referer': 'https://b.test/'})
+
+    assert (first, second) == ([1], [2])
+    assert len(session.requests) == 2
+
+
+def test_http_cache_revalidates_listings_when_syncing(tmp_path):
+    httpclient = HttpClient(IOContext(cache_dir=str(tmp_path), sync_dir=str(tmp_path)))
+    session = FakeSession([(200, {'ETag': '"v1"'}, b'[1]'), (304, {}, b'')])
+    httpclient._session = session
+
+    url = 'https://areena.api.yle.fi/v1/ui/content/list?token=x'
+    assert httpclient.download_json(url) == [1]
+    assert httpclient.download_json(url) == [1]
+    assert session.requests[1]['If-None-Match'] == '"v1"'
+
+
+def test_expired_preview_is_downloaded_again(tmp_path):
+    previews = [
+        {'data': {'ongoing_ondemand': {'manifest_url': f'https://yledl.test/{i}.m3u8'}}}
+        for i in (1, 2)
+    ]
+    httpclient, session = cached_httpclient(
+        tmp_path, [(200, {}, json.dumps(preview).encode()) for preview in previews]
+    )
+    extractor = AreenaExtractor(
+        TranslationChooser(['fin']), httpclient, TitleFormatter(), None
+    )
+    page_url = 'https://areena.yle.fi/1-1234'
+
+    first = extractor.preview_parser('1-1234', page_url)
+    extractor.drop_cached_preview(page_url)
+    second = extractor.preview_parser('1-1234', page_url)
+
+    assert first.manifest_url() == 'https://yledl.test/1.m3u8'
+    assert second.manifest_url() == 'https://yledl.test/2.m3u8'
+    assert len(session.requests) == 2
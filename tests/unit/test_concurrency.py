@@ -0,0 +1,63 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import random
+import threading
+import time
+import pytest
+from yledl.concurrency import ordered_map
+
+
+def test_ordered_map_preserves_order():
+    def slow_square(x):
+        time.sleep(random.uniform(0, 0.01))
+        return x * x
+
+    assert list(ordered_map(slow_square, range(20), max_workers=4)) == [
+        x * x for x in range(20)
+    ]
+
+
+def test_ordered_map_bounds_pending_tasks():
+    started = []
+    lock = threading.Lock()
+
+    def record(x):
+        with lock:
+            started.append(x)
+        return x
+
+    results = ordered_map(record, range(100), max_workers=2, max_pending=3)
+    first = next(results)
+    time.sleep(0.05)
+
+    assert first == 0
+    assert len(started) <= 4
+    results.close()
+
+
+def test_ordered_map_raises_worker_exception():
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError('three')
+        return x
+
+    results = ordered_map(fail_on_three, range(10), max_workers=3)
+
+    assert [next(results) for _ in range(3)] == [0, 1, 2]
+    with pytest.raises(ValueError):
+        next(results)
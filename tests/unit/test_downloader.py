@@ -17,6 +17,7 @@
 
 import dataclasses
 import logging
+import threading
 import unittest.mock
 import pytest
 from collections import OrderedDict
@@ -26,8 +27,10 @@ from unittest.mock import Mock
 from utils import FixedOffset, MockIOContext
 from yledl import StreamFilters, RD_SUCCESS, RD_FAILED
 from yledl.backends import BaseDownloader, FailingBackend
-from yledl.downloader import YleDlDownloader
+from yledl.downloader import ClipRegistry, YleDlDownloader
 from yledl.errors import TransientDownloadError
+from yledl.retry import RetryPolicy
+from yledl.sync import SYNC_MAX_FAILURES
 from yledl.clip import Clip, FailedClip
 from yledl.extractors import StreamFlavor
 from yledl.geolocation import AreenaGeoLocation
@@ -41,19 +44,40 @@ class MockGeoLocation(AreenaGeoLocation):
 
 
 class MockExtractor:
+    supports_download_archive = True
+
     def __init__(self, clips_by_url):
         self.clips_by_url = clips_by_url
         self.title_formatter = TitleFormatter()
+        self.extracted = []
+        self.dropped_previews = []
 
-    def extract(self, url, latest_only):
+    def extract(self, url, latest_only, max_workers=1):
         return list(self.clips_by_url.values())
 
+    def iter_extract(self, url, latest_only, max_workers=1):
+        return iter(self.extract(url, latest_only, max_workers))
+
     def get_playlist(self, url, latest_only=False):
         return list(self.clips_by_url.keys())
 
+    def iter_playlist(self, url, latest_only=False):
+        return iter(self.get_playlist(url, latest_only))
+
+    def sync_playlist(self, url, state):
+        state.add_episodes(self.get_playlist(url))
+        return state.pending()
+
     def extract_clip(self, url, origin_url):
+        self.extracted.append(url)
         return self.clips_by_url[url]
 
+    def drop_cached_preview(self, clip_url):
+        self.dropped_previews.append(clip_url)
+
+    def program_id_from_url(self, url):
+        return url
+
 
 def mock_backend(
     status=RD_SUCCESS,
@@ -66,7 +90,7 @@ def mock_backend(
     return backend
 
 
-def backend_that_fails_n_times(n):
+def backend_that_fails_n_times(n, url_expired=False):
     """Return a BaseDownloader instance that first fails and then succeeds.
 
     The first n calls to save_stream() and pipe() return RD_FAILED and the next
@@ -75,7 +99,8 @@ def backend_that_fails_n_times(n):
     save_stream() and pipe() are Mock instances.
     """
     backend = BaseDownloader('stream.test', 'ffmpeg')
-    return_values = [TransientDownloadError('Failed!')] * n + [RD_SUCCESS]
+    error = TransientDownloadError('Failed!', url_expired=url_expired)
+    return_values = [error] * n + [RD_SUCCESS]
     backend.save_stream = Mock(side_effect=return_values)
     backend.pipe = Mock(side_effect=return_values)
     return backend
@@ -231,9 +256,9 @@ def simple():
     )
 
 
-def downloader(clips_by_url):
+def downloader(clips_by_url, clip_registry=None, extractor=None, sleep=None):
     def extractor_factory(*args):
-        return MockExtractor(clips_by_url)
+        return extractor or MockExtractor(clips_by_url)
 
     mockhttpclient = HttpClient(MockIOContext)
     return YleDlDownloader(
@@ -241,6 +266,8 @@ def downloader(clips_by_url):
         TitleFormatter(),
         mockhttpclient,
         extractor_factory,
+        clip_registry,
+        RetryPolicy(sleep=sleep or Mock()),
     )
 
 
@@ -509,6 +536,14 @@ def test_print_metadata_failed_clip(simple):
     ]
 
 
+def test_iter_metadata(simple):
+    dl = downloader({'a': successful_clip('Clip A'), 'b': failed_clip()})
+    metadata = dl.iter_metadata('', simple.io, simple.filters)
+
+    assert not isinstance(metadata, list)
+    assert list(metadata) == dl.get_metadata('', simple.io, simple.filters)
+
+
 def test_download_fallback(simple):
     clip = multistream_clip()
     dl = downloader({'a': clip})
@@ -561,6 +596,41 @@ def test_download_fails_if_too_many_failures(simple):
     assert backend.save_stream.call_count >= 4
 
 
+def test_retry_reuses_the_extracted_clip(simple):
+    backend = backend_that_fails_n_times(2)
+    flavors = [StreamFlavor(media_type='video', streams=[backend])]
+    extractor = MockExtractor({'a': create_clip(flavors)})
+    sleep = Mock()
+    dl = downloader({}, extractor=extractor, sleep=sleep)
+
+    res = dl.download_clips('', simple.io, simple.filters)
+
+    assert res == RD_SUCCESS
+    assert extractor.extracted == ['a']
+    # Backoff before each retry attempt
+    assert sleep.call_count == 2
+    assert all(0 <= args[0] <= 2 for args, _ in sleep.call_args_list)
+
+
+def test_retry_extracts_again_if_the_url_has_expired(simple):
+    backend = backend_that_fails_n_times(1, url_expired=True)
+    flavors = [StreamFlavor(media_type='video', streams=[backend])]
+    extractor = MockExtractor({'a': create_clip(flavors)})
+    dl = downloader({}, extractor=extractor)
+
+    res = dl.download_clips('', simple.io, simple.filters)
+
+    assert res == RD_SUCCESS
+    assert extractor.extracted == ['a', 'a']
+    assert extractor.dropped_previews == ['a']
+
+
+def test_backoff_delay_grows_exponentially():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, uniform=lambda a, b: b)
+
+    assert [policy.delay(n) for n in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
 def test_pipe_does_not_retry(simple):
     backend = backend_that_fails_n_times(1)
     flavors = [
@@ -573,3 +643,288 @@ def test_pipe_does_not_retry(simple):
     res = dl.pipe('', simple.io, simple.filters)
 
     assert res == RD_FAILED
+
+
+def test_download_in_parallel(simple):
+    clips = OrderedDict(
+        [
+            ('a', successful_clip('Clip A')),
+            ('b', successful_clip('Clip B')),
+            ('c', successful_clip('Clip C')),
+        ]
+    )
+    dl = downloader(clips)
+    io_parallel = dataclasses.replace(simple.io, jobs=2)
+
+    res = dl.download_clips('', io_parallel, simple.filters)
+
+    assert res == RD_SUCCESS
+    for clip in clips.values():
+        stream_by_partial_url_match(
+            clip, 'high_quality'
+        ).save_stream.assert_called_once()
+
+
+def test_download_in_parallel_combines_exit_status(simple):
+    clips = OrderedDict(
+        [
+            ('a', successful_clip()),
+            ('b', failed_clip()),
+            ('c', successful_clip()),
+        ]
+    )
+    dl = downloader(clips)
+    io_parallel = dataclasses.replace(simple.io, jobs=3)
+
+    res = dl.download_clips('', io_parallel, simple.filters)
+
+    assert res == RD_FAILED
+
+
+@pytest.mark.parametrize('prefetch', [0, 1, 2])
+def test_download_extracts_each_clip_once(simple, prefetch):
+    clips = OrderedDict(
+        [
+            ('a', successful_clip('Clip A')),
+            ('b', successful_clip('Clip B')),
+            ('c', successful_clip('Clip C')),
+        ]
+    )
+    extractor = MockExtractor(clips)
+    extractor.extract_clip = Mock(side_effect=extractor.extract_clip)
+    mockhttpclient = HttpClient(MockIOContext)
+    dl = YleDlDownloader(
+        MockGeoLocation(mockhttpclient),
+        TitleFormatter(),
+        mockhttpclient,
+        lambda *args: extractor,
+    )
+    io_prefetch = dataclasses.replace(simple.io, prefetch=prefetch)
+
+    res = dl.download_clips('', io_prefetch, simple.filters)
+
+    assert res == RD_SUCCESS
+    assert [c.args[0] for c in extractor.extract_clip.call_args_list] == [
+        'a',
+        'b',
+        'c',
+    ]
+    for clip in clips.values():
+        stream_by_partial_url_match(
+            clip, 'high_quality'
+        ).save_stream.assert_called_once()
+
+
+def test_download_archive_skips_and_records_clips(simple, tmp_path):
+    archive_file = tmp_path / 'archive.txt'
+    archive_file.write_text('b\n')
+    clips = OrderedDict(
+        [
+            ('a', dataclasses.replace(successful_clip('Clip A'), program_id='a')),
+            ('b', dataclasses.replace(successful_clip('Clip B'), program_id='b')),
+        ]
+    )
+    dl = downloader(clips)
+    io_archive = dataclasses.replace(simple.io, download_archive=str(archive_file))
+
+    res = dl.download_clips('', io_archive, simple.filters)
+
+    assert res == RD_SUCCESS
+    stream_by_partial_url_match(
+        clips['a'], 'high_quality'
+    ).save_stream.assert_called_once()
+    stream_by_partial_url_match(
+        clips['b'], 'high_quality'
+    ).save_stream.assert_not_called()
+    assert archive_file.read_text().splitlines() == ['b', 'a']
+
+
+def test_download_archive_does_not_record_failures(simple, tmp_path):
+    archive_file = tmp_path / 'archive.txt'
+    clip = dataclasses.replace(failed_stream_clip(), program_id='a')
+    dl = downloader({'a': clip})
+    io_archive = dataclasses.replace(simple.io, download_archive=str(archive_file))
+
+    res = dl.download_clips('', io_archive, simple.filters)
+
+    assert res == RD_FAILED
+    assert not archive_file.exists()
+
+
+def test_sync_downloads_only_new_clips(simple, tmp_path):
+    clips = OrderedDict(
+        [
+            ('a', successful_clip('Clip A')),
+            ('b', failed_stream_clip()),
+        ]
+    )
+    dl = downloader(clips)
+    io_sync = dataclasses.replace(simple.io, sync_dir=str(tmp_path))
+
+    res = dl.download_clips('https://areena.yle.fi/1-1', io_sync, simple.filters)
+    assert res == RD_FAILED
+
+    # Clip A has already been downloaded, the failed clip B is tried again
+    clips['c'] = successful_clip('Clip C')
+    res = dl.download_clips('https://areena.yle.fi/1-1', io_sync, simple.filters)
+
+    assert res == RD_FAILED
+    stream_by_partial_url_match(
+        clips['a'], 'high_quality'
+    ).save_stream.assert_called_once()
+    stream_by_partial_url_match(
+        clips['c'], 'high_quality'
+    ).save_stream.assert_called_once()
+
+
+def test_sync_gives_up_on_a_clip_that_keeps_failing(simple, tmp_path):
+    extractor = MockExtractor({'a': failed_stream_clip()})
+    dl = downloader({}, extractor=extractor)
+    io_sync = dataclasses.replace(simple.io, sync_dir=str(tmp_path))
+
+    for _ in range(SYNC_MAX_FAILURES + 1):
+        dl.download_clips('https://areena.yle.fi/1-1', io_sync, simple.filters)
+
+    assert extractor.extracted == ['a'] * SYNC_MAX_FAILURES
+
+
+def test_clip_registry_downloads_each_program_once(simple):
+    clips = OrderedDict(
+        [
+            ('a', successful_clip('Clip A')),
+            ('b', successful_clip('Clip B')),
+        ]
+    )
+    registry = ClipRegistry()
+    series_dl = downloader(clips, registry)
+    episode_dl = downloader({'b': clips['b']}, registry)
+
+    assert series_dl.download_clips('', simple.io, simple.filters) == RD_SUCCESS
+    assert episode_dl.download_clips('', simple.io, simple.filters) == RD_SUCCESS
+
+    for clip in clips.values():
+        stream_by_partial_url_match(
+            clip, 'high_quality'
+        ).save_stream.assert_called_once()
+
+
+def test_clip_registry_retries_failed_programs(simple):
+    registry = ClipRegistry()
+    failing_dl = downloader({'a': failed_stream_clip()}, registry)
+    working_dl = downloader({'a': successful_clip()}, registry)
+
+    assert failing_dl.download_clips('', simple.io, simple.filters) == RD_FAILED
+    assert working_dl.download_clips('', simple.io, simple.filters) == RD_SUCCESS
+    assert 'a' in registry
+
+
+def test_parallel_download_requeues_failed_clips(simple):
+    clips = OrderedDict(
+        [
+            ('a', successful_clip('Clip A')),
+            ('b', successful_clip('Clip B')),
+            ('c', successful_clip('Clip C')),
+        ]
+    )
+    calls = []
+
+    def save_stream(name, results):
+        def side_effect(*args):
+            calls.append(name)
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        return side_effect
+
+    for name, clip in clips.items():
+        results = [TransientDownloadError('Failed!')] if name == 'a' else []
+        stream_by_partial_url_match(
+            clip, 'high_quality'
+        ).save_stream.side_effect = save_stream(name, results + [RD_SUCCESS])
+    dl = downloader(clips)
+    dl.retry_policy = RetryPolicy(uniform=lambda low, high: 0)
+    io_parallel = dataclasses.replace(simple.io, jobs=2)
+
+    res = dl.download_clips('', io_parallel, simple.filters)
+
+    assert res == RD_SUCCESS
+    assert sorted(calls) == ['a', 'a', 'b', 'c']
+
+
+def test_parallel_retry_does_not_wait_for_other_clips(simple):
+    clips = OrderedDict(
+        [
+            ('a', successful_clip('Clip A')),
+            ('b', successful_clip('Clip B')),
+        ]
+    )
+    b_finished = threading.Event()
+    calls = []
+
+    def save_a(*args):
+        calls.append('a')
+        if len(calls) == 1:
+            raise TransientDownloadError('Failed!')
+        return RD_SUCCESS
+
+    def save_b(*args):
+        # Finishes only after the failed clip has been retried
+        b_finished.wait(5)
+        calls.append('b')
+        return RD_SUCCESS
+
+    stream_by_partial_url_match(
+        clips['a'], 'high_quality'
+    ).save_stream.side_effect = save_a
+    stream_by_partial_url_match(
+        clips['b'], 'high_quality'
+    ).save_stream.side_effect = save_b
+    dl = downloader(clips)
+    dl.retry_policy = RetryPolicy(uniform=lambda low, high: 0)
+    original_add = dl.add_to_download_archive
+
+    def add_to_download_archive(clip, *args):
+        if clip is clips['a']:
+            b_finished.set()
+        original_add(clip, *args)
+
+    dl.add_to_download_archive = add_to_download_archive
+    io_parallel = dataclasses.replace(simple.io, jobs=3)
+
+    res = dl.download_clips('', io_parallel, simple.filters)
+
+    assert res == RD_SUCCESS
+    assert calls == ['a', 'a', 'b']
+
+
+def test_download_starts_before_the_playlist_is_complete(simple):
+    clips = OrderedDict(
+        (f'https://areena.yle.fi/1-{i}', successful_clip(f'Clip {i}')) for i in range(3)
+    )
+    extractor = MockExtractor(clips)
+    first_backend = stream_by_partial_url_match(
+        clips['https://areena.yle.fi/1-0'], 'high_quality'
+    )
+    first_download_started = []
+
+    def slow_playlist(url, latest_only=False):
+        yield from list(clips)[:2]
+        first_download_started.append(first_backend.save_stream.called)
+        yield list(clips)[2]
+
+    extractor.iter_playlist = slow_playlist
+    mockhttpclient = HttpClient(MockIOContext)
+    dl = YleDlDownloader(
+        MockGeoLocation(mockhttpclient),
+        TitleFormatter(),
+        mockhttpclient,
+        lambda *args: extractor,
+    )
+    io_serial = dataclasses.replace(simple.io, prefetch=0)
+
+    res = dl.download_clips('', io_serial, simple.filters)
+
+    assert res == RD_SUCCESS
+    assert first_download_started == [True]
@@ -0,0 +1,119 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import requests
+from yledl.extractors import AreenaExtractor
+from yledl.localization import TranslationChooser
+from yledl.titleformatter import TitleFormatter
+
+PROGRAM_PREVIEW = {
+    'data': {
+        'ongoing_ondemand': {
+            'title': {'fin': 'Jakso'},
+            'start_time': '2024-01-01T20:00:00+02:00',
+        }
+    }
+}
+
+SERIES_PAGE = b'<html><head><title>Sarja</title></head><body></body></html>'
+
+
+class FakeHttpClient:
+    def __init__(self, preview):
+        self.preview = preview
+        self.preview_requests = 0
+        self.html_requests = 0
+
+    def download_json(self, url, extra_headers=None):
+        self.preview_requests += 1
+        if isinstance(self.preview, Exception):
+            raise self.preview
+        return self.preview
+
+    def download_html(self, url):
+        self.html_requests += 1
+        return SERIES_PAGE, 'utf-8'
+
+
+def areena_extractor(httpclient):
+    return AreenaExtractor(
+        TranslationChooser(['fin']), httpclient, TitleFormatter(), None
+    )
+
+
+def test_program_url_skips_the_html_page():
+    httpclient = FakeHttpClient(PROGRAM_PREVIEW)
+    extractor = areena_extractor(httpclient)
+
+    playlist = extractor.get_playlist('https://areena.yle.fi/1-1234')
+    info = extractor.program_info_for_pid('1-1234', playlist[0], TitleFormatter(), None)
+
+    assert playlist == ['https://areena.yle.fi/1-1234']
+    assert info.title.startswith('Jakso')
+    assert httpclient.html_requests == 0
+    # The preview is downloaded only once
+    assert httpclient.preview_requests == 1
+
+
+def test_series_url_falls_back_to_the_html_page():
+    httpclient = FakeHttpClient({'data': {}})
+    extractor = areena_extractor(httpclient)
+
+    playlist = list(extractor.iter_playlist('https://areena.yle.fi/1-1234'))
+
+    assert playlist == ['https://areena.yle.fi/1-1234']
+    assert httpclient.html_requests == 1
+
+
+def test_preview_connection_error_falls_back_to_the_html_page():
+    httpclient = FakeHttpClient(requests.ConnectionError('Connection refused'))
+    extractor = areena_extractor(httpclient)
+
+    playlist = extractor.get_playlist('https://areena.yle.fi/1-1234')
+
+    assert playlist == ['https://areena.yle.fi/1-1234']
+    assert httpclient.html_requests == 1
+
+
+def test_other_urls_are_not_checked_from_the_preview():
+    httpclient = FakeHttpClient(PROGRAM_PREVIEW)
+    extractor = areena_extractor(httpclient)
+
+    extractor.get_playlist('https://areena.yle.fi/podcastit/1-1234')
+
+    assert httpclient.preview_requests == 0
+    assert httpclient.html_requests == 1
+
+
+def test_clips_are_extracted_while_iterating_the_playlist():
+    extractor = areena_extractor(FakeHttpClient({'data': {}}))
+    clip_urls = [f'https://areena.yle.fi/1-{i}' for i in range(1, 4)]
+    consumed = []
+
+    def iter_playlist(url, latest_only=False):
+        for clip_url in clip_urls:
+            consumed.append(clip_url)
+            yield clip_url
+
+    extractor.iter_playlist = iter_playlist
+    extractor.extract_clip = lambda clip_url, origin_url: clip_url
+
+    clips = extractor.iter_extract('https://areena.yle.fi/1-1234', False)
+
+    assert next(clips) == clip_urls[0]
+    assert consumed == clip_urls[:2]
+    assert list(clips) == clip_urls[1:]
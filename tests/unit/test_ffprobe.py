@@ -18,7 +18,7 @@
 import subprocess
 from unittest.mock import patch
 import pytest
-from yledl.ffmpeg import Ffprobe
+from yledl.ffmpeg import CachingFfprobe, Ffprobe, normalize_manifest_url
 
 
 def create_ffprobe():
@@ -90,3 +90,123 @@ class TestDurationSecondsFile:
             assert result == 1 * 3600 + 23 * 60 + 45 + 0.67
             call_kwargs = mock_check_output.call_args[1]
             assert call_kwargs['timeout'] is not None
+
+
+class TestDurationSecondsHeader:
+    def test_format_duration(self):
+        ffprobe = create_ffprobe()
+        mock_output = (
+            b'{"streams": [{"duration": "10.0"}], "format": {"duration": "12.5"}}'
+        )
+
+        with patch('yledl.ffmpeg.subprocess.check_output') as mock_check_output:
+            mock_check_output.return_value = mock_output
+
+            assert ffprobe.duration_seconds_header('/tmp/test.mkv') == 12.5
+
+    def test_stream_duration_if_format_has_none(self):
+        ffprobe = create_ffprobe()
+        mock_output = b'{"streams": [{}, {"duration": "10.0"}], "format": {}}'
+
+        with patch('yledl.ffmpeg.subprocess.check_output') as mock_check_output:
+            mock_check_output.return_value = mock_output
+
+            assert ffprobe.duration_seconds_header('/tmp/test.mkv') == 10.0
+
+    def test_missing_duration_raises_value_error(self):
+        ffprobe = create_ffprobe()
+
+        with patch('yledl.ffmpeg.subprocess.check_output') as mock_check_output:
+            mock_check_output.return_value = b'{"streams": [], "format": {}}'
+
+            with pytest.raises(ValueError):
+                ffprobe.duration_seconds_header('/tmp/test.mkv')
+
+
+class TestFullStreamAlreadyDownloaded:
+    @pytest.fixture
+    def video_file(self, tmp_path):
+        filename = tmp_path / 'video.mkv'
+        filename.write_bytes(b'x' * 100_000)
+        return str(filename)
+
+    def test_complete_file_is_not_decoded(self, video_file):
+        ffprobe = create_ffprobe()
+
+        with patch('yledl.ffmpeg.subprocess.check_output') as mock_check_output:
+            mock_check_output.return_value = b'{"format": {"duration": "100.0"}}'
+
+            assert ffprobe.full_stream_already_downloaded(video_file, 100, 8)
+            assert mock_check_output.call_args[0][0][0] == 'ffprobe'
+
+    def test_short_duration(self, video_file):
+        ffprobe = create_ffprobe()
+
+        with patch('yledl.ffmpeg.subprocess.check_output') as mock_check_output:
+            mock_check_output.return_value = b'{"format": {"duration": "50.0"}}'
+
+            assert not ffprobe.full_stream_already_downloaded(video_file, 100)
+
+    def test_too_small_file_is_rejected_without_probing(self, video_file):
+        ffprobe = create_ffprobe()
+
+        with patch('yledl.ffmpeg.subprocess.check_output') as mock_check_output:
+            # 1000 kbit/s for 100 s would be about 12.5 MB
+            assert not ffprobe.full_stream_already_downloaded(video_file, 100, 1000)
+            mock_check_output.assert_not_called()
+
+    def test_verify_full_decodes_the_file(self, video_file):
+        ffprobe = create_ffprobe()
+        mock_output = b'size=     100kB time=00:01:40.00 bitrate= 8.0kbits/s'
+
+        with patch('yledl.ffmpeg.subprocess.check_output') as mock_check_output:
+            mock_check_output.return_value = mock_output
+
+            assert ffprobe.full_stream_already_downloaded(
+                video_file, 100, verify_full=True
+            )
+            assert mock_check_output.call_args[0][0][0] == 'ffmpeg'
+
+
+class TestCachingFfprobe:
+    URL = 'https://yledl.test/master.m3u8?hdnea=st=1~exp=2~hmac=abc'
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self, monkeypatch):
+        monkeypatch.setattr('yledl.ffmpeg._probed_programs', {})
+
+    def test_probes_each_manifest_once(self):
+        ffprobe = CachingFfprobe('ffprobe', 'ffmpeg', '1.2.3.4')
+
+        with patch('yledl.ffmpeg.subprocess.check_output') as mock_check_output:
+            mock_check_output.return_value = b'{"programs": []}'
+
+            ffprobe.show_programs_for_url(self.URL)
+            result = ffprobe.show_programs_for_url(
+                'https://yledl.test/master.m3u8?hdnea=st=3~exp=4~hmac=def'
+            )
+
+            assert result == {'programs': []}
+            assert mock_check_output.call_count == 1
+
+    def test_disk_cache_is_shared_between_runs(self, tmp_path, monkeypatch):
+        with patch('yledl.ffmpeg.subprocess.check_output') as mock_check_output:
+            mock_check_output.return_value = b'{"programs": [{"program_id": 1}]}'
+            CachingFfprobe(
+                'ffprobe', 'ffmpeg', '1.2.3.4', str(tmp_path)
+            ).show_programs_for_url(self.URL)
+
+            monkeypatch.setattr('yledl.ffmpeg._probed_programs', {})
+            result = CachingFfprobe(
+                'ffprobe', 'ffmpeg', '1.2.3.4', str(tmp_path)
+            ).show_programs_for_url(self.URL)
+
+            assert result == {'programs': [{'program_id': 1}]}
+            assert mock_check_output.call_count == 1
+
+
+def test_normalize_manifest_url():
+    assert (
+        normalize_manifest_url('HTTPS://Yledl.test/a.m3u8?b=2&hdnts=x&a=1#frag')
+        == 'https://yledl.test/a.m3u8?a=1&b=2'
+    )
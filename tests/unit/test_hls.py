@@ -0,0 +1,148 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+from types import SimpleNamespace
+from yledl.backends import DASHHLSBackend, HLSAudioBackend, HLSSubtitlesBackend
+from yledl.hls import (
+    first_segment_uri,
+    mpegts_start_time,
+    parse_attribute_list,
+    parse_master_playlist,
+)
+from yledl.streamprobe import manifest_to_stream_flavors
+
+MANIFEST_URL = 'https://yledl.test/hls/master.m3u8'
+
+MASTER_PLAYLIST = """#EXTM3U
+#EXT-X-VERSION:3
+#EXT-X-MEDIA:TYPE=SUBTITLES,GROUP-ID="subs",NAME="fin",LANGUAGE="fi",URI="subs/fi.m3u8"
+#EXT-X-STREAM-INF:BANDWIDTH=629000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2",SUBTITLES="subs"
+low/index.m3u8
+#EXT-X-I-FRAME-STREAM-INF:BANDWIDTH=100000,URI="iframes.m3u8"
+#EXT-X-STREAM-INF:BANDWIDTH=2548000,RESOLUTION=1280x720,CODECS="avc1.4d401f,mp4a.40.2",SUBTITLES="subs"
+https://cdn.yledl.test/high/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=96000,CODECS="mp4a.40.2"
+audio/index.m3u8
+"""
+
+MEDIA_PLAYLIST = """#EXTM3U
+#EXT-X-TARGETDURATION:6
+#EXTINF:6.0,
+segment0.ts
+#EXTINF:6.0,
+segment1.ts
+"""
+
+
+def mpegts_packet(pts):
+    pts_bytes = bytes(
+        [
+            0x21 | ((pts >> 29) & 0x0E),
+            (pts >> 22) & 0xFF,
+            0x01 | ((pts >> 14) & 0xFE),
+            (pts >> 7) & 0xFF,
+            0x01 | ((pts << 1) & 0xFE),
+        ]
+    )
+    pes = b'\x00\x00\x01\xe0\x00\x00\x80\x80\x05' + pts_bytes
+    header = b'\x47\x41\x00\x10'
+    return header + pes + b'\xff' * (188 - len(header) - len(pes))
+
+
+class FakeHttpClient:
+    def __init__(self, pages, segment=b''):
+        self.pages = pages
+        self.segment = segment
+
+    def download_page(self, url):
+        return self.pages[url]
+
+    def get(self, url, extra_headers=None, timeout=60):
+        return SimpleNamespace(content=self.segment)
+
+
+def test_parse_attribute_list():
+    attrs = parse_attribute_list('BANDWIDTH=96000,CODECS="avc1.4d401e,mp4a.40.2"')
+
+    assert attrs == {'BANDWIDTH': '96000', 'CODECS': 'avc1.4d401e,mp4a.40.2'}
+
+
+def test_parse_master_playlist():
+    master = parse_master_playlist(MASTER_PLAYLIST, MANIFEST_URL)
+
+    assert [v.program_id for v in master.variants] == [0, 1, 2]
+    assert master.variants[0].uri == 'https://yledl.test/hls/low/index.m3u8'
+    assert master.variants[1].uri == 'https://cdn.yledl.test/high/index.m3u8'
+    assert master.variants[1].bandwidth == 2548000
+    assert master.variants[1].width == 1280
+    assert master.variants[1].height == 720
+    assert master.variants[1].has_video()
+    assert not master.variants[2].has_video()
+    assert len(master.subtitles) == 1
+    assert master.subtitles[0].uri == 'https://yledl.test/hls/subs/fi.m3u8'
+    assert master.subtitles[0].language == 'fi'
+    assert not master.has_separate_audio(master.variants[0])
+
+
+def test_first_segment_uri():
+    assert (
+        first_segment_uri(MEDIA_PLAYLIST, 'https://yledl.test/hls/low/index.m3u8')
+        == 'https://yledl.test/hls/low/segment0.ts'
+    )
+
+
+def test_first_segment_uri_encrypted():
+    playlist = MEDIA_PLAYLIST.replace(
+        '#EXTINF:6.0,\nsegment0', '#EXT-X-KEY:METHOD=AES-128,URI="k"\n#EXTINF:6.0,\ns0'
+    )
+
+    assert first_segment_uri(playlist, MANIFEST_URL) is None
+
+
+def test_mpegts_start_time():
+    data = mpegts_packet(10 * 90000 + 450) + mpegts_packet(10 * 90000)
+
+    assert mpegts_start_time(data) == 10.0
+
+
+def test_manifest_to_stream_flavors():
+    httpclient = FakeHttpClient(
+        {
+            MANIFEST_URL: MASTER_PLAYLIST,
+            'https://yledl.test/hls/audio/index.m3u8': MEDIA_PLAYLIST,
+        },
+        mpegts_packet(2 * 90000),
+    )
+
+    flavors = manifest_to_stream_flavors(MANIFEST_URL, False, httpclient)
+
+    assert [fl.media_type for fl in flavors] == ['subtitle', 'audio', 'video', 'video']
+    assert isinstance(flavors[1].streams[0], HLSAudioBackend)
+    assert isinstance(flavors[0].streams[0], HLSSubtitlesBackend)
+    assert flavors[3].height == 720
+    assert flavors[3].bitrate == 2548
+    assert flavors[3].start_time == 2.0
+    backend = flavors[3].streams[0]
+    assert isinstance(backend, DASHHLSBackend)
+    assert backend.program_id == 1
+
+
+def test_manifest_to_stream_flavors_ambiguous_codecs():
+    playlist = '#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=96000\nindex.m3u8\n'
+    httpclient = FakeHttpClient({MANIFEST_URL: playlist})
+
+    assert manifest_to_stream_flavors(MANIFEST_URL, False, httpclient) is None
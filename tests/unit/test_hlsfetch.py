@@ -0,0 +1,154 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import io
+import os
+import random
+import time
+from types import SimpleNamespace
+import pytest
+import requests
+from yledl.errors import TransientDownloadError
+from yledl.hlsfetch import (
+    SegmentJournal,
+    fetch_segments,
+    plan_segmented_download,
+    write_segments,
+)
+
+MASTER_URL = 'https://yledl.test/master.m3u8'
+
+MASTER_PLAYLIST = """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=629000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2"
+low.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=2548000,RESOLUTION=1280x720,CODECS="avc1.4d401f,mp4a.40.2"
+high.m3u8
+"""
+
+MEDIA_PLAYLIST = """#EXTM3U
+#EXT-X-TARGETDURATION:6
+#EXTINF:6.0,
+seg0.ts
+#EXTINF:6.0,
+seg1.ts
+#EXT-X-ENDLIST
+"""
+
+
+class FakeHttpClient:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def download_page(self, url, extra_headers=None, timeout=60):
+        return self.pages[url]
+
+    def get(self, url, extra_headers=None, timeout=60):
+        time.sleep(random.uniform(0, 0.01))
+        if url not in self.pages:
+            raise requests.HTTPError(f'404 for {url}')
+        return SimpleNamespace(content=self.pages[url])
+
+
+def generate(segments):
+    yield from segments
+
+
+def test_plan_segmented_download():
+    httpclient = FakeHttpClient(
+        {
+            MASTER_URL: MASTER_PLAYLIST,
+            'https://yledl.test/high.m3u8': MEDIA_PLAYLIST,
+        }
+    )
+
+    stream = plan_segmented_download(MASTER_URL, 1, httpclient)
+
+    assert stream.segment_uris == [
+        'https://yledl.test/seg0.ts',
+        'https://yledl.test/seg1.ts',
+    ]
+
+
+def test_plan_segmented_download_live_stream():
+    httpclient = FakeHttpClient(
+        {
+            MASTER_URL: MASTER_PLAYLIST,
+            'https://yledl.test/low.m3u8': MEDIA_PLAYLIST.replace('#EXT-X-ENDLIST', ''),
+        }
+    )
+
+    assert plan_segmented_download(MASTER_URL, 0, httpclient) is None
+
+
+def test_fetch_segments_in_order():
+    uris = [f'https://yledl.test/seg{i}.ts' for i in range(20)]
+    httpclient = FakeHttpClient({uri: f'{i},'.encode() for i, uri in enumerate(uris)})
+    output = io.BytesIO()
+
+    write_segments(fetch_segments(uris, httpclient, connections=4), output)
+
+    assert output.getvalue() == b''.join(f'{i},'.encode() for i in range(20))
+
+
+def test_fetch_segments_failure():
+    httpclient = FakeHttpClient({'https://yledl.test/seg0.ts': b'data'})
+    uris = ['https://yledl.test/seg0.ts', 'https://yledl.test/missing.ts']
+
+    with pytest.raises(TransientDownloadError):
+        write_segments(fetch_segments(uris, httpclient, connections=2), io.BytesIO())
+
+
+def test_segment_journal_resumes_from_first_missing_segment(tmp_path):
+    output_name = str(tmp_path / 'video.mkv')
+    uris = [f'https://yledl.test/seg{i}.ts' for i in range(4)]
+    journal = SegmentJournal(output_name, uris)
+    assert journal.completed_segments() == 0
+
+    recorded = journal.record_segments(generate([b'aaa', b'bbb', b'ccc']), 0)
+    assert next(recorded) == b'aaa'
+    assert next(recorded) == b'bbb'
+    recorded.close()
+
+    # Simulate a segment that was interrupted while being written
+    with open(journal.part_filename, 'ab') as f:
+        f.write(b'cc')
+
+    resumed = SegmentJournal(output_name, uris)
+    assert resumed.completed_segments() == 2
+    assert b''.join(resumed.read_completed_segments(chunk_size=4)) == b'aaabbb'
+    assert list(resumed.record_segments(generate([b'ccc', b'ddd']), 2)) == [
+        b'ccc',
+        b'ddd',
+    ]
+    with open(resumed.part_filename, 'rb') as f:
+        assert f.read() == b'aaabbbcccddd'
+
+    resumed.remove()
+    assert not os.path.exists(resumed.part_filename)
+    assert not os.path.exists(resumed.journal_filename)
+
+
+def test_segment_journal_of_another_stream_is_discarded(tmp_path):
+    output_name = str(tmp_path / 'video.mkv')
+    journal = SegmentJournal(output_name, ['https://yledl.test/a0.ts'])
+    journal.completed_segments()
+    list(journal.record_segments(generate([b'aaa']), 0))
+
+    other = SegmentJournal(output_name, ['https://yledl.test/b0.ts'])
+
+    assert other.completed_segments() == 0
+    assert os.path.getsize(other.part_filename) == 0
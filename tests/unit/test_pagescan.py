@@ -0,0 +1,106 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import pytest
+from yledl.areena_playlist_parser import AreenaPlaylistParser
+from yledl.pagescan import ScannedPage
+
+
+def next_data_page(item_type):
+    next_data = {
+        'props': {
+            'pageProps': {
+                'meta': {'item': {'type': item_type}},
+                'view': {
+                    'tabs': [
+                        {
+                            'slug': 'jaksot',
+                            'content': [
+                                {'source': {'uri': 'yleareena://playlist/1-1'}}
+                            ],
+                        }
+                    ]
+                },
+            }
+        }
+    }
+    return (
+        '<html><head><title>Sarja</title></head><body><div id="__next"></div>'
+        '<script id="__NEXT_DATA__" type="application/json">'
+        f'{json.dumps(next_data, ensure_ascii=False)}</script></body></html>'
+    ).encode('utf-8')
+
+
+def test_next_data():
+    page = ScannedPage(next_data_page('TVSeries'), 'utf-8')
+
+    assert page.next_data['props']['pageProps']['meta']['item']['type'] == 'TVSeries'
+    assert page.initial_state is None
+    assert AreenaPlaylistParser._is_tv_series_page(page)
+
+
+def test_series_playlist_data_from_next_data():
+    page = ScannedPage(next_data_page('TVSeries'), 'utf-8')
+
+    playlist_data = AreenaPlaylistParser(None)._series_playlist_data(page)
+
+    assert playlist_data.base_url == 'yleareena://playlist/1-1'
+
+
+def test_next_data_on_a_non_series_page():
+    page = ScannedPage(next_data_page('TVProgram'), 'utf-8')
+
+    assert not AreenaPlaylistParser._is_tv_series_page(page)
+    assert not AreenaPlaylistParser._is_article_page(page)
+    assert AreenaPlaylistParser._extract_package_id(page) is None
+    # The DOM is not needed to rule out the old page types
+    assert page._tree is None
+
+
+def test_malformed_state_is_decoded_only_on_access():
+    html = (
+        b'<html><body><script id="__NEXT_DATA__" type="application/json">'
+        b'{"props": </script></body></html>'
+    )
+    page = ScannedPage(html, 'utf-8')
+
+    assert page.contains(b'__NEXT_DATA__')
+    with pytest.raises(json.JSONDecodeError):
+        page.next_data
+
+
+def test_initial_state():
+    html = (
+        '<html><body><script type="text/javascript">'
+        'window.__INITIAL__STATE__ = {"pageData": {"article": {"title": "Äänestys"}}};'
+        '</script></body></html>'
+    ).encode('iso-8859-1')
+
+    page = ScannedPage(html, 'iso-8859-1')
+
+    assert page.initial_state == {'pageData': {'article': {'title': 'Äänestys'}}}
+    assert AreenaPlaylistParser._is_article_page(page)
+
+
+def test_package_id_is_read_from_the_dom():
+    html = b'<html><body data-package-id="30-1"><p>Paketti</p></body></html>'
+
+    page = ScannedPage(html, 'utf-8')
+
+    assert page.next_data is None
+    assert AreenaPlaylistParser._extract_package_id(page) == '30-1'
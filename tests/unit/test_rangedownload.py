@@ -0,0 +1,189 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import io
+import logging
+import re
+import pytest
+import requests
+from yledl import RD_FAILED, RD_SUCCESS
+from yledl.errors import TransientDownloadError
+from yledl.rangedownload import RangeDownload, RangeJournal
+
+URL = 'https://yledl.test/podcast.mp3'
+
+
+class FakeResponse:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i : i + chunk_size]
+
+
+class FakeHttpClient:
+    def __init__(self, content, accept_ranges=True, fail_at=None):
+        self.content = content
+        self.accept_ranges = accept_ranges
+        self.fail_at = fail_at
+        self.requested_ranges = []
+
+    def open_stream(self, url, extra_headers=None, timeout=20):
+        range_header = (extra_headers or {}).get('Range')
+        if not range_header or not self.accept_ranges:
+            return FakeResponse(
+                200, self.content, {'Content-Length': str(len(self.content))}
+            )
+
+        start, end = (
+            int(x) for x in re.match(r'bytes=(\d+)-(\d+)', range_header).groups()
+        )
+        if start == self.fail_at:
+            raise requests.ConnectionError('Connection reset')
+
+        if end > 0:
+            self.requested_ranges.append(start)
+        headers = {'Content-Range': f'bytes {start}-{end}/{len(self.content)}'}
+        return FakeResponse(206, self.content[start : end + 1], headers)
+
+
+@pytest.fixture
+def small_ranges(monkeypatch):
+    monkeypatch.setattr('yledl.rangedownload.RANGE_SIZE', 10)
+
+
+def test_download_ranges(tmp_path, small_ranges):
+    content = bytes(range(95))
+    output = tmp_path / 'podcast.mp3'
+
+    res = RangeDownload(FakeHttpClient(content), URL, 3).save(str(output), False)
+
+    assert res == RD_SUCCESS
+    assert output.read_bytes() == content
+    assert not (tmp_path / 'podcast.mp3.ranges').exists()
+
+
+def test_download_without_range_support(tmp_path, small_ranges):
+    content = b'x' * 25
+    output = tmp_path / 'podcast.mp3'
+
+    httpclient = FakeHttpClient(content, accept_ranges=False)
+    res = RangeDownload(httpclient, URL, 3).save(str(output), True)
+
+    assert res == RD_SUCCESS
+    assert output.read_bytes() == content
+
+
+def test_resume_without_range_support_downloads_everything(
+    tmp_path, small_ranges, caplog
+):
+    content = b'x' * 25
+    output = tmp_path / 'podcast.mp3'
+    output.write_bytes(content[:10])
+
+    httpclient = FakeHttpClient(content, accept_ranges=False)
+    with caplog.at_level(logging.INFO, logger='yledl'):
+        res = RangeDownload(httpclient, URL, 3).save(str(output), True)
+
+    assert res == RD_SUCCESS
+    assert output.read_bytes() == content
+    assert 'does not support resuming' in caplog.text
+
+
+def test_resume_downloads_only_missing_ranges(tmp_path, small_ranges):
+    content = bytes(range(50))
+    output = tmp_path / 'podcast.mp3'
+
+    with pytest.raises(TransientDownloadError):
+        RangeDownload(FakeHttpClient(content, fail_at=20), URL, 1).save(
+            str(output), True
+        )
+
+    httpclient = FakeHttpClient(content)
+    res = RangeDownload(httpclient, URL, 2).save(str(output), True)
+
+    assert res == RD_SUCCESS
+    assert output.read_bytes() == content
+    # The worker may complete the range after the failed one before it
+    # notices the failure
+    assert 20 in httpclient.requested_ranges
+    assert set(httpclient.requested_ranges) <= {20, 30, 40}
+
+
+def test_resume_partial_file_without_journal(tmp_path, small_ranges):
+    content = bytes(range(40))
+    output = tmp_path / 'podcast.mp3'
+    output.write_bytes(content[:25])
+
+    httpclient = FakeHttpClient(content)
+    res = RangeDownload(httpclient, URL, 2).save(str(output), True)
+
+    assert res == RD_SUCCESS
+    assert output.read_bytes() == content
+    assert sorted(httpclient.requested_ranges) == [20, 30]
+
+
+class ErrorHttpClient:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def open_stream(self, url, extra_headers=None, timeout=20):
+        response = requests.Response()
+        response.status_code = self.status_code
+        raise requests.HTTPError(f'{self.status_code} Error', response=response)
+
+
+def test_client_error_is_not_transient(tmp_path):
+    res = RangeDownload(ErrorHttpClient(404), URL, 2).save(
+        str(tmp_path / 'podcast.mp3'), True
+    )
+
+    assert res == RD_FAILED
+
+
+def test_forbidden_suggests_an_expired_url(tmp_path):
+    with pytest.raises(TransientDownloadError) as exc_info:
+        RangeDownload(ErrorHttpClient(403), URL, 2).save(
+            str(tmp_path / 'podcast.mp3'), True
+        )
+
+    assert exc_info.value.url_expired
+
+
+def test_pipe():
+    content = b'abc' * 100000
+    output = io.BytesIO()
+
+    res = RangeDownload(FakeHttpClient(content), URL, 2).pipe(output)
+
+    assert res == RD_SUCCESS
+    assert output.getvalue() == content
+
+
+def test_range_journal_ranges(tmp_path, small_ranges):
+    journal = RangeJournal(str(tmp_path / 'file'), 25)
+
+    assert [(r.start, r.end) for r in journal.ranges] == [(0, 9), (10, 19), (20, 24)]
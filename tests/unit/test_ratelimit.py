@@ -0,0 +1,79 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+from yledl.ratelimit import BandwidthManager, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_allows_burst_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(1000, clock=clock, sleep=clock.sleep)
+
+    bucket.consume(1000)
+
+    assert clock.now == 0
+
+
+def test_token_bucket_limits_sustained_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(1000, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        bucket.consume(1000)
+
+    assert clock.now == 4.0
+
+
+def test_token_bucket_set_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(1000, clock=clock, sleep=clock.sleep)
+    bucket.consume(1000)
+
+    bucket.set_rate(500)
+    bucket.consume(500)
+
+    assert clock.now == 1.0
+
+
+def test_bandwidth_manager_splits_the_rate_between_jobs():
+    clock = FakeClock()
+    manager = BandwidthManager(1000, min_job_rate=100, clock=clock, sleep=clock.sleep)
+
+    with manager.job() as first:
+        assert first.rate == 1000
+
+        with manager.job() as second:
+            assert first.rate == second.rate == 500
+
+        assert first.rate == 1000
+
+
+def test_bandwidth_manager_job_minimum():
+    manager = BandwidthManager(1000, min_job_rate=400)
+
+    with manager.job() as first, manager.job(), manager.job():
+        assert first.rate == 400
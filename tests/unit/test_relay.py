@@ -0,0 +1,106 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import socket
+import socketserver
+import threading
+import pytest
+import requests
+from yledl.relay import RateLimitedRelay, parse_proxy_address
+
+BODY = b'segment data' * 1000
+
+
+class RecordingBucket:
+    def __init__(self):
+        self.consumed = 0
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        with self._lock:
+            self.consumed += amount
+
+
+class HttpHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request_line = self.rfile.readline()
+        while self.rfile.readline() not in (b'\r\n', b''):
+            pass
+
+        self.server.request_lines.append(request_line)
+        self.wfile.write(
+            b'HTTP/1.1 200 OK\r\n'
+            + f'Content-Length: {len(BODY)}\r\n'.encode('ascii')
+            + b'Connection: close\r\n\r\n'
+            + BODY
+        )
+
+
+@pytest.fixture
+def origin_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), HttpHandler)
+    server.daemon_threads = True
+    server.request_lines = []
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={'poll_interval': 0.1}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_plain_http_request(origin_server):
+    host, port = origin_server.server_address
+    bucket = RecordingBucket()
+
+    with RateLimitedRelay(bucket) as relay:
+        r = requests.get(
+            f'http://{host}:{port}/video/segment1.ts?t=1',
+            proxies={'http': relay.address},
+            timeout=10,
+        )
+
+    assert r.content == BODY
+    assert origin_server.request_lines == [b'GET /video/segment1.ts?t=1 HTTP/1.1\r\n']
+    assert bucket.consumed >= len(BODY)
+
+
+def test_connect_tunnel(origin_server):
+    host, port = origin_server.server_address
+    bucket = RecordingBucket()
+
+    with RateLimitedRelay(bucket) as relay:
+        relay_host, relay_port = parse_proxy_address(relay.address)
+        with socket.create_connection((relay_host, relay_port), timeout=10) as sock:
+            sock.sendall(f'CONNECT {host}:{port} HTTP/1.1\r\n\r\n'.encode('ascii'))
+            sock.sendall(b'GET /a.ts HTTP/1.1\r\nHost: x\r\n\r\n')
+            response = b''
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                response += data
+
+    assert response.startswith(b'HTTP/1.1 200 Connection established\r\n\r\n')
+    assert response.endswith(BODY)
+    assert bucket.consumed >= len(BODY)
+
+
+def test_parse_proxy_address():
+    assert parse_proxy_address('localhost:8118') == ('localhost', 8118)
+    assert parse_proxy_address('http://proxy.test') == ('proxy.test', 80)
@@ -0,0 +1,90 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+from yledl.sync import SYNC_MAX_FAILURES, SeriesSyncState
+
+SERIES_URL = 'https://areena.yle.fi/1-1234'
+
+
+def test_state_is_saved_and_loaded(tmp_path):
+    filename = str(tmp_path / 'state.json')
+    state = SeriesSyncState(filename, SERIES_URL)
+    state.season_counts['season-1'] = 3
+    state.add_episodes(['a', 'b', 'c'])
+    state.mark_downloaded('b')
+    state.flush()
+
+    loaded = SeriesSyncState(filename, SERIES_URL)
+
+    assert loaded.season_counts == {'season-1': 3}
+    assert loaded.episodes == ['a', 'b', 'c']
+    assert loaded.pending() == ['a', 'c']
+
+
+def test_downloads_are_saved_in_batches(tmp_path):
+    filename = str(tmp_path / 'state.json')
+    state = SeriesSyncState(filename, SERIES_URL, save_interval=2)
+    state.add_episodes(['a', 'b', 'c'])
+
+    state.mark_downloaded('a')
+    assert SeriesSyncState(filename, SERIES_URL).pending() == ['a', 'b', 'c']
+
+    state.mark_downloaded('b')
+    assert SeriesSyncState(filename, SERIES_URL).pending() == ['c']
+
+
+def test_repeatedly_failing_episode_is_given_up(tmp_path):
+    filename = str(tmp_path / 'state.json')
+    state = SeriesSyncState(filename, SERIES_URL)
+    state.add_episodes(['a', 'b'])
+
+    for _ in range(SYNC_MAX_FAILURES - 1):
+        state.mark_failed('a')
+    assert state.pending() == ['a', 'b']
+
+    state.mark_failed('a')
+    state.flush()
+
+    assert state.pending() == ['b']
+    assert SeriesSyncState(filename, SERIES_URL).pending() == ['b']
+
+
+def test_add_episodes_skips_known_episodes(tmp_path):
+    state = SeriesSyncState(str(tmp_path / 'state.json'), SERIES_URL)
+    state.add_episodes(['a', 'b'])
+    state.add_episodes(['b', 'c'])
+
+    assert state.episodes == ['a', 'b', 'c']
+    assert state.is_known('c')
+
+
+def test_state_of_another_series_is_ignored(tmp_path):
+    filename = str(tmp_path / 'state.json')
+    SeriesSyncState(filename, SERIES_URL).add_episodes(['a'])
+
+    state = SeriesSyncState(filename, 'https://areena.yle.fi/1-5678')
+
+    assert state.episodes == []
+
+
+def test_invalid_state_file_is_ignored(tmp_path):
+    state_file = tmp_path / 'state.json'
+    state_file.write_text('{')
+
+    state = SeriesSyncState(str(state_file), SERIES_URL)
+
+    assert state.episodes == []
@@ -0,0 +1,134 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+import requests
+from unittest.mock import Mock
+from utils import MockIOContext
+from yledl import RD_FAILED, StreamFilters
+from yledl.errors import FfmpegNotFoundError, TransientDownloadError
+from yledl.titleformatter import TitleFormatter
+from yledl.watch import SeriesWatcher
+from yledl.yledl import watch_urls
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def no_jitter(low, high):
+    return (low + high) / 2
+
+
+def test_urls_are_polled_at_the_interval():
+    clock = FakeClock()
+    polls = []
+    watcher = SeriesWatcher(
+        ['a', 'b', 'a'],
+        600,
+        lambda url: polls.append((clock.now, url)),
+        clock=clock,
+        sleep=clock.sleep,
+        uniform=no_jitter,
+    )
+
+    watcher.run(max_polls=4)
+
+    assert polls == [(600, 'a'), (600, 'b'), (1200, 'a'), (1200, 'b')]
+
+
+def test_polls_are_jittered():
+    clock = FakeClock()
+    polls = []
+    watcher = SeriesWatcher(
+        ['a'],
+        600,
+        lambda url: polls.append(clock.now),
+        clock=clock,
+        sleep=clock.sleep,
+        uniform=lambda low, high: low,
+    )
+
+    watcher.run(max_polls=2)
+
+    assert polls == [540, 1080]
+
+
+def test_failed_poll_does_not_stop_watching():
+    clock = FakeClock()
+    polls = []
+
+    def poll(url):
+        polls.append(url)
+        if len(polls) == 1:
+            raise requests.ConnectionError('Network is down')
+
+    watcher = SeriesWatcher(['a'], 600, poll, clock=clock, sleep=clock.sleep)
+
+    watcher.run(max_polls=2)
+
+    assert polls == ['a', 'a']
+
+
+def test_failed_download_does_not_stop_watching():
+    clock = FakeClock()
+    polls = []
+
+    def poll(url):
+        polls.append(url)
+        if len(polls) == 1:
+            raise TransientDownloadError('Connection reset')
+
+    watcher = SeriesWatcher(['a'], 600, poll, clock=clock, sleep=clock.sleep)
+
+    watcher.run(max_polls=2)
+
+    assert polls == ['a', 'a']
+
+
+@pytest.mark.parametrize('error', [FfmpegNotFoundError(), KeyError('episodes')])
+def test_fatal_errors_stop_watching(error):
+    clock = FakeClock()
+    polls = []
+
+    def poll(url):
+        polls.append(url)
+        raise error
+
+    watcher = SeriesWatcher(['a'], 600, poll, clock=clock, sleep=clock.sleep)
+
+    with pytest.raises(type(error)):
+        watcher.run(max_polls=2)
+
+    assert polls == ['a']
+
+
+def test_watch_urls_fails_when_an_error_stops_watching(monkeypatch):
+    monkeypatch.setattr('yledl.yledl.execute_action', Mock(side_effect=KeyError('x')))
+
+    res = watch_urls(
+        0.01, Mock(), MockIOContext(), StreamFilters(), TitleFormatter(), ['a']
+    )
+
+    assert res == RD_FAILED
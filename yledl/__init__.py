@@ -15,6 +15,7 @@
 # You should have received a copy of the GNU General Public License
 # along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
 
+from .aio import AsyncYleDlDownloader
 from .backends import Backends
 from .downloader import YleDlDownloader
 from .exitcodes import RD_SUCCESS, RD_FAILED, RD_INCOMPLETE
@@ -27,6 +28,7 @@ __all__ = [
     '__version__',
     'execute_action',
     'YleDlDownloader',
+    'AsyncYleDlDownloader',
     'StreamFilters',
     'DownloadLimits',
     'IOContext',
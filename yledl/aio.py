@@ -0,0 +1,333 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import itertools
+import logging
+from typing import Any, AsyncIterator, Iterable, Optional, TypeVar, cast
+from .backends import BaseDownloader
+from .clip import Clip
+from .downloader import ClipRegistry, YleDlDownloader, combine_exit_status
+from .errors import ExternalApplicationNotFoundError, TransientDownloadError
+from .exitcodes import RD_SUCCESS, RD_FAILED
+from .extractors import extractor_factory, AreenaExtractor
+from .geolocation import AreenaGeoLocation
+from .http import HttpClient
+from .io import IOContext
+from .retry import DownloadAttempt, RetryPolicy
+from .streamfilters import StreamFilters
+from .subprocess import execute_pipe_async
+from .titleformatter import TitleFormatter
+
+logger = logging.getLogger('yledl')
+
+T = TypeVar('T')
+
+
+class AsyncYleDlDownloader:
+    """Asyncio interface for resolving and downloading clips.
+
+    The methods mirror those of YleDlDownloader, but they are coroutines
+    that can run concurrently on one event loop. ffmpeg, ffprobe and wget
+    run as asyncio subprocesses. If a task is cancelled, the processes it
+    started are interrupted and waited for.
+
+    The HTTP requests and the parsing of the Areena pages run on the
+    default executor of the event loop. The same goes for backends that
+    download in-process (plain HTTP and parallel HLS segment downloads);
+    those finish in the background if the task is cancelled.
+    """
+
+    def __init__(
+        self,
+        geolocation: AreenaGeoLocation,
+        title_formatter: TitleFormatter,
+        httpclient: HttpClient,
+        _extractor_factory=extractor_factory,
+        clip_registry: Optional[ClipRegistry] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        self.downloader = YleDlDownloader(
+            geolocation,
+            title_formatter,
+            httpclient,
+            _extractor_factory,
+            clip_registry,
+            retry_policy,
+        )
+
+    async def download_clips(
+        self, base_url: str, io: IOContext, filters: StreamFilters
+    ) -> int:
+        """Download all clips on base_url.
+
+        Up to io.jobs clips are downloaded concurrently.
+        """
+        prober = self.downloader.create_prober(io, filters)
+        extractor = await self.create_extractor(base_url, io, prober)
+        if not extractor:
+            return RD_FAILED
+
+        try:
+            return await self._download_playlist_clips(base_url, extractor, io, filters)
+        finally:
+            self.downloader.flush_sync_state(base_url, extractor, io)
+
+    async def _download_playlist_clips(
+        self,
+        base_url: str,
+        extractor: AreenaExtractor,
+        io: IOContext,
+        filters: StreamFilters,
+    ) -> int:
+        playlist = await asyncio.to_thread(
+            self.downloader.download_playlist, base_url, extractor, io, filters
+        )
+        head = await asyncio.to_thread(list, itertools.islice(playlist, 2))
+        if not self.downloader.check_playlist_length(head, extractor, io):
+            return RD_FAILED
+
+        clip_urls = self.downloader.drop_skipped_clips(
+            itertools.chain(head, playlist), extractor, io
+        )
+
+        slots = asyncio.Semaphore(max(io.jobs, 1))
+        tasks: list[asyncio.Future[int]] = []
+        try:
+            async for clip_url in iterate_in_thread(clip_urls):
+                await slots.acquire()
+                tasks.append(
+                    asyncio.ensure_future(
+                        self._download_job(
+                            slots, clip_url, base_url, extractor, filters, io
+                        )
+                    )
+                )
+
+            statuses = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        overall_status = RD_SUCCESS
+        for status in statuses:
+            overall_status = combine_exit_status(overall_status, status)
+
+        return overall_status
+
+    async def _download_job(
+        self,
+        slots: asyncio.Semaphore,
+        clip_url: str,
+        base_url: str,
+        extractor: AreenaExtractor,
+        filters: StreamFilters,
+        io: IOContext,
+    ) -> int:
+        try:
+            return await self.download_with_retry(
+                clip_url, base_url, extractor, filters, io
+            )
+        finally:
+            slots.release()
+
+    async def download_with_retry(
+        self,
+        clip_url: str,
+        base_url: str,
+        extractor: AreenaExtractor,
+        filters: StreamFilters,
+        io: IOContext,
+        clip: Optional[Clip] = None,
+    ) -> int:
+        """Download a clip, retrying on transient errors.
+
+        See YleDlDownloader.download_with_retry().
+        """
+        retry_policy = self.downloader.retry_policy
+        attempt = await self.download_attempt(
+            clip_url, clip, base_url, extractor, filters, io
+        )
+        retry_count = 0
+        while attempt.retry and retry_count < retry_policy.max_retries:
+            retry_count += 1
+            logger.info(f'Retry attempt {retry_count} of {retry_policy.max_retries}')
+            await asyncio.sleep(retry_policy.delay(retry_count))
+            attempt = await self.download_attempt(
+                clip_url, attempt.clip, base_url, extractor, filters, io
+            )
+
+        if attempt.status == RD_FAILED:
+            self.downloader.add_failure_to_sync_state(
+                clip_url, base_url, extractor, filters, io
+            )
+
+        return attempt.status
+
+    async def download_attempt(
+        self,
+        clip_url: str,
+        clip: Optional[Clip],
+        base_url: str,
+        extractor: AreenaExtractor,
+        filters: StreamFilters,
+        io: IOContext,
+    ) -> DownloadAttempt:
+        """Try to download a clip once.
+
+        Extracts clip_url if clip is None.
+        """
+        if clip is None:
+            clip = await asyncio.to_thread(extractor.extract_clip, clip_url, base_url)
+
+        try:
+            status = await self.download_first_available_stream(clip, filters, io)
+        except TransientDownloadError as ex:
+            logger.warning(ex.message)
+            if ex.url_expired:
+                # Extract again with fresh manifest URLs
+                await asyncio.to_thread(extractor.drop_cached_preview, clip_url)
+                return DownloadAttempt(RD_FAILED, retry=True)
+
+            return DownloadAttempt(RD_FAILED, retry=True, clip=clip)
+
+        # Download completed
+        if status == RD_SUCCESS:
+            self.downloader.add_to_download_archive(clip, extractor, filters, io)
+            self.downloader.add_to_sync_state(
+                clip_url, base_url, extractor, filters, io
+            )
+            self.downloader.add_to_clip_registry(clip_url, extractor)
+
+        return DownloadAttempt(status)
+
+    async def download_first_available_stream(
+        self, clip: Clip, filters: StreamFilters, io: IOContext
+    ) -> int:
+        for stream in self.downloader.valid_streams(clip, filters):
+            logger.debug(f'Now trying downloader {stream.name}')
+
+            output_file = self.downloader.generate_output_name(clip.title, stream, io)
+            try:
+                return await self.save_to_file(clip, stream, io, output_file)
+            except ExternalApplicationNotFoundError:
+                # The downloader subprocess failed to start (a missing application?).
+                # Try the next backend.
+                continue
+
+        return RD_FAILED
+
+    async def save_to_file(
+        self, clip: Clip, downloader: BaseDownloader, io: IOContext, outputfile: str
+    ) -> int:
+        downloader.warn_on_unsupported_feature(io)
+
+        if not outputfile:
+            return RD_FAILED
+
+        already_downloaded = await asyncio.to_thread(
+            self.downloader.should_skip_downloading, outputfile, downloader, clip, io
+        )
+        if already_downloaded:
+            logger.info(f'{outputfile} has already been downloaded.')
+            return RD_SUCCESS
+
+        self.downloader.log_output_file(outputfile)
+        with self.downloader.bandwidth_share(io) as job_io:
+            dl_result = await downloader.save_stream_async(outputfile, clip, job_io)
+
+        if dl_result == RD_SUCCESS:
+            self.downloader.log_output_file(outputfile, True)
+            if io.xattr:
+                self.downloader.set_extended_file_attributes(
+                    outputfile, clip.metadata(io), clip.origin_url
+                )
+            await self.postprocess(io.postprocess_command, outputfile, [])
+
+        return dl_result
+
+    async def postprocess(
+        self,
+        postprocess_command: Optional[str],
+        videofile: str,
+        subtitlefiles: Iterable[str],
+    ) -> Optional[int]:
+        if postprocess_command:
+            args = [postprocess_command, videofile]
+            args.extend(subtitlefiles)
+            return await execute_pipe_async([args])
+        else:
+            return None
+
+    async def get_urls(
+        self, base_url: str, io: IOContext, filters: StreamFilters
+    ) -> list[str]:
+        return await asyncio.to_thread(
+            lambda: list(self.downloader.get_urls(base_url, io, filters))
+        )
+
+    async def get_titles(
+        self, base_url: str, io: IOContext, latest_only: bool
+    ) -> list[str]:
+        return await asyncio.to_thread(
+            lambda: list(self.downloader.get_titles(base_url, io, latest_only))
+        )
+
+    async def get_metadata(
+        self, base_url: str, io: IOContext, filters: StreamFilters
+    ) -> list[dict[str, Any]]:
+        return await asyncio.to_thread(
+            lambda: list(self.downloader.get_metadata(base_url, io, filters))
+        )
+
+    async def get_playlist(self, base_url: str, io: IOContext) -> list[str]:
+        return await asyncio.to_thread(
+            lambda: list(self.downloader.get_playlist(base_url, io))
+        )
+
+    async def create_extractor(
+        self, base_url: str, io: IOContext, prober
+    ) -> Optional[AreenaExtractor]:
+        extractor = await asyncio.to_thread(
+            self.downloader.extractor_factory,
+            base_url,
+            self.downloader.language_chooser(base_url, io),
+            self.downloader.httpclient,
+            self.downloader.title_formatter,
+            prober,
+        )
+        if not extractor:
+            self.downloader.log_unsupported_url_error(base_url)
+
+        return extractor
+
+
+async def iterate_in_thread(iterable: Iterable[T]) -> AsyncIterator[T]:
+    """Iterate a blocking iterable without blocking the event loop.
+
+    Each item is produced on the default executor.
+    """
+    done = object()
+    iterator = iter(iterable)
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            return
+
+        yield cast(T, item)
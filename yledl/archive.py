@@ -0,0 +1,88 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger('yledl')
+
+_open_archives: dict[str, 'DownloadArchive'] = {}
+_open_archives_lock = threading.Lock()
+
+
+class DownloadArchive:
+    """Append-only record of completely downloaded program IDs.
+
+    The archive file contains one program ID per line. The whole file is
+    loaded into a set when the archive is opened, and new IDs are appended
+    to the end of the file as soon as they are added.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._program_ids = self._read_program_ids(filename)
+
+    def __contains__(self, program_id: str) -> bool:
+        return program_id in self._program_ids
+
+    def __len__(self) -> int:
+        return len(self._program_ids)
+
+    def add(self, program_id: str) -> None:
+        with self._lock:
+            if program_id in self._program_ids:
+                return
+
+            try:
+                with open(self.filename, 'a', encoding='utf-8') as f:
+                    f.write(f'{program_id}\n')
+            except OSError as exc:
+                logger.warning(
+                    f'Failed to write to the download archive {self.filename}: '
+                    f'{exc.strerror}'
+                )
+
+            self._program_ids.add(program_id)
+
+    @staticmethod
+    def _read_program_ids(filename: str) -> set[str]:
+        if not os.path.exists(filename):
+            return set()
+
+        with open(filename, encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip()}
+
+
+def open_download_archive(filename: str) -> DownloadArchive:
+    """Open a download archive file.
+
+    The archive is loaded only once. Subsequent calls with the same file name
+    return the same DownloadArchive instance.
+    """
+    with _open_archives_lock:
+        key = os.path.abspath(filename)
+        archive = _open_archives.get(key)
+        if archive is None:
+            archive = DownloadArchive(filename)
+            logger.debug(
+                f'Loaded {len(archive)} program IDs from the download archive {filename}'
+            )
+            _open_archives[key] = archive
+
+        return archive
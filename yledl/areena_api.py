@@ -18,7 +18,7 @@
 from typing import Optional
 from datetime import datetime
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from .streamflavor import StreamFlavor
 from .subtitles import Subtitle
 
@@ -43,9 +43,12 @@ class AreenaApiProgramInfo:
 @dataclass(frozen=True)
 class EpisodeMetadata:
     uri: str
+    # The position of the season on the series page, starting from 1
     season_number: Optional[int]
     episode_number: Optional[int]
     release_date: Optional[datetime]
+    # The season number from the season title (3 for "Kausi 3"), if known
+    season: Optional[int] = None
 
     def sort_key(self):
         return (
@@ -55,4 +58,4 @@ class EpisodeMetadata:
         )
 
     def with_episode_number(self, ep):
-        return EpisodeMetadata(self.uri, self.season_number, ep, self.release_date)
+        return replace(self, episode_number=ep)
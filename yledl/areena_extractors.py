@@ -130,6 +130,22 @@ class AreenaPreviewApiParser:
         data = self.preview.get('data', {})
         return data.get('gone') is not None
 
+    def is_program(self):
+        """Does the response describe a program or a live stream?
+
+        The response on a series or a package ID doesn't have any of these.
+        """
+        data = self.preview.get('data', {})
+        program_keys = [
+            'ongoing_ondemand',
+            'ongoing_event',
+            'ongoing_channel',
+            'pending_event',
+            'pending_ondemand',
+            'gone',
+        ]
+        return any(data.get(key) is not None for key in program_keys)
+
     def ongoing(self):
         data = self.preview.get('data', {})
         return (
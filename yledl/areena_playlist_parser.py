@@ -15,18 +15,40 @@
 # You should have received a copy of the GNU General Public License
 # along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
 
+from dataclasses import dataclass, replace
 from datetime import datetime
 import json
 import re
 import logging
-from typing import Iterable, Sequence, Optional
+from typing import Iterable, Iterator, Sequence, Optional
 from .areena_api import EpisodeMetadata
+from .concurrency import ordered_map
 from .http import update_url_query
+from .pagescan import ScannedPage
 from .play_list_data import PlaylistData
+from .sync import SeriesSyncState
 from .timestamp import parse_areena_timestamp
 
 logger = logging.getLogger('yledl')
 
+# Areena server fails (502 Bad gateway) if the page size is larger than 100.
+PAGE_SIZE = 100
+
+# The maximum number of playlist pages that are downloaded concurrently
+PLAYLIST_MAX_WORKERS = 8
+
+# A playlist is sorted by date if fewer than this share of the episodes
+# have an episode number and more than COMMON_TIMESTAMPS have a date
+RARE_EPISODE_NUMBERS = 0.5
+COMMON_TIMESTAMPS = 0.8
+
+
+@dataclass(frozen=True)
+class PlaylistPage:
+    episodes: list[EpisodeMetadata]
+    # The number of episodes in the season, if the API reports it
+    total_count: Optional[int]
+
 
 class AreenaPlaylistParser:
     """Get a list of episodes in a series from Areena API
@@ -34,28 +56,74 @@ class AreenaPlaylistParser:
     Reference: https://docs.api.yle.fi/api/programs-api-v3
     """
 
-    def __init__(self, httpclient):
+    def __init__(self, httpclient, max_workers: int = PLAYLIST_MAX_WORKERS):
         self.httpclient = httpclient
+        self.max_workers = max_workers
+        # Metadata of the episodes on the latest parsed playlist, keyed by URI
+        self.episodes: dict[str, EpisodeMetadata] = {}
 
     def get(self, url: str, latest_only: bool = False) -> list[str]:
         """If url is a series page, return a list of included episode pages."""
-        tree = self.httpclient.download_html_tree(url)
-        if tree is None:
-            logger.warning(f'Failed to download {url} while looking for a playlist')
-            return [url]
+        return self._playlist_from_page(url, self._download_html(url), latest_only)
+
+    def iter_playlist(self, url: str, latest_only: bool = False) -> Iterator[str]:
+        """Like get(), but yield episode pages as soon as their order is known.
+
+        The episodes of a TV series are yielded one season at a time while
+        the seasons are numbered in ascending order. Other playlists, and
+        the rest of a series after an unnumbered or unordered season, are
+        yielded when they are complete.
+        """
+        page = self._download_html(url)
+        if not latest_only and self._is_tv_series_page(page):
+            logger.debug('TV playlist')
+            playlist_data = self._series_playlist_data(page)
+            if playlist_data is not None:
+                yield from self._stream_playlist(playlist_data)
+        else:
+            yield from self._playlist_from_page(url, page, latest_only)
+
+    def sync(self, url: str, state: SeriesSyncState) -> list[str]:
+        """Add new episodes on the playlist at url to state.
+
+        Returns the episodes in state that haven't been downloaded yet.
+
+        On a TV series, the first page of each season tells if the number of
+        episodes has changed since the previous sync. Unchanged seasons are
+        not listed again, and a grown season is listed starting from the
+        last page seen on the previous sync.
+        """
+        page = self._download_html(url)
+        playlist_data = None
+        if self._is_tv_series_page(page):
+            logger.debug('TV playlist')
+            playlist_data = self._series_playlist_data(page)
+
+        if playlist_data is not None:
+            state.add_episodes(self._download_new_episodes(playlist_data, state))
+        else:
+            state.add_episodes(self._playlist_from_page(url, page, False))
+
+        return state.pending()
 
-        if self._is_tv_series_page(tree):
+    def _download_html(self, url: str) -> ScannedPage:
+        return ScannedPage(*self.httpclient.download_html(url))
+
+    def _playlist_from_page(
+        self, url: str, page: ScannedPage, latest_only: bool
+    ) -> list[str]:
+        if self._is_tv_series_page(page):
             logger.debug('TV playlist')
-            playlist = self._parse_series_playlist(tree, latest_only)
-        elif self._is_radio_series_page(tree):
+            playlist = self._parse_series_playlist(page, latest_only)
+        elif self._is_radio_series_page(page):
             logger.debug('Radio playlist')
-            playlist = self._parse_radio_playlist(tree)
-        elif self._extract_package_id(tree) is not None:
+            playlist = self._parse_radio_playlist(page)
+        elif self._extract_package_id(page) is not None:
             logger.debug('Package playlist')
-            playlist = self._parse_package_playlist(tree)
-        elif self._is_article_page(tree):
+            playlist = self._parse_package_playlist(page)
+        elif self._is_article_page(page):
             logger.debug('Yle article playlist or a short video')
-            playlist = self._parse_yle_article_playlist(tree)
+            playlist = self._parse_yle_article_playlist(page)
         else:
             logger.debug('Not a playlist')
             playlist = [url]
@@ -72,12 +140,11 @@ class AreenaPlaylistParser:
         return playlist
 
     @staticmethod
-    def _is_tv_series_page(tree) -> bool:
-        next_data_tag = tree.xpath('//script[@id="__NEXT_DATA__"]')
-        if len(next_data_tag) == 0:
+    def _is_tv_series_page(page: ScannedPage) -> bool:
+        next_data = page.next_data
+        if next_data is None:
             return False
 
-        next_data = json.loads(next_data_tag[0].text)
         ptype = (
             next_data.get('props', {})
             .get('pageProps', {})
@@ -89,16 +156,19 @@ class AreenaPlaylistParser:
         return ptype in ['TVSeries', 'TVSeason', 'TVView', 'RadioSeries', 'Package']
 
     @staticmethod
-    def _is_article_page(tree) -> bool:
-        state_script_nodes = tree.xpath(
-            '//script[@type="text/javascript" and '
-            '(contains(text(), "window.__INITIAL__STATE__") or '
-            ' contains(text(), "window.__INITIAL_STATE__"))]/text()'
-        )
-        return len(state_script_nodes) > 0
+    def _is_article_page(page: ScannedPage) -> bool:
+        return page.initial_state is not None
 
     @staticmethod
-    def _is_radio_series_page(tree) -> bool:
+    def _is_radio_series_page(page: ScannedPage) -> bool:
+        # Avoid building the DOM on pages that can't match
+        if not page.contains(b'RadioPlayer'):
+            return False
+
+        tree = page.tree()
+        if tree is None:
+            return False
+
         is_radio_page = len(tree.xpath('//div[contains(@class, "RadioPlayer")]')) > 0
         if is_radio_page:
             episode_modal = tree.xpath('//div[starts-with(@class, "EpisodeModal")]')
@@ -109,23 +179,25 @@ class AreenaPlaylistParser:
         else:
             return False
 
-    def _parse_series_playlist(self, html_tree, latest_only: bool) -> list[str]:
-        next_data_tag = html_tree.xpath('//script[@id="__NEXT_DATA__"]')
-        if next_data_tag:
-            next_data = json.loads(next_data_tag[0].text)
+    def _parse_series_playlist(self, page: ScannedPage, latest_only: bool) -> list[str]:
+        playlist_data = self._series_playlist_data(page)
+        if playlist_data is None:
+            return []
+
+        return self._download_playlist_or_latest(playlist_data, latest_only)
+
+    def _series_playlist_data(self, page: ScannedPage) -> Optional[PlaylistData]:
+        next_data = page.next_data
+        if next_data is not None:
             page_props = next_data.get('props', {}).get('pageProps', {})
             tabs = page_props.get('view', {}).get('tabs', [])
             first_tab_slug = tabs[0].get('slug') if tabs else None
             selected_tab = page_props.get('selectedTab') or first_tab_slug or 'jaksot'
-            playlist_data = self._parse_episodes_tab(
+            return self._parse_episodes_tab(
                 tabs, selected_tab
             ) or self._parse_episodes_tab(tabs, None)
-            if playlist_data is None:
-                return []
 
-            return self._download_playlist_or_latest(playlist_data, latest_only)
-
-        return []
+        return None
 
     def _parse_episodes_tab(self, next_data_tabs, tab_slug):
         if tab_slug:
@@ -147,27 +219,33 @@ class AreenaPlaylistParser:
                     uri = playlist_data.get('source', {}).get('uri')
 
                     series_parameters = []
+                    season_numbers = []
                     filters = playlist_data.get('filters', [])
                     if filters:
                         options = filters[0].get('options', [])
-                        parameters = [
-                            (x['parameters'], self._series_sort_key(x['title']))
-                            for x in options
+                        options = sorted(
+                            options, key=lambda x: self._series_sort_key(x['title'])
+                        )
+                        series_parameters = [x['parameters'] for x in options]
+                        season_numbers = [
+                            self._season_number(x['title']) for x in options
                         ]
-                        parameters = sorted(parameters, key=lambda x: x[1])
-                        series_parameters = [p[0] for p in parameters]
 
-                    return PlaylistData(uri, series_parameters)
+                    return PlaylistData(uri, series_parameters, season_numbers)
 
         return None
 
     def _series_sort_key(self, title: str) -> str:
         """Extract the season number from 'Kausi 1' and pad with zeroes"""
+        season = self._season_number(title)
+        return str(season).zfill(5) if season is not None else title
+
+    def _season_number(self, title: str) -> Optional[int]:
         m = re.match(r'(?:Kausi|Säsong) (\d+)\b', title)
-        return m.group(1).zfill(5) if m else title
+        return int(m.group(1)) if m else None
 
-    def _parse_package_playlist(self, html_tree) -> list[str]:
-        package_tag = html_tree.xpath('//div[@class="package-view"]/@data-view')
+    def _parse_package_playlist(self, page: ScannedPage) -> list[str]:
+        package_tag = page.tree().xpath('//div[@class="package-view"]/@data-view')
         if package_tag:
             package_data = json.loads(package_tag[0])
             tabs = package_data.get('tabs', [])
@@ -180,8 +258,8 @@ class AreenaPlaylistParser:
 
         return []
 
-    def _parse_radio_playlist(self, html_tree) -> list[str]:
-        state_tag = html_tree.xpath(
+    def _parse_radio_playlist(self, page: ScannedPage) -> list[str]:
+        state_tag = page.tree().xpath(
             '//script[contains(., "window.STORE_STATE_FROM_SERVER")]'
         )
         if state_tag:
@@ -201,13 +279,237 @@ class AreenaPlaylistParser:
     def _download_playlist_or_latest(
         self, playlist_data: PlaylistData, latest_season_only: bool = False
     ) -> list[str]:
-        season_urls = list(enumerate(playlist_data.season_playlist_urls(), start=1))
         if latest_season_only:
             # Optimization: The latest episode belongs to the latest season
-            season_urls = season_urls[-1:]
+            return self._download_latest_episode(playlist_data)
+
+        season_urls = list(enumerate(playlist_data.season_playlist_urls(), start=1))
+        playlist = self._order_episodes(
+            self._with_seasons(self._download_playlist(season_urls), playlist_data)
+        )
+        self.episodes = {x.uri: x for x in playlist}
+
+        return [x.uri for x in playlist]
+
+    def _download_latest_episode(self, playlist_data: PlaylistData) -> list[str]:
+        """Return the newest episode of the latest season.
+
+        Usually only the first and the last page of the season are needed.
+        Falls back to downloading and sorting the whole season, if the
+        episodes are not consistently numbered.
+        """
+        season_num, season_url = list(
+            enumerate(playlist_data.season_playlist_urls(), start=1)
+        )[-1]
+        first_page = self._download_page(season_num, season_url, 0)
+        latest = self._latest_on_end_pages(season_num, season_url, first_page)
+        if latest is not None:
+            playlist = self._with_seasons([latest], playlist_data)
+        else:
+            logger.debug('Downloading the whole season to find the latest episode')
+            later_pages = self._download_later_pages(season_num, season_url, first_page)
+            playlist = self._order_episodes(
+                self._with_seasons(
+                    self._season_episodes(first_page, later_pages), playlist_data
+                )
+            )[-1:]
 
-        playlist = self._download_playlist(season_urls)
+        self.episodes = {x.uri: x for x in playlist}
 
+        return [x.uri for x in playlist]
+
+    def _latest_on_end_pages(
+        self, season_num: int, season_url: str, first_page: Optional[PlaylistPage]
+    ) -> Optional[EpisodeMetadata]:
+        """Find the newest episode on the first and the last page of a season.
+
+        Returns None if the season fits on the first page, or if the newest
+        episode can't be found without downloading all pages. That is the
+        case if the number of episodes is unknown, or the episode numbers are
+        missing or not in ascending or descending order.
+        """
+        if (
+            first_page is None
+            or first_page.total_count is None
+            or first_page.total_count <= PAGE_SIZE
+        ):
+            return None
+
+        last_offset = (first_page.total_count - 1) // PAGE_SIZE * PAGE_SIZE
+        last_page = self._download_page(season_num, season_url, last_offset)
+        if last_page is None:
+            return None
+
+        episodes = first_page.episodes + last_page.episodes
+        numbers = [x.episode_number for x in episodes if x.episode_number is not None]
+        if not numbers or len(numbers) < len(episodes):
+            return None
+
+        pairs = list(zip(numbers, numbers[1:]))
+        ascending = all(a <= b for a, b in pairs)
+        descending = all(a >= b for a, b in pairs)
+        if not (ascending or descending):
+            return None
+
+        return max(episodes, key=lambda x: x.sort_key())
+
+    def _download_new_episodes(
+        self, playlist_data: PlaylistData, state: SeriesSyncState
+    ) -> list[str]:
+        """Download the episodes that are not yet in state.
+
+        Updates state.season_counts, if a season was listed completely.
+        """
+        season_urls = list(enumerate(playlist_data.season_playlist_urls(), start=1))
+        first_pages = self._download_pages(
+            [(season_num, season_url, 0) for season_num, season_url in season_urls]
+        )
+
+        self.episodes = {}
+        new_episodes = []
+        for (season_num, season_url), first_page in zip(season_urls, first_pages):
+            total_count = first_page.total_count if first_page else None
+            synced_count = state.season_counts.get(season_url)
+            if total_count is not None and total_count == synced_count:
+                logger.debug(f'No new episodes in season {season_num}')
+                continue
+
+            later_pages = None
+            if total_count is not None and synced_count is not None:
+                # New episodes are usually appended to the end of a season
+                later_pages = self._download_tail_pages(
+                    season_num, season_url, synced_count, total_count
+                )
+                tail_episodes = self._season_episodes(first_page, later_pages)
+                num_new = sum(not state.is_known(x.uri) for x in tail_episodes)
+                if num_new < total_count - synced_count:
+                    logger.debug(f'Listing all episodes in season {season_num}')
+                    later_pages = None
+
+            if later_pages is None:
+                later_pages = self._download_later_pages(
+                    season_num, season_url, first_page
+                )
+
+            episodes = self._season_episodes(first_page, later_pages)
+            unseen = [x for x in episodes if not state.is_known(x.uri)]
+            ordered = self._order_episodes(self._with_seasons(unseen, playlist_data))
+            self.episodes.update((x.uri, x) for x in ordered)
+            new_episodes.extend(x.uri for x in ordered)
+
+            pages = [first_page] + [page for _, page in later_pages]
+            if total_count is not None and all(page is not None for page in pages):
+                state.season_counts[season_url] = total_count
+
+        logger.debug(f'Found {len(new_episodes)} new episodes')
+
+        return new_episodes
+
+    def _download_tail_pages(
+        self, season_num: int, season_url: str, synced_count: int, total_count: int
+    ) -> list[tuple[int, Optional[PlaylistPage]]]:
+        """Download the pages after the first page of a season.
+
+        Starts from the page of the last episode seen on the previous sync.
+        """
+        start = max(PAGE_SIZE, max(synced_count - 1, 0) // PAGE_SIZE * PAGE_SIZE)
+        offsets = list(range(start, total_count, PAGE_SIZE))
+        pages = self._download_pages([(season_num, season_url, x) for x in offsets])
+        return list(zip(offsets, pages))
+
+    def _stream_playlist(self, playlist_data: PlaylistData) -> Iterator[str]:
+        """Yield the episodes of a series one season at a time.
+
+        A season is yielded as soon as it has been downloaded, if its order
+        is final: all episodes are numbered and listed in ascending order,
+        and the seasons that haven't been downloaded yet can't make
+        _order_episodes() ignore the episode numbers. After the first
+        season that doesn't qualify, the rest of the playlist is collected
+        and ordered like in get().
+
+        The season sizes are taken from the first page of each season. If a
+        later page fails to download, the playlist is shorter than expected
+        and the seasons that were already yielded may be ordered differently
+        than get() would order them.
+        """
+        season_urls = list(enumerate(playlist_data.season_playlist_urls(), start=1))
+        first_pages = self._download_pages(
+            [(season_num, season_url, 0) for season_num, season_url in season_urls]
+        )
+        total_count = self._expected_episode_count(first_pages)
+        self.episodes = {}
+        playlist: list[EpisodeMetadata] = []
+        streaming = True
+        for season in self._iter_seasons(season_urls, first_pages):
+            season = self._with_seasons(season, playlist_data)
+            playlist.extend(season)
+            streaming = (
+                streaming
+                and self._is_in_episode_number_order(season)
+                and not self._may_ignore_episode_numbers(playlist, total_count)
+            )
+            if streaming:
+                for x in season:
+                    self.episodes[x.uri] = x
+                    yield x.uri
+
+        for x in self._order_episodes(playlist):
+            if x.uri not in self.episodes:
+                self.episodes[x.uri] = x
+                yield x.uri
+
+    def _expected_episode_count(
+        self, first_pages: Sequence[Optional[PlaylistPage]]
+    ) -> Optional[int]:
+        """The number of episodes on all seasons, or None if it's not known."""
+        total = 0
+        for page in first_pages:
+            if page is None:
+                # The season will be skipped
+                continue
+            elif page.total_count is None:
+                return None
+
+            total += page.total_count
+
+        return total
+
+    def _may_ignore_episode_numbers(
+        self, seen: Sequence[EpisodeMetadata], total_count: Optional[int]
+    ) -> bool:
+        """Can the rest of the playlist make _order_episodes() sort by date?
+
+        Assumes the worst: the episodes that haven't been seen yet have a
+        release date but no episode number.
+        """
+        if total_count is None:
+            return True
+
+        total = max(total_count, len(seen))
+        num_unseen = total - len(seen)
+        num_has_episode = sum(p.episode_number is not None for p in seen)
+        num_has_timestamp = sum(p.release_date is not None for p in seen)
+        return (
+            num_has_episode < RARE_EPISODE_NUMBERS * total
+            and num_has_timestamp + num_unseen > COMMON_TIMESTAMPS * total
+        )
+
+    def _is_in_episode_number_order(self, season: Sequence[EpisodeMetadata]) -> bool:
+        numbers = [x.episode_number for x in season]
+        if any(n is None for n in numbers):
+            return False
+
+        return all(a < b for a, b in zip(numbers, numbers[1:]))
+
+    def _with_seasons(
+        self, playlist: list[EpisodeMetadata], playlist_data: PlaylistData
+    ) -> list[EpisodeMetadata]:
+        return [
+            replace(x, season=playlist_data.season_number(x.season_number))
+            for x in playlist
+        ]
+
+    def _order_episodes(self, playlist: list[EpisodeMetadata]) -> list[EpisodeMetadata]:
         # Heuristics: If most episodes do not have an episode number,
         # use time-based sorting.
         if self._episode_numbers_are_rare(playlist) and self._timestamps_are_common(
@@ -225,17 +527,15 @@ class AreenaPlaylistParser:
             playlist = list(reversed(playlist))
 
         # Sort in ascending order: first by episode number, then by date
-        playlist = sorted(playlist, key=lambda x: x.sort_key())
-
-        return [x.uri for x in playlist]
+        return sorted(playlist, key=lambda x: x.sort_key())
 
     def _episode_numbers_are_rare(self, playlist: Sequence[EpisodeMetadata]) -> bool:
         num_has_episode = sum(p.episode_number is not None for p in playlist)
-        return num_has_episode < 0.5 * len(playlist)
+        return num_has_episode < RARE_EPISODE_NUMBERS * len(playlist)
 
     def _timestamps_are_common(self, playlist: Sequence[EpisodeMetadata]) -> bool:
         num_has_timestamp = sum(p.release_date is not None for p in playlist)
-        return num_has_timestamp > 0.8 * len(playlist)
+        return num_has_timestamp > COMMON_TIMESTAMPS * len(playlist)
 
     def _is_descending_date_based_playlist(
         self, playlist: Sequence[EpisodeMetadata]
@@ -259,43 +559,135 @@ class AreenaPlaylistParser:
     def _download_playlist(
         self, season_urls: Iterable[tuple[int, str]]
     ) -> list[EpisodeMetadata]:
+        season_urls = list(season_urls)
+
+        # The first page tells how many episodes there are in a season
+        first_pages = self._download_pages(
+            [(season_num, season_url, 0) for season_num, season_url in season_urls]
+        )
+
+        # If the number of episodes is known, the rest of the pages of all
+        # seasons can be downloaded at once
+        known_offsets = [
+            (season_num, season_url, offset)
+            for (season_num, season_url), page in zip(season_urls, first_pages)
+            if page and page.total_count is not None
+            for offset in range(PAGE_SIZE, page.total_count, PAGE_SIZE)
+        ]
+        known_pages: dict[str, list[tuple[int, Optional[PlaylistPage]]]] = {}
+        for (_, season_url, offset), page in zip(
+            known_offsets, self._download_pages(known_offsets)
+        ):
+            known_pages.setdefault(season_url, []).append((offset, page))
+
         playlist = []
-        for season_num, season_url in season_urls:
-            # Areena server fails (502 Bad gateway) if page_size is larger
-            # than 100.
-            page_size = 100
-            offset = 0
-            has_next_page = True
-            while has_next_page:
-                logger.debug(
-                    f'Getting a playlist page, season = {season_num}, '
-                    f'size = {page_size}, offset = {offset}'
+        for (season_num, season_url), first_page in zip(season_urls, first_pages):
+            if first_page is not None and first_page.total_count is not None:
+                later_pages = known_pages.get(season_url, [])
+            else:
+                later_pages = self._download_later_pages(
+                    season_num, season_url, first_page
                 )
-
-                params = {
-                    'offset': str(offset),
-                    'limit': str(page_size),
-                    'app_id': 'areena-web-items',
-                    'app_key': 'wlTs5D9OjIdeS9krPzRQR4I1PYVzoazN',
-                }
-                playlist_page_url = update_url_query(season_url, params)
-                page = self._parse_series_episode_data(playlist_page_url, season_num)
-
-                if page is None:
-                    logger.warning(
-                        f'Playlist failed at offset {offset}. Some episodes may be missing!'
-                    )
-                    break
-
-                playlist.extend(page)
-                offset += len(page)
-                has_next_page = len(page) == page_size
+            playlist.extend(self._season_episodes(first_page, later_pages))
 
         return playlist
 
+    def _iter_seasons(
+        self,
+        season_urls: list[tuple[int, str]],
+        first_pages: list[Optional[PlaylistPage]],
+    ) -> Iterator[list[EpisodeMetadata]]:
+        """Download the episodes of each season and yield them season by season."""
+        for (season_num, season_url), first_page in zip(season_urls, first_pages):
+            later_pages = self._download_later_pages(season_num, season_url, first_page)
+            yield self._season_episodes(first_page, later_pages)
+
+    def _download_later_pages(
+        self, season_num: int, season_url: str, first_page: Optional[PlaylistPage]
+    ) -> list[tuple[int, Optional[PlaylistPage]]]:
+        """Download the pages that follow first_page on a season."""
+        if first_page is None:
+            return []
+        elif first_page.total_count is not None:
+            offsets = list(range(PAGE_SIZE, first_page.total_count, PAGE_SIZE))
+            pages = self._download_pages([(season_num, season_url, x) for x in offsets])
+            return list(zip(offsets, pages))
+        elif len(first_page.episodes) == PAGE_SIZE:
+            return self._download_pages_speculatively(season_num, season_url)
+        else:
+            return []
+
+    def _season_episodes(
+        self,
+        first_page: Optional[PlaylistPage],
+        later_pages: list[tuple[int, Optional[PlaylistPage]]],
+    ) -> list[EpisodeMetadata]:
+        episodes = []
+        for offset, page in [(0, first_page)] + later_pages:
+            if page is None:
+                logger.warning(
+                    f'Playlist failed at offset {offset}. Some episodes may be missing!'
+                )
+                break
+
+            episodes.extend(page.episodes)
+
+        return episodes
+
+    def _download_pages(
+        self, page_offsets: list[tuple[int, str, int]]
+    ) -> list[Optional[PlaylistPage]]:
+        """Download playlist pages concurrently.
+
+        page_offsets is a list of (season number, season URL, offset) tuples.
+        """
+
+        def download(page_offset: tuple[int, str, int]) -> Optional[PlaylistPage]:
+            season_num, season_url, offset = page_offset
+            return self._download_page(season_num, season_url, offset)
+
+        return list(ordered_map(download, page_offsets, self.max_workers))
+
+    def _download_pages_speculatively(
+        self, season_num: int, season_url: str
+    ) -> list[tuple[int, Optional[PlaylistPage]]]:
+        """Download the pages after the first page of a season.
+
+        Used when the API doesn't tell the number of episodes. Downloads
+        max_workers pages at a time until a page is not full.
+        """
+        pages = []
+        offset = PAGE_SIZE
+        while True:
+            offsets = [offset + i * PAGE_SIZE for i in range(self.max_workers)]
+            batch = self._download_pages([(season_num, season_url, x) for x in offsets])
+            for page_offset, page in zip(offsets, batch):
+                pages.append((page_offset, page))
+                if page is None or len(page.episodes) < PAGE_SIZE:
+                    return pages
+
+            offset = offsets[-1] + PAGE_SIZE
+
+    def _download_page(
+        self, season_num: int, season_url: str, offset: int
+    ) -> Optional[PlaylistPage]:
+        logger.debug(
+            f'Getting a playlist page, season = {season_num}, '
+            f'size = {PAGE_SIZE}, offset = {offset}'
+        )
+
+        params = {
+            'offset': str(offset),
+            'limit': str(PAGE_SIZE),
+            'app_id': 'areena-web-items',
+            'app_key': 'wlTs5D9OjIdeS9krPzRQR4I1PYVzoazN',
+        }
+        playlist_page_url = update_url_query(season_url, params)
+        return self._parse_series_episode_data(playlist_page_url, season_num)
+
     def _parse_series_episode_data(
         self, playlist_page_url: str, season_number: int
-    ) -> Optional[list[EpisodeMetadata]]:
+    ) -> Optional[PlaylistPage]:
         playlist = self.httpclient.download_json(playlist_page_url)
         if playlist is None:
             return None
@@ -311,11 +703,21 @@ class AreenaPlaylistParser:
                     EpisodeMetadata(uri, season_number, episode_number, release_date)
                 )
 
-        return episodes
+        total_count = playlist.get('meta', {}).get('count')
+        if not isinstance(total_count, int):
+            total_count = None
+
+        return PlaylistPage(episodes, total_count)
 
     @staticmethod
-    def _extract_package_id(tree):
-        package_id = tree.xpath('/html/body/@data-package-id')
+    def _extract_package_id(page: ScannedPage):
+        if not page.contains(b'data-package-id'):
+            return None
+
+        tree = page.tree()
+        package_id = (
+            tree.xpath('/html/body/@data-package-id') if tree is not None else []
+        )
         if package_id:
             return package_id[0]
         else:
@@ -375,7 +777,7 @@ class AreenaPlaylistParser:
         return [x[key_name] for x in matches if key_name in x]
 
     @staticmethod
-    def _parse_yle_article_playlist(tree) -> list[str]:
+    def _parse_yle_article_playlist(page: ScannedPage) -> list[str]:
         def id_to_areena_url(data_id):
             if '-' in data_id:
                 areena_id = data_id
@@ -383,20 +785,12 @@ class AreenaPlaylistParser:
                 areena_id = f'1-{data_id}'
             return f'https://areena.yle.fi/{areena_id}'
 
-        state = None
-        state_script_nodes = tree.xpath(
-            '//script[@type="text/javascript" and '
-            '(contains(text(), "window.__INITIAL__STATE__") or '
-            ' contains(text(), "window.__INITIAL_STATE__"))]/text()'
-        )
-        if len(state_script_nodes) > 0:
-            state_json = re.sub(
-                r'^window\.__INITIAL__?STATE__\s*=\s*', '', state_script_nodes[0]
+        state = page.initial_state
+        if state is None and page.contains(b'initialState'):
+            tree = page.tree()
+            state_div_nodes = (
+                tree.xpath('//div[@id="initialState"]') if tree is not None else []
             )
-            state = json.loads(state_json)
-
-        if state is None:
-            state_div_nodes = tree.xpath('//div[@id="initialState"]')
             if len(state_div_nodes) > 0:
                 state = json.loads(state_div_nodes[0].attrib.get('data-state'))
 
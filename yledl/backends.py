@@ -15,24 +15,60 @@
 # You should have received a copy of the GNU General Public License
 # along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
 import logging
 import os
 import os.path
-from typing import AbstractSet, Optional, Iterable, Literal, Mapping, Sequence
+import sys
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import (
+    AbstractSet,
+    Optional,
+    Iterable,
+    Iterator,
+    Literal,
+    Mapping,
+    Sequence,
+)
 from .errors import TransientDownloadError
-from .exitcodes import RD_SUCCESS, RD_FAILED
+from .exitcodes import RD_SUCCESS, RD_FAILED, RD_INCOMPLETE
 from .ffmpeg import optional_stream, Ffprobe
+from .hls import HlsRendition
+from .hlsfetch import (
+    SegmentedStream,
+    SegmentJournal,
+    fetch_segments,
+    plan_segmented_download,
+    write_segments,
+)
+from .http import HttpClient
 from .io import IOContext, DownloadLimits
 from .localization import two_letter_language_code
+from .rangedownload import RangeDownload
+from .ratelimit import TokenBucket
+from .relay import RateLimitedRelay
 from .utils import ffmpeg_loglevel
-from .subtitles import delay_subtitles_mkv, delay_substitles_srt, Subtitle, subtitle_url
-from .subprocess import execute_pipe
+from .subtitles import Subtitle, subtitle_url
+from .subprocess import (
+    execute_pipe,
+    execute_pipe_async,
+    execute_with_input,
+    execute_with_input_async,
+    is_interrupted,
+)
 
 
 logger = logging.getLogger('yledl')
 
 IOCapability = Literal['resume', 'proxy', 'ratelimit', 'slice']
 
+# Sometimes it seems to be necessary to spoof the user-agent when downloading
+# files, see the issue #206
+SPOOFED_USER_AGENT = (
+    'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:67.0) Gecko/20100101 Firefox/67.0'
+)
+
 
 class PreferredFileExtension:
     def __init__(self, extension: str):
@@ -94,6 +130,21 @@ class BaseDownloader:
         # IOCapability.RESUME will be checked later when we know if we
         # are trying to resume a partial download
 
+    def rate_bucket(self, io: IOContext) -> Optional[TokenBucket]:
+        """The token bucket for limiting the download rate, or None."""
+        if io.bandwidth is not None:
+            return io.bandwidth
+
+        ratelimit = io.download_limits.ratelimit
+        return TokenBucket(ratelimit * 1024) if ratelimit else None
+
+    def http_client(self, io: IOContext) -> HttpClient:
+        """The shared HttpClient, or a new one if io doesn't carry one."""
+        if io.httpclient is not None:
+            return io.httpclient
+
+        return HttpClient(io)
+
     def warn_on_unsupported_resume(self, filename: str, io: IOContext) -> None:
         if (
             io.resume
@@ -110,6 +161,15 @@ class BaseDownloader:
         """Deriving classes override this to perform the download"""
         raise NotImplementedError('save_stream must be overridden')
 
+    async def save_stream_async(self, output_name: str, clip, io: IOContext) -> int:
+        """Asyncio version of save_stream().
+
+        The default implementation runs save_stream() in a worker thread.
+        Backends that delegate to an external program override this to run
+        the program as an asyncio subprocess.
+        """
+        return await asyncio.to_thread(self.save_stream, output_name, clip, io)
+
     def pipe(self, clip, io: IOContext) -> int:
         """Derived classes can override this to pipe to stdout"""
         return RD_FAILED
@@ -118,7 +178,11 @@ class BaseDownloader:
         return self.url
 
     def full_stream_already_downloaded(
-        self, filename: str, duration_seconds: Optional[float], io: IOContext
+        self,
+        filename: str,
+        duration_seconds: Optional[float],
+        io: IOContext,
+        bitrate: Optional[float] = None,
     ) -> bool:
         """Override on backends that are able to check if a file is complete."""
         return False
@@ -135,6 +199,13 @@ class ExternalDownloader(BaseDownloader):
         args = self.build_args(self.url, output_name, clip, io)
         return self.external_downloader([args], env)
 
+    async def save_stream_async(self, output_name: str, clip, io: IOContext) -> int:
+        self.warn_on_unsupported_resume(output_name, io)
+
+        env = self.extra_environment(io)
+        args = self.build_args(self.url, output_name, clip, io)
+        return await self.external_downloader_async([args], env)
+
     def pipe(self, clip, io: IOContext) -> int:
         commands = [self.build_pipe_args(self.url, clip, io)]
         env = self.extra_environment(io)
@@ -149,16 +220,57 @@ class ExternalDownloader(BaseDownloader):
     def extra_environment(self, io: IOContext) -> Optional[Mapping[str, str]]:
         return None
 
+    @contextmanager
+    def rate_limited_io(self, io: IOContext) -> Iterator[IOContext]:
+        """Route the connections of the external program through a relay.
+
+        The relay consumes the download's token bucket, so the program
+        follows when the shared rate limit is rebalanced. Yields io with the
+        proxy pointing to the relay, or io itself if the rate is not limited.
+        """
+        bucket = self.rate_bucket(io)
+        if bucket is None:
+            yield io
+            return
+
+        with RateLimitedRelay(bucket, self.upstream_proxy(io)) as relay:
+            yield replace(io, proxy=relay.address)
+
+    def upstream_proxy(self, io: IOContext) -> Optional[str]:
+        """The proxy that the rate limiting relay connects through."""
+        return io.proxy
+
     def external_downloader(
         self, commands: Sequence[Sequence[str]], env: Optional[Mapping[str, str]] = None
     ) -> int:
-        return exit_code_to_rd(execute_pipe(commands, env))
+        return self.exit_status(execute_pipe(commands, env))
+
+    async def external_downloader_async(
+        self, commands: Sequence[Sequence[str]], env: Optional[Mapping[str, str]] = None
+    ) -> int:
+        return self.exit_status(await execute_pipe_async(commands, env))
+
+    def exit_status(self, exit_code: int) -> int:
+        """Convert the exit code of the external program to an RD_ status."""
+        return exit_code_to_rd(exit_code)
 
 
 ### Base class for downloading by delegating to ffmpeg ###
 
 
 class FfmpegBackend(ExternalDownloader):
+    def save_stream(self, output_name: str, clip, io: IOContext) -> int:
+        with self.rate_limited_io(io) as relay_io:
+            return super().save_stream(output_name, clip, relay_io)
+
+    async def save_stream_async(self, output_name: str, clip, io: IOContext) -> int:
+        with self.rate_limited_io(io) as relay_io:
+            return await super().save_stream_async(output_name, clip, relay_io)
+
+    def pipe(self, clip, io: IOContext) -> int:
+        with self.rate_limited_io(io) as relay_io:
+            return super().pipe(clip, relay_io)
+
     def build_args(self, url, output_name: str, clip, io) -> list[str]:
         return (
             [io.ffmpeg_binary]
@@ -170,7 +282,7 @@ class FfmpegBackend(ExternalDownloader):
         return (
             [io.ffmpeg_binary]
             + self.input_args(url, clip, io)
-            + self.output_args_pipe(io)
+            + self.output_args_pipe(clip, io)
         )
 
     def input_args(self, url: str, clip, io: IOContext) -> list[str]:
@@ -179,7 +291,7 @@ class FfmpegBackend(ExternalDownloader):
     def output_args_file(self, clip, io: IOContext, output_name: str) -> list[str]:
         return []
 
-    def output_args_pipe(self, io: IOContext) -> list[str]:
+    def output_args_pipe(self, clip, io: IOContext) -> list[str]:
         return []
 
     def duration_arg(self, download_limits: DownloadLimits) -> list[str]:
@@ -200,9 +312,10 @@ class FfmpegBackend(ExternalDownloader):
         else:
             return []
 
-    def log_arg(self) -> list[str]:
+    def log_arg(self, io: IOContext) -> list[str]:
         args = ['-loglevel', ffmpeg_loglevel(logger.getEffectiveLevel())]
-        if logger.getEffectiveLevel() <= logging.WARNING:
+        # Progress lines of parallel downloads would overwrite each other
+        if logger.getEffectiveLevel() <= logging.WARNING and io.jobs <= 1:
             args.append('-stats')
         return args
 
@@ -217,10 +330,12 @@ class FfmpegBackend(ExternalDownloader):
         # If --subdelay is not set, use the delay probed from the stream metadata.
         return io.subtitle_delay_s or clip.subtitle_start_s()
 
-    def full_stream_already_downloaded(self, filename, duration_seconds, io):
+    def full_stream_already_downloaded(
+        self, filename, duration_seconds, io, bitrate=None
+    ):
         ffprobe = io.ffprobe()
         return ffprobe and ffprobe.full_stream_already_downloaded(
-            filename, duration_seconds
+            filename, duration_seconds, bitrate, io.verify_full
         )
 
 
@@ -234,7 +349,7 @@ class DASHHLSBackend(FfmpegBackend):
         program_id: Optional[int] = None,
         is_live: bool = False,
     ):
-        super().__init__(url, Backends.FFMPEG, ['slice', 'proxy'])
+        super().__init__(url, Backends.FFMPEG, ['slice', 'proxy', 'ratelimit'])
         self.program_id = program_id
         self.live = is_live
 
@@ -260,15 +375,28 @@ class DASHHLSBackend(FfmpegBackend):
             # Subtitles disabled on live streams, because ffmpeg (at
             # least 4.4) hangs on subtitle detection (Feb 2022).
             args.extend(['-strict', 'experimental'])
-        args.extend(self.log_arg())
+        args.extend(self.log_arg(io))
         args.extend(self._probe_args())
         args.extend(self.seek_position_arg(io.download_limits))
         args.extend(self.forwarded_for_arg(io.x_forwarded_for))
         args.extend(self.proxy_arg(io.proxy))
         args.extend(['-i', url])
+
+        subtitle_delay_s = self._subtitle_input_delay_s(clip, io)
+        if subtitle_delay_s:
+            # Read the subtitles from a second input so that they can be
+            # shifted without a separate pass over the downloaded file.
+            # ffmpeg fetches only the segments of the mapped streams.
+            args.extend(['-allowed_extensions', 'ts,aac,vtt'])
+            args.extend(['-strict', 'experimental'])
+            args.extend(self.seek_position_arg(io.download_limits))
+            args.extend(self.forwarded_for_arg(io.x_forwarded_for))
+            args.extend(self.proxy_arg(io.proxy))
+            args.extend(['-itsoffset', str(subtitle_delay_s), '-i', url])
+
         return args
 
-    def output_args_pipe(self, io):
+    def output_args_pipe(self, clip, io):
         # We don't use "-acodec copy" on pipe, because at least vlc fails to
         # play it failing with "Error parsing AAC extradata, unable to
         # determine samplerate."
@@ -278,7 +406,7 @@ class DASHHLSBackend(FfmpegBackend):
         return (
             self.duration_arg(io.download_limits)
             + self._map_video_and_audio_streams(io)
-            + self._subtitle_args(io)
+            + self._subtitle_args(self._subtitle_input_index(clip, io), io)
             + ['-vcodec', 'copy', '-acodec', 'aac', '-dn', '-f', 'matroska', 'pipe:1']
         )
 
@@ -287,27 +415,239 @@ class DASHHLSBackend(FfmpegBackend):
             self.duration_arg(io.download_limits)
             + self._metadata_args(clip, io)
             + self._map_video_and_audio_streams(io)
-            + self._subtitle_args(io)
-            + [
-                '-bsf:a',
-                'aac_adtstoasc',
-                '-vcodec',
-                'copy',
-                '-acodec',
-                'copy',
-                '-dn',
-                f'file:{output_name}',
-            ]
+            + self._subtitle_args(self._subtitle_input_index(clip, io), io)
+            + self._copy_codecs_args(output_name)
         )
 
     def save_stream(self, output_name, clip, io):
-        res = super().save_stream(output_name, clip, io)
+        segmented_stream = self._segmented_stream(output_name, io)
+        if segmented_stream:
+            return self._save_segmented_stream(segmented_stream, output_name, clip, io)
+        else:
+            return super().save_stream(output_name, clip, io)
+
+    async def save_stream_async(self, output_name, clip, io):
+        ffprobe = io.ffprobe()
+        if ffprobe:
+            # Probe now so that building the ffmpeg arguments won't block
+            await self._program_id_async(ffprobe)
+
+        segmented_stream = await asyncio.to_thread(
+            self._segmented_stream, output_name, io
+        )
+        if segmented_stream:
+            # The segments are fetched in-process over parallel connections
+            return await self._save_segmented_stream_async(
+                segmented_stream, output_name, clip, io
+            )
+        else:
+            return await super().save_stream_async(output_name, clip, io)
+
+    def _segmented_stream(
+        self, output_name: str, io: IOContext
+    ) -> Optional[SegmentedStream]:
+        """Plan downloading the segments over parallel connections.
+
+        Returns None if ffmpeg should download the stream by itself.
+        """
+        limits = io.download_limits
+        if (
+            (io.connections <= 1 and not self._journals_segments(io))
+            or self.live
+            or output_name == '-'
+            or limits.start_position is not None
+            or limits.duration
+        ):
+            return None
+
+        stream = plan_segmented_download(
+            self.url,
+            self._program_id(io.ffprobe()),
+            self.http_client(io),
+            self._forwarded_for_header(io),
+        )
+        if stream is None:
+            logger.debug('Falling back to downloading segments sequentially')
+
+        return stream
+
+    def _save_segmented_stream(
+        self, stream: SegmentedStream, output_name: str, clip, io: IOContext
+    ) -> int:
+        segments, journal = self._segmented_input(stream, output_name, io)
+        args = self._segmented_stream_args(stream, 'pipe:0', output_name, clip, io)
+        try:
+            res = exit_code_to_rd(
+                execute_with_input(args, lambda stdin: write_segments(segments, stdin))
+            )
+        except OSError as exc:
+            if journal is None:
+                raise
+
+            raise TransientDownloadError(
+                f'Failed to write {journal.part_filename}: {exc.strerror}'
+            )
+
+        return self._finish_segmented_download(res, journal)
+
+    async def _save_segmented_stream_async(
+        self, stream: SegmentedStream, output_name: str, clip, io: IOContext
+    ) -> int:
+        segments, journal = await asyncio.to_thread(
+            self._segmented_input, stream, output_name, io
+        )
+        args = self._segmented_stream_args(stream, 'pipe:0', output_name, clip, io)
+        try:
+            res = exit_code_to_rd(await execute_with_input_async(args, segments))
+        except OSError as exc:
+            if journal is None:
+                raise
+
+            raise TransientDownloadError(
+                f'Failed to write {journal.part_filename}: {exc.strerror}'
+            )
+
+        return self._finish_segmented_download(res, journal)
+
+    def _segmented_input(
+        self, stream: SegmentedStream, output_name: str, io: IOContext
+    ) -> tuple[Iterator[bytes], Optional[SegmentJournal]]:
+        """The segments to be fed to ffmpeg and the journal recording them.
+
+        With --resumable-segments, the segments are recorded in a journaled
+        part file while they are fed to ffmpeg. An interrupted download
+        continues from the first missing segment: the segments in the part
+        file are fed to ffmpeg before the rest are fetched. The part file is
+        read only when resuming.
+        """
+        logger.debug(
+            f'Downloading {len(stream.segment_uris)} segments '
+            f'over {io.connections} connections'
+        )
+
+        if not self._journals_segments(io):
+            self.warn_on_unsupported_resume(output_name, io)
+            segments = fetch_segments(
+                stream.segment_uris,
+                self.http_client(io),
+                io.connections,
+                self._forwarded_for_header(io),
+                self.rate_bucket(io),
+            )
+            return segments, None
+
+        journal = SegmentJournal(output_name, stream.segment_uris)
+        completed = journal.completed_segments()
+        if completed > 0:
+            logger.info(f'Resuming from segment {completed + 1}/{journal.num_segments}')
+
+        fetched = fetch_segments(
+            stream.segment_uris[completed:],
+            self.http_client(io),
+            io.connections,
+            self._forwarded_for_header(io),
+            self.rate_bucket(io),
+        )
+
+        def journaled_segments() -> Iterator[bytes]:
+            if completed > 0:
+                yield from journal.read_completed_segments()
+            yield from journal.record_segments(fetched, completed)
+
+        return journaled_segments(), journal
 
-        if res == RD_SUCCESS and output_name != '-':
-            self._delay_subtitles(output_name, clip, io)
+    def _finish_segmented_download(
+        self, res: int, journal: Optional[SegmentJournal]
+    ) -> int:
+        if journal is None:
+            return res
+        elif is_interrupted():
+            return RD_INCOMPLETE
+        elif res == RD_SUCCESS:
+            journal.remove()
 
         return res
 
+    def _journals_segments(self, io: IOContext) -> bool:
+        return io.resume and io.resumable_segments
+
+    def _segmented_stream_args(
+        self,
+        stream: SegmentedStream,
+        input_url: str,
+        output_name: str,
+        clip,
+        io: IOContext,
+    ) -> list[str]:
+        """ffmpeg arguments for remuxing concatenated MPEG-TS segments.
+
+        input_url is the location of the segments, either a file or
+        pipe:0 for stdin. Subtitles are read by ffmpeg from the subtitle
+        media playlists.
+        """
+        subtitles = self._selected_subtitle_renditions(stream.subtitles, io)
+        subtitle_delay_s = self._subtitle_input_delay_s(clip, io)
+
+        args = [io.ffmpeg_binary, '-y']
+        args.extend(self.log_arg(io))
+        args.extend(['-thread_queue_size', '2048', '-f', 'mpegts', '-i', input_url])
+        for rendition in subtitles:
+            args.extend(['-allowed_extensions', 'ts,aac,vtt'])
+            args.extend(['-strict', 'experimental'])
+            args.extend(self.forwarded_for_arg(io.x_forwarded_for))
+            args.extend(self.proxy_arg(io.proxy))
+            if subtitle_delay_s:
+                args.extend(['-itsoffset', str(subtitle_delay_s)])
+            args.extend(['-i', rendition.uri])
+
+        args.extend(self._metadata_args(clip, io))
+        args.extend(
+            [
+                '-map',
+                optional_stream('0:v', io.ffmpeg_version()),
+                '-map',
+                optional_stream('0:a', io.ffmpeg_version()),
+            ]
+        )
+        if subtitles:
+            args.extend(['-scodec', 'mov_text' if self._is_mp4(io) else 'srt'])
+        for i, rendition in enumerate(subtitles):
+            args.extend(['-map', f'{i + 1}:s'])
+            if rendition.language:
+                args.extend([f'-metadata:s:s:{i}', f'language={rendition.language}'])
+        args.extend(self._copy_codecs_args(output_name))
+
+        return args
+
+    def _selected_subtitle_renditions(
+        self, renditions: list[HlsRendition], io: IOContext
+    ) -> list[HlsRendition]:
+        if io.subtitles == 'none':
+            return []
+        elif io.subtitles == 'all':
+            return renditions
+        else:
+            short_code = two_letter_language_code(io.subtitles) or io.subtitles
+            return [r for r in renditions if r.language in (short_code, io.subtitles)]
+
+    def _copy_codecs_args(self, output_name: str) -> list[str]:
+        return [
+            '-bsf:a',
+            'aac_adtstoasc',
+            '-vcodec',
+            'copy',
+            '-acodec',
+            'copy',
+            '-dn',
+            f'file:{output_name}',
+        ]
+
+    def _forwarded_for_header(self, io: IOContext) -> dict[str, str]:
+        if io.x_forwarded_for:
+            return {'X-Forwarded-For': io.x_forwarded_for}
+        else:
+            return {}
+
     def file_extension(self, preferred):
         return PreferredFileExtension(preferred)
 
@@ -360,6 +700,15 @@ class DASHHLSBackend(FfmpegBackend):
 
         return self.program_id
 
+    async def _program_id_async(self, ffprobe: Ffprobe) -> int:
+        if self.program_id is None:
+            programs = await ffprobe.show_programs_for_url_async(self.url)
+            self.program_id = self._select_max_bitrate_video_audio_pid(
+                programs.get('programs')
+            )
+
+        return self.program_id
+
     def _select_max_bitrate_video_audio_pid(self, programs) -> int:
         if not programs:
             return 0
@@ -386,7 +735,18 @@ class DASHHLSBackend(FfmpegBackend):
 
         return best.get('program_id', 0)
 
-    def _subtitle_args(self, io: IOContext) -> list[str]:
+    def _subtitle_input_delay_s(self, clip, io: IOContext) -> Optional[float]:
+        """The delay to apply on the subtitle input, if subtitles are enabled."""
+        if io.subtitles == 'none' or self.live:
+            return None
+
+        return self.compute_subtitle_delay_s(clip, io)
+
+    def _subtitle_input_index(self, clip, io: IOContext) -> int:
+        """The index of the ffmpeg input that the subtitles are read from."""
+        return 1 if self._subtitle_input_delay_s(clip, io) else 0
+
+    def _subtitle_args(self, input_index: int, io: IOContext) -> list[str]:
         scodec = 'mov_text' if self._is_mp4(io) else 'srt'
         pid = self._program_id(io.ffprobe())
 
@@ -397,7 +757,7 @@ class DASHHLSBackend(FfmpegBackend):
                 '-scodec',
                 scodec,
                 '-map',
-                optional_stream(f'0:p:{pid}:s', io.ffmpeg_version()),
+                optional_stream(f'{input_index}:p:{pid}:s', io.ffmpeg_version()),
             ]
         else:
             # Sometimes the subtitles are labelled with a two-letter
@@ -407,9 +767,13 @@ class DASHHLSBackend(FfmpegBackend):
                 '-scodec',
                 scodec,
                 '-map',
-                optional_stream(f'0:s:m:language:{short_code}', io.ffmpeg_version()),
+                optional_stream(
+                    f'{input_index}:s:m:language:{short_code}', io.ffmpeg_version()
+                ),
                 '-map',
-                optional_stream(f'0:s:m:language:{io.subtitles}', io.ffmpeg_version()),
+                optional_stream(
+                    f'{input_index}:s:m:language:{io.subtitles}', io.ffmpeg_version()
+                ),
             ]
 
     def _map_video_and_audio_streams(self, io: IOContext) -> list[str]:
@@ -421,20 +785,6 @@ class DASHHLSBackend(FfmpegBackend):
             optional_stream(f'0:p:{pid}:a', io.ffmpeg_version()),
         ]
 
-    def _delay_subtitles(self, output_name: str, clip, io: IOContext) -> None:
-        subtitle_delay_s = self.compute_subtitle_delay_s(clip, io)
-
-        if subtitle_delay_s:
-            if output_name.endswith('.srt'):
-                delay_substitles_srt(output_name, int(subtitle_delay_s * 1000))
-            else:
-                delay_subtitles_mkv(
-                    output_name,
-                    int(subtitle_delay_s * 1000),
-                    io.ffmpeg_binary,
-                    io.ffmpeg_version(),
-                )
-
     def _is_mp4(self, io: IOContext) -> bool:
         return bool(
             io.outputfilename and io.outputfilename.endswith('.mp4')
@@ -446,14 +796,14 @@ class DASHHLSBackend(FfmpegBackend):
 
 class HLSAudioBackend(FfmpegBackend):
     def __init__(self, url: str):
-        super().__init__(url, Backends.FFMPEG, ['slice', 'proxy'])
+        super().__init__(url, Backends.FFMPEG, ['slice', 'proxy', 'ratelimit'])
 
     def file_extension(self, preferred):
         return MandatoryFileExtension('.mp3')
 
     def input_args(self, url, clip, io) -> list[str]:
         args = ['-y']
-        args.extend(self.log_arg())
+        args.extend(self.log_arg(io))
         args.extend(self.seek_position_arg(io.download_limits))
         args.extend(self.forwarded_for_arg(io.x_forwarded_for))
         args.extend(self.proxy_arg(io.proxy))
@@ -467,7 +817,7 @@ class HLSAudioBackend(FfmpegBackend):
             + ['-f', 'mp3', f'file:{output_name}']
         )
 
-    def output_args_pipe(self, io: IOContext) -> list[str]:
+    def output_args_pipe(self, clip, io: IOContext) -> list[str]:
         return self.duration_arg(io.download_limits) + [
             '-f',
             'mp3',
@@ -493,7 +843,7 @@ class HLSAudioBackend(FfmpegBackend):
 
 class HLSSubtitlesBackend(FfmpegBackend):
     def __init__(self, url: str):
-        super().__init__(url, Backends.FFMPEG, ['slice', 'proxy'])
+        super().__init__(url, Backends.FFMPEG, ['slice', 'proxy', 'ratelimit'])
 
     def input_args(self, url, clip, io) -> list[str]:
         args = [
@@ -512,7 +862,7 @@ class HLSSubtitlesBackend(FfmpegBackend):
             '-strict',
             'experimental',
         ]
-        args.extend(self.log_arg())
+        args.extend(self.log_arg(io))
         args.extend(self.seek_position_arg(io.download_limits))
         args.extend(self.forwarded_for_arg(io.x_forwarded_for))
         args.extend(self.proxy_arg(io.proxy))
@@ -525,7 +875,7 @@ class HLSSubtitlesBackend(FfmpegBackend):
 
         return args
 
-    def output_args_pipe(self, io: IOContext):
+    def output_args_pipe(self, clip, io: IOContext):
         return self._subtitle_output_args(io, 'pipe:1')
 
     def output_args_file(self, clip, io: IOContext, output_name: str):
@@ -578,13 +928,27 @@ class WgetBackend(ExternalDownloader):
         return self._file_extension
 
     def save_stream(self, output_name, clip, io):
-        res = super().save_stream(output_name, clip, io)
+        with self.rate_limited_io(io) as relay_io:
+            res = super().save_stream(output_name, clip, relay_io)
+
+        if res != 0 and logger.getEffectiveLevel() >= logging.ERROR:
+            logger.error('wget failed! Increase verbosity to see more details.')
+
+        return res
+
+    async def save_stream_async(self, output_name, clip, io):
+        with self.rate_limited_io(io) as relay_io:
+            res = await super().save_stream_async(output_name, clip, relay_io)
 
         if res != 0 and logger.getEffectiveLevel() >= logging.ERROR:
             logger.error('wget failed! Increase verbosity to see more details.')
 
         return res
 
+    def pipe(self, clip, io):
+        with self.rate_limited_io(io) as relay_io:
+            return super().pipe(clip, relay_io)
+
     def build_args(self, url, output_name, clip, io):
         args = self.shared_wget_args(io.wget_binary, io.x_forwarded_for, output_name)
         args.extend(['--progress=bar', '--tries=1', '--random-wait'])
@@ -598,12 +962,11 @@ class WgetBackend(ExternalDownloader):
             # We will hack around that by checking the exit status and
             # showing a generic error message if necessary.
             args.append('--quiet')
-        elif logger.getEffectiveLevel() > logging.INFO:
+        elif logger.getEffectiveLevel() > logging.INFO or io.jobs > 1:
+            # Progress bars of parallel downloads would be garbled
             args.append('--no-verbose')
         if io.resume:
             args.append('--continue')
-        if io.download_limits.ratelimit:
-            args.append(f'--limit-rate={io.download_limits.ratelimit}k')
         args.append(url)
         return args
 
@@ -613,19 +976,12 @@ class WgetBackend(ExternalDownloader):
     def shared_wget_args(
         self, wget_binary: str, forwarded_for: Optional[str], output_filename: str
     ) -> list[str]:
-        # Sometimes it seems to be necessary to spoof the user-agent,
-        # see the issue #206
-        spoofed_user_agent = (
-            'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:67.0) '
-            'Gecko/20100101 Firefox/67.0'
-        )
-
         args = [
             wget_binary,
             '-O',
             output_filename,
             '--no-use-server-timestamps',
-            f'--user-agent={spoofed_user_agent}',
+            f'--user-agent={SPOOFED_USER_AGENT}',
             '--timeout=20',
         ]
 
@@ -635,6 +991,10 @@ class WgetBackend(ExternalDownloader):
         return args
 
     def extra_environment(self, io):
+        if self.is_rate_limited(io):
+            # io.proxy is the rate limiting relay (see rate_limited_io())
+            return {'https_proxy': io.proxy, 'http_proxy': io.proxy}
+
         env = None
         if io.proxy:
             if 'https_proxy' in os.environ:
@@ -645,17 +1005,23 @@ class WgetBackend(ExternalDownloader):
                 env = {'https_proxy': io.proxy}
         return env
 
-    def external_downloader(self, commands, env=None):
-        res = execute_pipe(commands, env)
+    def upstream_proxy(self, io):
+        # wget would use the https_proxy environment variable instead of
+        # --proxy, so the relay does the same
+        return os.environ.get('https_proxy') or io.proxy
 
+    def is_rate_limited(self, io: IOContext) -> bool:
+        return io.bandwidth is not None or bool(io.download_limits.ratelimit)
+
+    def exit_status(self, exit_code):
         # These exit status codes indicate errors where retrying might help
         # (from the wget man page).
-        if res == 3:  # File I/O error
+        if exit_code == 3:  # File I/O error
             raise TransientDownloadError('wget: File I/O error')
-        elif res == 4:  # Network failure
+        elif exit_code == 4:  # Network failure
             raise TransientDownloadError('wget: Network failure')
 
-        return exit_code_to_rd(res)
+        return exit_code_to_rd(exit_code)
 
 
 ### Download a video and subtitle ###
@@ -676,9 +1042,27 @@ class VideoAndSubtitlesWgetBackend(WgetBackend):
 
             if sub_url:
                 sub_file = self.subtitle_filename(output_name)
-                commands = [self.build_args(sub_url, sub_file, clip, io)]
-                env = self.extra_environment(io)
-                return self.external_downloader(commands, env)
+                with self.rate_limited_io(io) as relay_io:
+                    commands = [self.build_args(sub_url, sub_file, clip, relay_io)]
+                    env = self.extra_environment(relay_io)
+                    return self.external_downloader(commands, env)
+        except RuntimeError as exc:
+            logger.error(exc)
+
+        return res
+
+    async def save_stream_async(self, output_name: str, clip, io: IOContext) -> int:
+        res = await super().save_stream_async(output_name, clip, io)
+
+        try:
+            sub_url = subtitle_url(self.subtitles, io.subtitles)
+
+            if sub_url:
+                sub_file = self.subtitle_filename(output_name)
+                with self.rate_limited_io(io) as relay_io:
+                    commands = [self.build_args(sub_url, sub_file, clip, relay_io)]
+                    env = self.extra_environment(relay_io)
+                    return await self.external_downloader_async(commands, env)
         except RuntimeError as exc:
             logger.error(exc)
 
@@ -689,6 +1073,63 @@ class VideoAndSubtitlesWgetBackend(WgetBackend):
         return f'{basename}.srt'
 
 
+### Download a plain HTTP file over parallel connections ###
+
+
+class HttpRangeBackend(BaseDownloader):
+    def __init__(self, url: str, file_extension: Optional[str]):
+        super().__init__(url, Backends.HTTP, ['resume', 'ratelimit', 'proxy'])
+
+        if not file_extension:
+            logger.warning(f'Mandatory file extension is missing for URL {url}')
+
+        self._file_extension = MandatoryFileExtension(file_extension or '.mp4')
+
+    def file_extension(self, preferred):
+        return self._file_extension
+
+    def save_stream(self, output_name: str, clip, io: IOContext) -> int:
+        return self.download_file(self.url, output_name, io)
+
+    def pipe(self, clip, io: IOContext) -> int:
+        res = self.range_download(self.url, io).pipe(sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+        return res
+
+    def download_file(self, url: str, output_name: str, io: IOContext) -> int:
+        return self.range_download(url, io).save(output_name, io.resume)
+
+    def range_download(self, url: str, io: IOContext) -> RangeDownload:
+        bucket = self.rate_bucket(io)
+        headers = {'User-Agent': SPOOFED_USER_AGENT}
+        if io.x_forwarded_for:
+            headers['X-Forwarded-For'] = io.x_forwarded_for
+
+        return RangeDownload(self.http_client(io), url, io.connections, bucket, headers)
+
+
+class VideoAndSubtitlesHttpBackend(HttpRangeBackend):
+    def __init__(
+        self, video_url: str, subtitles: list[Subtitle], video_extension: Optional[str]
+    ):
+        super().__init__(video_url, video_extension)
+        self.subtitles = subtitles
+
+    def save_stream(self, output_name: str, clip, io: IOContext) -> int:
+        res = super().save_stream(output_name, clip, io)
+
+        try:
+            sub_url = subtitle_url(self.subtitles, io.subtitles)
+
+            if sub_url:
+                sub_file = os.path.splitext(output_name)[0] + '.srt'
+                return self.download_file(sub_url, sub_file, io)
+        except RuntimeError as exc:
+            logger.error(exc)
+
+        return res
+
+
 ### Backend representing a failed stream ###
 
 
@@ -712,15 +1153,23 @@ class FailingBackend(BaseDownloader):
 class Backends:
     FFMPEG = 'ffmpeg'
     WGET = 'wget'
+    HTTP = 'http'
 
     default_order = [
         FFMPEG,
         WGET,
     ]
 
+    # All backends, including those that are not enabled by default
+    all_backends = [
+        FFMPEG,
+        WGET,
+        HTTP,
+    ]
+
     @staticmethod
     def is_valid_backend(backend_name):
-        return backend_name in Backends.default_order
+        return backend_name in Backends.all_backends
 
     @staticmethod
     def parse_backends(backend_names: Iterable[str]):
@@ -0,0 +1,209 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import logging
+import os
+import os.path
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+logger = logging.getLogger('yledl')
+
+# Eviction removes entries until the cache is at most this fraction of its
+# maximum size, so that the following writes don't trigger it again at once
+EVICTION_TARGET_RATIO = 0.9
+
+
+def default_cache_dir() -> str:
+    xdg_cache_home = os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(xdg_cache_home, 'yle-dl')
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    metadata: dict[str, Any]
+    data: bytes
+    # Unix timestamp of when the entry was stored or last refreshed
+    stored_at: float
+
+    def age_seconds(self) -> float:
+        return time.time() - self.stored_at
+
+
+class DiskCache:
+    """A size-bounded persistent key-value cache.
+
+    Each entry is stored as two files: <hash>.json contains the metadata and
+    <hash>.data the payload. Reading an entry updates the modification time
+    of its metadata file, and the least recently used entries are evicted
+    when the total size exceeds max_size_bytes.
+
+    The total size is counted from the directory on the first write and
+    updated incrementally after that. The directory is scanned again only
+    when entries need to be evicted.
+    """
+
+    def __init__(self, directory: str, max_size_bytes: int):
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        # The total size of the entries, or None if not counted yet
+        self._total_size: Optional[int] = None
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        meta_path, data_path = self._paths(key)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(data_path, 'rb') as f:
+                data = f.read()
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            return None
+
+        if meta.get('key') != key:
+            # A hash collision or a corrupted entry
+            return None
+
+        return CacheEntry(meta.get('metadata', {}), data, meta.get('stored_at', 0))
+
+    def put(self, key: str, metadata: dict[str, Any], data: bytes) -> None:
+        meta = {'key': key, 'stored_at': time.time(), 'metadata': metadata}
+        meta_bytes = json.dumps(meta).encode('utf-8')
+        meta_path, data_path = self._paths(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            replaced_size = _file_size(meta_path) + _file_size(data_path)
+            self._write_atomic(data_path, data)
+            self._write_atomic(meta_path, meta_bytes)
+        except OSError as exc:
+            logger.debug(f'Failed to write a cache entry: {exc}')
+            return
+
+        self._update_size(len(meta_bytes) + len(data) - replaced_size)
+
+    def refresh(self, key: str, metadata: dict[str, Any]) -> None:
+        """Mark an existing entry as fresh and replace its metadata."""
+        meta = {'key': key, 'stored_at': time.time(), 'metadata': metadata}
+        meta_bytes = json.dumps(meta).encode('utf-8')
+        meta_path, _ = self._paths(key)
+        try:
+            replaced_size = _file_size(meta_path)
+            self._write_atomic(meta_path, meta_bytes)
+        except OSError as exc:
+            logger.debug(f'Failed to write a cache entry: {exc}')
+            return
+
+        self._update_size(len(meta_bytes) - replaced_size)
+
+    def remove(self, key: str) -> None:
+        meta_path, data_path = self._paths(key)
+        removed_size = 0
+        for path in (meta_path, data_path):
+            size = _file_size(path)
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            removed_size += size
+
+        if removed_size:
+            self._update_size(-removed_size)
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, digest)
+        return f'{base}.json', f'{base}.data'
+
+    def _write_atomic(self, path: str, content: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _update_size(self, delta: int) -> None:
+        with self._lock:
+            if self._total_size is None:
+                # The counted size already includes the new entry
+                self._total_size = sum(size for _, _, size in self._scan_entries())
+            else:
+                self._total_size += delta
+
+            if self._total_size > self.max_size_bytes:
+                self._evict_old_entries()
+
+    def _evict_old_entries(self) -> None:
+        """Remove the least recently used entries.
+
+        The sizes are re-counted from the directory, because other processes
+        may have written to the same cache.
+        """
+        entries = self._scan_entries()
+        total_size = sum(size for _, _, size in entries)
+        target_size = EVICTION_TARGET_RATIO * self.max_size_bytes
+        for _, base, size in sorted(entries):
+            if total_size <= target_size:
+                break
+
+            for path in (f'{base}.json', f'{base}.data'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+            total_size -= size
+
+        self._total_size = total_size
+
+    def _scan_entries(self) -> list[tuple[float, str, int]]:
+        """List (modification time, path without suffix, size) of each entry."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.endswith('.json'):
+                        continue
+
+                    base = dir_entry.path[: -len('.json')]
+                    try:
+                        stat = dir_entry.stat()
+                        size = stat.st_size + os.stat(f'{base}.data').st_size
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, base, size))
+        except OSError:
+            pass
+
+        return entries
+
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
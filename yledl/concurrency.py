@@ -0,0 +1,64 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def ordered_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int,
+    max_pending: Optional[int] = None,
+) -> Iterator[R]:
+    """Apply func to each item on a thread pool and yield the results in order.
+
+    Unlike ThreadPoolExecutor.map(), this submits new tasks only as the
+    results are consumed. At most max_pending (default: 2 * max_workers)
+    items are being processed or waiting to be consumed at any time.
+
+    An exception raised by func is re-raised when its result is due.
+    Pending tasks are cancelled if the consumer stops iterating.
+    """
+    if max_pending is None:
+        max_pending = 2 * max_workers
+    max_pending = max(max_pending, 1)
+
+    it = iter(items)
+    pending: deque[Future] = deque()
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix='yledl-worker'
+    ) as executor:
+        try:
+            for item in it:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= max_pending:
+                    break
+
+            while pending:
+                result = pending.popleft().result()
+                for item in it:
+                    pending.append(executor.submit(func, item))
+                    break
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
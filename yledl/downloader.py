@@ -15,31 +15,64 @@
 # You should have received a copy of the GNU General Public License
 # along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
 
+import heapq
+import itertools
 import logging
 import os
 import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from dataclasses import asdict, replace
 from typing import Iterable, Any, Optional, Literal, Iterator
+from .archive import DownloadArchive, open_download_archive
 from .clip import Clip
+from .concurrency import ordered_map
 from .errors import ExternalApplicationNotFoundError, TransientDownloadError
 from .geolocation import AreenaGeoLocation
 from .http import HttpClient
 from .titleformatter import TitleFormatter
 from .utils import sane_filename
 from .backends import BaseDownloader
-from .exitcodes import RD_SUCCESS, RD_FAILED
+from .exitcodes import RD_SUCCESS, RD_FAILED, RD_INCOMPLETE
 from .extractors import extractor_factory, AreenaExtractor
 from .localization import TranslationChooser
+from .ratelimit import BandwidthManager
+from .retry import DownloadAttempt, RetryPolicy
 from .io import IOContext, OutputFileNameGenerator
 from .streamflavor import failed_flavor, StreamFlavor
 from .streamfilters import StreamFilters
-from .subprocess import execute_pipe
+from .subprocess import execute_pipe, interrupt_running_processes, allow_new_processes
+from .sync import SeriesSyncState, open_sync_state
 from .ffmpeg import NullProbe
 
 
 logger = logging.getLogger('yledl')
 
 
+class ClipRegistry:
+    """The program IDs that have been downloaded during this run.
+
+    The registry is shared by all input URLs. A program that is found on
+    several playlists, or is given more than once on the command line, is
+    downloaded only once. A program whose download failed is tried again
+    when it is encountered the next time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._program_ids: set[str] = set()
+
+    def __contains__(self, program_id: str) -> bool:
+        with self._lock:
+            return program_id in self._program_ids
+
+    def add(self, program_id: str) -> None:
+        with self._lock:
+            self._program_ids.add(program_id)
+
+
 class YleDlDownloader:
     def __init__(
         self,
@@ -47,11 +80,20 @@ class YleDlDownloader:
         title_formatter: TitleFormatter,
         httpclient: HttpClient,
         _extractor_factory=extractor_factory,
+        clip_registry: Optional[ClipRegistry] = None,
+        retry_policy: Optional[RetryPolicy] = None,
     ):
         self.geolocation = geolocation
         self.title_formatter = title_formatter
         self.httpclient = httpclient
         self.extractor_factory = _extractor_factory
+        # Program IDs downloaded by earlier input URLs on this run
+        self.clip_registry = clip_registry
+        self.retry_policy = retry_policy or RetryPolicy()
+        # Shares --ratelimit between concurrent downloads. Created on the
+        # first rate limited download.
+        self._bandwidth_manager: Optional[BandwidthManager] = None
+        self._bandwidth_manager_lock = threading.Lock()
 
     def download_clips(
         self, base_url: str, io: IOContext, filters: StreamFilters
@@ -68,34 +110,281 @@ class YleDlDownloader:
             self.log_unsupported_url_error(base_url)
             return RD_FAILED
 
-        playlist = extractor.get_playlist(base_url, filters.latest_only)
+        try:
+            return self._download_playlist_clips(base_url, extractor, io, filters)
+        finally:
+            self.flush_sync_state(base_url, extractor, io)
+
+    def _download_playlist_clips(
+        self,
+        base_url: str,
+        extractor: AreenaExtractor,
+        io: IOContext,
+        filters: StreamFilters,
+    ) -> int:
+        playlist = self.download_playlist(base_url, extractor, io, filters)
+        # Check the start of the playlist without waiting for the rest of it
+        head = list(itertools.islice(playlist, 2))
+        if not self.check_playlist_length(head, extractor, io):
+            return RD_FAILED
+
+        clip_urls = self.drop_skipped_clips(
+            itertools.chain(head, playlist), extractor, io
+        )
+
+        if io.jobs > 1 and len(head) > 1:
+            return self.download_clips_in_parallel(
+                clip_urls, base_url, extractor, filters, io
+            )
+
+        overall_status = RD_SUCCESS
+        for clip_url, clip in self.extract_ahead(
+            clip_urls, base_url, extractor, io.prefetch
+        ):
+            res = self.download_with_retry(
+                clip_url, base_url, extractor, filters, io, clip=clip
+            )
+            overall_status = combine_exit_status(overall_status, res)
+
+        return overall_status
 
-        if len(playlist) > 1 and io.outputfilename is not None:
+    def download_playlist(
+        self,
+        base_url: str,
+        extractor: AreenaExtractor,
+        io: IOContext,
+        filters: StreamFilters,
+    ) -> Iterator[str]:
+        """Iterate the clip URLs that download_clips() should consider."""
+        if io.sync_dir and self.sync_enabled(extractor, io):
+            return iter(self.sync_playlist(base_url, extractor, io.sync_dir))
+        else:
+            return extractor.iter_playlist(base_url, filters.latest_only)
+
+    def check_playlist_length(
+        self, head: list[str], extractor: AreenaExtractor, io: IOContext
+    ) -> bool:
+        """Check that the output options are compatible with the playlist.
+
+        head is the start (at least two items, if available) of the
+        playlist. Logs an error and returns False if the clips can't be
+        downloaded.
+        """
+        if len(head) > 1 and io.outputfilename is not None:
             logger.error(
                 'The source is a playlist with multiple clips, '
                 'but only one output file specified'
             )
-            return RD_FAILED
-        elif len(playlist) > 1 and extractor.title_formatter.is_constant_pattern():
+            return False
+        elif len(head) > 1 and extractor.title_formatter.is_constant_pattern():
             logger.error(
                 'The source is a playlist with multiple clips, '
                 'but --output-template is a literal: '
                 f'{extractor.title_formatter.template}'
             )
-            return RD_FAILED
+            return False
 
-        if len(playlist) == 0:
+        if len(head) == 0:
             logger.info('No streams found')
 
-        overall_status = RD_SUCCESS
-        for clip_url in playlist:
-            res = self.download_with_retry(
-                clip_url, base_url, extractor, filters, io, max_retry_count=3
+        return True
+
+    def drop_skipped_clips(
+        self, clip_urls: Iterable[str], extractor: AreenaExtractor, io: IOContext
+    ) -> Iterable[str]:
+        """Drop clips that are in the download archive or already downloaded."""
+        if io.download_archive and extractor.supports_download_archive:
+            clip_urls = self.drop_archived_clips(
+                clip_urls, extractor, open_download_archive(io.download_archive)
+            )
+        if self.clip_registry is not None and extractor.supports_download_archive:
+            clip_urls = self.drop_duplicate_clips(
+                clip_urls, extractor, self.clip_registry
             )
-            if res != RD_SUCCESS and overall_status != RD_FAILED:
-                overall_status = res
 
-        return overall_status
+        return clip_urls
+
+    def sync_enabled(self, extractor: AreenaExtractor, io: IOContext) -> bool:
+        return bool(io.sync_dir) and extractor.supports_download_archive
+
+    def sync_playlist(
+        self, base_url: str, extractor: AreenaExtractor, sync_dir: str
+    ) -> list[str]:
+        state = open_sync_state(sync_dir, base_url)
+        playlist = extractor.sync_playlist(base_url, state)
+        logger.info(f'{len(playlist)} episodes to download from {base_url}')
+        return playlist
+
+    def drop_archived_clips(
+        self,
+        playlist: Iterable[str],
+        extractor: AreenaExtractor,
+        archive: DownloadArchive,
+    ) -> Iterator[str]:
+        for clip_url in playlist:
+            if extractor.program_id_from_url(clip_url) in archive:
+                logger.info(f'{clip_url} is in the download archive. Skipping.')
+            else:
+                yield clip_url
+
+    def drop_duplicate_clips(
+        self,
+        playlist: Iterable[str],
+        extractor: AreenaExtractor,
+        registry: ClipRegistry,
+    ) -> Iterator[str]:
+        # Program IDs seen earlier on this playlist
+        seen: set[str] = set()
+        for clip_url in playlist:
+            program_id = extractor.program_id_from_url(clip_url)
+            if program_id in registry:
+                logger.info(f'{clip_url} has already been downloaded. Skipping.')
+            elif program_id in seen:
+                logger.info(f'{clip_url} is on the playlist twice. Skipping.')
+            else:
+                seen.add(program_id)
+                yield clip_url
+
+    def extract_ahead(
+        self,
+        playlist: Iterable[str],
+        base_url: str,
+        extractor: AreenaExtractor,
+        prefetch: int,
+    ) -> Iterator[tuple[str, Clip]]:
+        """Extract clips on the playlist in order.
+
+        Yields (clip URL, clip) pairs. Up to prefetch clips are extracted on
+        a background thread while the caller is still downloading the
+        previous clip.
+        """
+
+        def extract(clip_url: str) -> tuple[str, Clip]:
+            return (clip_url, extractor.extract_clip(clip_url, base_url))
+
+        if prefetch > 0:
+            return ordered_map(extract, playlist, max_workers=1, max_pending=prefetch)
+        else:
+            return (extract(clip_url) for clip_url in playlist)
+
+    def download_clips_in_parallel(
+        self,
+        playlist: Iterable[str],
+        base_url: str,
+        extractor: AreenaExtractor,
+        filters: StreamFilters,
+        io: IOContext,
+    ) -> int:
+        """Download clips on io.jobs threads.
+
+        The downloads are started as the clip URLs arrive from the playlist,
+        which can still be loading.
+        """
+        logger.info(f'Downloading {io.jobs} clips at a time')
+        max_retries = self.retry_policy.max_retries
+
+        log_prefix = ThreadLogPrefix()
+        logger.addFilter(log_prefix)
+        executor = ThreadPoolExecutor(
+            max_workers=io.jobs, thread_name_prefix='yledl-job'
+        )
+        try:
+            clip_urls: list[str] = []
+            attempts: list[DownloadAttempt] = []
+            retry_counts: list[int] = []
+            running: dict[Future, int] = {}
+            # Failed clips waiting for their retry: (due time, clip index)
+            delayed: list[tuple[float, int]] = []
+
+            def submit(k: int, clip: Optional[Clip]) -> None:
+                future = executor.submit(
+                    self._download_job,
+                    log_prefix,
+                    f'[{k + 1}]',
+                    clip_urls[k],
+                    clip,
+                    base_url,
+                    extractor,
+                    filters,
+                    io,
+                )
+                running[future] = k
+
+            for clip_url in playlist:
+                clip_urls.append(clip_url)
+                attempts.append(DownloadAttempt(RD_FAILED))
+                retry_counts.append(0)
+                submit(len(clip_urls) - 1, None)
+
+            # A failed clip is requeued after its own backoff delay, while
+            # the workers keep downloading the other clips
+            while running or delayed:
+                now = time.monotonic()
+                while delayed and delayed[0][0] <= now:
+                    _, k = heapq.heappop(delayed)
+                    submit(k, attempts[k].clip)
+
+                timeout = max(delayed[0][0] - now, 0) if delayed else None
+                if not running:
+                    time.sleep(timeout or 0)
+                    continue
+
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    k = running.pop(future)
+                    attempts[k] = future.result()
+                    if attempts[k].retry and retry_counts[k] < max_retries:
+                        retry_counts[k] += 1
+                        logger.info(
+                            f'[{k + 1}] Retry attempt {retry_counts[k]} '
+                            f'of {max_retries}'
+                        )
+                        due = time.monotonic() + self.retry_policy.delay(
+                            retry_counts[k]
+                        )
+                        heapq.heappush(delayed, (due, k))
+                    elif attempts[k].status == RD_FAILED:
+                        self.add_failure_to_sync_state(
+                            clip_urls[k], base_url, extractor, filters, io
+                        )
+
+            # Combine the results in the playlist order, like the serial
+            # download does
+            overall_status = RD_SUCCESS
+            for attempt in attempts:
+                overall_status = combine_exit_status(overall_status, attempt.status)
+
+            return overall_status
+        except KeyboardInterrupt:
+            logger.warning('Interrupted! Stopping all downloads')
+            executor.shutdown(wait=False, cancel_futures=True)
+            interrupt_running_processes()
+            executor.shutdown(wait=True)
+            return RD_INCOMPLETE
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            allow_new_processes()
+            logger.removeFilter(log_prefix)
+
+    def _download_job(
+        self,
+        log_prefix: 'ThreadLogPrefix',
+        label: str,
+        clip_url: str,
+        clip: Optional[Clip],
+        base_url: str,
+        extractor: AreenaExtractor,
+        filters: StreamFilters,
+        io: IOContext,
+    ) -> DownloadAttempt:
+        log_prefix.set_prefix(label)
+        try:
+            logger.info(f'Starting {clip_url}')
+            return self.download_attempt(
+                clip_url, clip, base_url, extractor, filters, io
+            )
+        finally:
+            log_prefix.set_prefix(None)
 
     def pipe(self, base_url: str, io: IOContext, filters: StreamFilters) -> int:
         prober = self.create_prober(io, filters)
@@ -136,7 +425,7 @@ class YleDlDownloader:
             self.log_unsupported_url_error(base_url)
             return
 
-        clips = extractor.extract(base_url, filters.latest_only)
+        clips = extractor.extract(base_url, filters.latest_only, io.jobs)
         for clip in clips:
             streams = self.select_streams(clip.flavors, filters)
             if streams and any(s.is_valid() for s in streams):
@@ -159,12 +448,12 @@ class YleDlDownloader:
             self.log_unsupported_url_error(base_url)
             return []
 
-        clips = extractor.extract(base_url, latest_only)
+        clips = extractor.extract(base_url, latest_only, io.jobs)
         return (sane_filename(clip.title or '', io.excludechars) for clip in clips)
 
     def get_metadata(
         self, base_url: str, io: IOContext, filters: StreamFilters
-    ) -> Iterable[dict[str, Any]]:
+    ) -> list[dict[str, Any]]:
         prober = self.create_prober(io, filters)
         extractor = self.extractor_factory(
             base_url,
@@ -177,9 +466,29 @@ class YleDlDownloader:
             self.log_unsupported_url_error(base_url)
             return []
 
-        clips = extractor.extract(base_url, filters.latest_only)
+        clips = extractor.extract(base_url, filters.latest_only, io.jobs)
         return list(clip.metadata(io) for clip in clips)
 
+    def iter_metadata(
+        self, base_url: str, io: IOContext, filters: StreamFilters
+    ) -> Iterator[dict[str, Any]]:
+        """Yield the metadata of each clip on base_url as soon as it is extracted."""
+        prober = self.create_prober(io, filters)
+        extractor = self.extractor_factory(
+            base_url,
+            self.language_chooser(base_url, io),
+            self.httpclient,
+            self.title_formatter,
+            prober,
+        )
+        if not extractor:
+            self.log_unsupported_url_error(base_url)
+            return
+
+        clips = extractor.iter_extract(base_url, filters.latest_only, io.jobs)
+        for clip in clips:
+            yield clip.metadata(io)
+
     def get_playlist(self, base_url: str, io: IOContext) -> Iterable[str]:
         extractor = self.extractor_factory(
             base_url,
@@ -192,7 +501,7 @@ class YleDlDownloader:
             self.log_unsupported_url_error(base_url)
             return []
 
-        return extractor.get_playlist(base_url)
+        return extractor.iter_playlist(base_url)
 
     def download_with_retry(
         self,
@@ -201,51 +510,94 @@ class YleDlDownloader:
         extractor: AreenaExtractor,
         filters: StreamFilters,
         io: IOContext,
-        max_retry_count: int,
+        clip: Optional[Clip] = None,
     ) -> int:
-        attempt = 0
-        if max_retry_count < 0:
-            max_retry_count = 0
+        """Download a clip, retrying on transient errors.
+
+        If clip is given, it is used instead of extracting clip_url. The
+        extracted clip is reused on the retry attempts, unless the error
+        suggests that the stream URLs have expired. The retries are delayed
+        according to self.retry_policy.
+        """
+        max_retries = self.retry_policy.max_retries
+        attempt = self.download_attempt(
+            clip_url, clip, base_url, extractor, filters, io
+        )
+        retry_count = 0
+        while attempt.retry and retry_count < max_retries:
+            retry_count += 1
+            logger.info(f'Retry attempt {retry_count} of {max_retries}')
+            self.retry_policy.wait(retry_count)
+            attempt = self.download_attempt(
+                clip_url, attempt.clip, base_url, extractor, filters, io
+            )
 
-        latest_result = RD_FAILED
-        while attempt <= max_retry_count:
-            if attempt > 0:
-                logger.info(f'Retry attempt {attempt} of {max_retry_count}')
+        if attempt.status == RD_FAILED:
+            self.add_failure_to_sync_state(clip_url, base_url, extractor, filters, io)
 
+        return attempt.status
+
+    def download_attempt(
+        self,
+        clip_url: str,
+        clip: Optional[Clip],
+        base_url: str,
+        extractor: AreenaExtractor,
+        filters: StreamFilters,
+        io: IOContext,
+    ) -> DownloadAttempt:
+        """Try to download a clip once.
+
+        Extracts clip_url if clip is None.
+        """
+        if clip is None:
             clip = extractor.extract_clip(clip_url, base_url)
-            try:
-                latest_result = self.download_first_available_stream(clip, filters, io)
-            except TransientDownloadError as ex:
-                logger.warning(ex.message)
 
-                latest_result = RD_FAILED
-                attempt += 1
-                continue
+        try:
+            status = self.download_first_available_stream(clip, filters, io)
+        except TransientDownloadError as ex:
+            logger.warning(ex.message)
+            if ex.url_expired:
+                # Extract again with fresh manifest URLs
+                extractor.drop_cached_preview(clip_url)
+                return DownloadAttempt(RD_FAILED, retry=True)
 
-            # Download completed
-            return latest_result
+            return DownloadAttempt(RD_FAILED, retry=True, clip=clip)
 
-        # Failed and run out of retry attempts
-        return latest_result
+        # Download completed
+        if status == RD_SUCCESS:
+            self.add_to_download_archive(clip, extractor, filters, io)
+            self.add_to_sync_state(clip_url, base_url, extractor, filters, io)
+            self.add_to_clip_registry(clip_url, extractor)
+
+        return DownloadAttempt(status)
 
     def download_first_available_stream(
         self, clip: Clip, filters: StreamFilters, io: IOContext
     ) -> int:
+        valid_streams = self.valid_streams(clip, filters)
+        if not valid_streams:
+            return RD_FAILED
+
+        return self.download_stream(valid_streams, clip, io)
+
+    def valid_streams(self, clip: Clip, filters: StreamFilters) -> list[BaseDownloader]:
+        """The downloadable streams of clip in the order of preference.
+
+        Logs the reason and returns an empty list, if there are none.
+        """
         streams = self.select_streams(clip.flavors, filters) or []
         valid_streams = [s for s in streams if s.is_valid()]
 
         if not streams and filters.subtitle_only:
             logger.error('The input has no subtitles')
-            return RD_FAILED
         elif not streams and not filters.subtitle_only:
             logger.error('No stream found')
-            return RD_FAILED
         elif not valid_streams:
             logger.error(f'Unsupported stream: {streams[0].error_message}')
             self.print_geo_warning(clip)
-            return RD_FAILED
 
-        return self.download_stream(valid_streams, clip, io)
+        return valid_streams
 
     def download_stream(
         self, valid_streams: Iterable[BaseDownloader], clip: Clip, io: IOContext
@@ -280,7 +632,8 @@ class YleDlDownloader:
             return RD_SUCCESS
 
         self.log_output_file(outputfile)
-        dl_result = downloader.save_stream(outputfile, clip, io)
+        with self.bandwidth_share(io) as job_io:
+            dl_result = downloader.save_stream(outputfile, clip, job_io)
 
         if dl_result == RD_SUCCESS:
             self.log_output_file(outputfile, True)
@@ -292,21 +645,36 @@ class YleDlDownloader:
 
         return dl_result
 
+    @contextmanager
+    def bandwidth_share(self, io: IOContext) -> Iterator[IOContext]:
+        """Reserve a share of the --ratelimit bandwidth for a download.
+
+        Yields io with the bandwidth field set to a token bucket that all
+        backends of the download consume. The rate limit is split between
+        the downloads that are running concurrently. The yielded io also
+        carries the shared HttpClient so that the backends reuse its
+        connection pool.
+        """
+        io = replace(io, httpclient=self.httpclient)
+        ratelimit = io.download_limits.ratelimit
+        if not ratelimit:
+            yield io
+            return
+
+        with self._bandwidth_manager_lock:
+            manager = self._bandwidth_manager
+            if manager is None or manager.rate != ratelimit * 1024:
+                manager = BandwidthManager(ratelimit * 1024)
+                self._bandwidth_manager = manager
+
+        with manager.job() as bucket:
+            yield replace(io, bandwidth=bucket)
+
     def pipe_first_available_stream(
         self, clip: Clip, filters: StreamFilters, io: IOContext
     ) -> int:
-        streams = self.select_streams(clip.flavors, filters) or []
-        valid_streams = [s for s in streams if s.is_valid()]
-
-        if not streams and filters.subtitle_only:
-            logger.error('The input has no subtitles')
-            return RD_FAILED
-        elif not streams and not filters.subtitle_only:
-            logger.error('No stream found')
-            return RD_FAILED
-        elif not valid_streams:
-            logger.error(f'Unsupported stream: {streams[0].error_message}')
-            self.print_geo_warning(clip)
+        valid_streams = self.valid_streams(clip, filters)
+        if not valid_streams:
             return RD_FAILED
 
         return self.pipe_stream(valid_streams, clip, io)
@@ -320,7 +688,8 @@ class YleDlDownloader:
             stream.warn_on_unsupported_feature(io)
 
             try:
-                return stream.pipe(clip, io)
+                with self.bandwidth_share(io) as job_io:
+                    return stream.pipe(clip, job_io)
             except ExternalApplicationNotFoundError:
                 # The downloader subprocess failed to start (a missing application?).
                 # Try the next backend.
@@ -334,19 +703,104 @@ class YleDlDownloader:
         # All backends failed
         return RD_FAILED
 
+    def add_to_download_archive(
+        self,
+        clip: Clip,
+        extractor: AreenaExtractor,
+        filters: StreamFilters,
+        io: IOContext,
+    ) -> None:
+        if (
+            not io.download_archive
+            or not extractor.supports_download_archive
+            or not clip.program_id
+            or filters.subtitle_only
+            or self.slicing_active(io)
+        ):
+            return
+
+        open_download_archive(io.download_archive).add(clip.program_id)
+
+    def add_to_clip_registry(self, clip_url: str, extractor: AreenaExtractor) -> None:
+        if self.clip_registry is None or not extractor.supports_download_archive:
+            return
+
+        self.clip_registry.add(extractor.program_id_from_url(clip_url))
+
+    def add_to_sync_state(
+        self,
+        clip_url: str,
+        base_url: str,
+        extractor: AreenaExtractor,
+        filters: StreamFilters,
+        io: IOContext,
+    ) -> None:
+        state = self.download_sync_state(base_url, extractor, filters, io)
+        if state is not None:
+            state.mark_downloaded(clip_url)
+
+    def add_failure_to_sync_state(
+        self,
+        clip_url: str,
+        base_url: str,
+        extractor: AreenaExtractor,
+        filters: StreamFilters,
+        io: IOContext,
+    ) -> None:
+        state = self.download_sync_state(base_url, extractor, filters, io)
+        if state is not None:
+            state.mark_failed(clip_url)
+
+    def download_sync_state(
+        self,
+        base_url: str,
+        extractor: AreenaExtractor,
+        filters: StreamFilters,
+        io: IOContext,
+    ) -> Optional[SeriesSyncState]:
+        """The sync state that records the downloads from base_url, or None."""
+        if (
+            not io.sync_dir
+            or not self.sync_enabled(extractor, io)
+            or filters.subtitle_only
+            or self.slicing_active(io)
+        ):
+            return None
+
+        return open_sync_state(io.sync_dir, base_url)
+
+    def flush_sync_state(
+        self, base_url: str, extractor: AreenaExtractor, io: IOContext
+    ) -> None:
+        """Save the downloads that haven't been written to the sync state yet."""
+        if io.sync_dir and self.sync_enabled(extractor, io):
+            open_sync_state(io.sync_dir, base_url).flush()
+
     def should_skip_downloading(
         self, outputfile: str, downloader: BaseDownloader, clip: Clip, io: IOContext
     ) -> bool:
-        limits = io.download_limits
-        slicing_active = ((limits.start_position or 0) > 0) or limits.duration
-
         return (not io.overwrite and os.path.exists(outputfile)) or (
-            not slicing_active
+            not self.slicing_active(io)
             and downloader.full_stream_already_downloaded(
-                outputfile, clip.duration_seconds, io
+                outputfile,
+                clip.duration_seconds,
+                io,
+                self.stream_bitrate(clip, downloader),
             )
         )
 
+    def stream_bitrate(self, clip: Clip, downloader: BaseDownloader) -> Optional[float]:
+        """The nominal bitrate of the flavor that the downloader belongs to."""
+        for flavor in clip.flavors:
+            if any(s is downloader for s in flavor.streams):
+                return flavor.bitrate
+
+        return None
+
+    def slicing_active(self, io: IOContext) -> bool:
+        limits = io.download_limits
+        return bool(((limits.start_position or 0) > 0) or limits.duration)
+
     def generate_output_name(
         self, title: str, downloader: BaseDownloader, io: IOContext
     ) -> str:
@@ -559,6 +1013,37 @@ class YleDlDownloader:
             return NullProbe()
 
 
+class ThreadLogPrefix(logging.Filter):
+    """Logging filter that prefixes messages logged on the current thread.
+
+    Used for telling apart the log lines of parallel downloads.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local()
+
+    def set_prefix(self, prefix: Optional[str]) -> None:
+        self._local.prefix = prefix
+
+    def filter(self, record):
+        prefix = getattr(self._local, 'prefix', None)
+        if prefix:
+            record.msg = f'{prefix} {record.msg}'
+        return True
+
+
+def combine_exit_status(overall_status: int, latest_status: int) -> int:
+    """Update the overall exit status of a playlist after downloading a clip.
+
+    RD_FAILED is sticky. Otherwise, the latest non-successful status wins.
+    """
+    if latest_status != RD_SUCCESS and overall_status != RD_FAILED:
+        return latest_status
+    else:
+        return overall_status
+
+
 def sortkey_max_resolution_max_bitrate(backend_preference):
     def sortkey(x):
         backend_score = max(
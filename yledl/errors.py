@@ -15,6 +15,8 @@
 # You should have received a copy of the GNU General Public License
 # along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
 
+from typing import Optional
+
 
 class FfmpegNotFoundError(Exception):
     pass
@@ -33,5 +35,13 @@ class TransientDownloadError(Exception):
     situation.
     """
 
-    def __init__(self, message: str):
+    def __init__(self, message: str, url_expired: bool = False):
         self.message = message
+        # The stream URL might have expired. Retrying requires extracting
+        # the clip again to get fresh URLs.
+        self.url_expired = url_expired
+
+
+def is_expired_url_status(status_code: Optional[int]) -> bool:
+    """Does the HTTP status suggest that a signed stream URL has expired?"""
+    return status_code in (403, 410)
@@ -20,29 +20,37 @@ import itertools
 import logging
 import os.path
 import re
-from typing import Iterator
-from requests import HTTPError
+from typing import Iterator, Optional
+from requests import HTTPError, RequestException
 from urllib.parse import urlparse, parse_qs
 from .areena_playlist_parser import AreenaPlaylistParser
 from .backends import (
     DASHHLSBackend,
     HLSAudioBackend,
+    HttpRangeBackend,
+    VideoAndSubtitlesHttpBackend,
     VideoAndSubtitlesWgetBackend,
     WgetBackend,
     BaseDownloader,
 )
 from .clip import Clip, FailedClip
-from .areena_api import AreenaApiProgramInfo
+from .concurrency import ordered_map
+from .areena_api import AreenaApiProgramInfo, EpisodeMetadata
 from .areena_extractors import AreenaPreviewApiParser
 from .http import HttpClient
 from .streamflavor import StreamFlavor, failed_flavor
 from .streamprobe import probe_flavors
+from .sync import SeriesSyncState
 from .timestamp import parse_areena_timestamp
 from .titleformatter import TitleFormatter
 
 
 logger = logging.getLogger('yledl')
 
+# URLs that usually point to a single program. The same kind of ID is used
+# also for series and packages. They are told apart by the preview API.
+PROGRAM_URL_RE = re.compile(r'^https?://(?:areena|arenan)\.yle\.fi/(1-\d+)$')
+
 
 def extractor_factory(url, language_chooser, httpclient, title_formatter, ffprobe):
     if (
@@ -100,6 +108,14 @@ class Flavors:
 
 
 class AreenaExtractor:
+    # Completed downloads can be recorded in the --download-archive. This is
+    # disabled on live channels, which can be recorded again and again.
+    supports_download_archive = True
+    # iter_playlist() yields the episodes of a series season by season, and
+    # sync_playlist() lists only the changed seasons. Extractors that
+    # override get_playlist() disable this.
+    supports_playlist_streaming = True
+
     def __init__(
         self,
         language_chooser,
@@ -111,18 +127,119 @@ class AreenaExtractor:
         self.language_chooser = language_chooser
         self.title_formatter = title_formatter
         self.ffprobe = ffprobe
-
-    def extract(self, url: str, latest_only: bool) -> Iterator[Clip]:
+        # Playlist metadata of the episodes seen in get_playlist(), keyed by
+        # the episode URL
+        self.episode_metadata: dict[str, EpisodeMetadata] = {}
+        # Preview API responses that were downloaded while resolving a
+        # playlist, keyed by the program ID. Consumed by preview_parser().
+        self.prefetched_previews: dict[str, AreenaPreviewApiParser] = {}
+
+    def extract(
+        self, url: str, latest_only: bool, max_workers: int = 1
+    ) -> Iterator[Clip]:
+        """Extract all clips on the playlist at url.
+
+        If max_workers > 1, up to max_workers clips are extracted (the preview
+        API fetched and the stream probed) concurrently. The clips are
+        returned in the playlist order in any case.
+        """
         playlist = self.get_playlist(url, latest_only)
-        return (self.extract_clip(clipurl, url) for clipurl in playlist)
+        if max_workers > 1 and len(playlist) > 1:
+            return ordered_map(
+                lambda clipurl: self.extract_clip(clipurl, url), playlist, max_workers
+            )
+        else:
+            return (self.extract_clip(clipurl, url) for clipurl in playlist)
+
+    def iter_extract(
+        self, url: str, latest_only: bool, max_workers: int = 1
+    ) -> Iterator[Clip]:
+        """Like extract(), but extract the clips while iterating the playlist.
+
+        The first clips are available before the whole playlist has been
+        fetched.
+        """
+        playlist = self.iter_playlist(url, latest_only)
+        head = list(itertools.islice(playlist, 2))
+        clip_urls = itertools.chain(head, playlist)
+        if max_workers > 1 and len(head) > 1:
+            return ordered_map(
+                lambda clipurl: self.extract_clip(clipurl, url), clip_urls, max_workers
+            )
+        else:
+            return (self.extract_clip(clipurl, url) for clipurl in clip_urls)
 
     def get_playlist(self, url: str, latest_only: bool = False):
-        return AreenaPlaylistParser(self.httpclient).get(url, latest_only)
+        if self.is_single_program(url):
+            return [url]
+
+        parser = AreenaPlaylistParser(self.httpclient)
+        playlist = parser.get(url, latest_only)
+        self.episode_metadata.update(parser.episodes)
+        return playlist
+
+    def iter_playlist(self, url: str, latest_only: bool = False) -> Iterator[str]:
+        """Yield the clip URLs on the playlist at url as they become known."""
+        if not self.supports_playlist_streaming or self.is_single_program(url):
+            yield from self.get_playlist(url, latest_only)
+            return
+
+        parser = AreenaPlaylistParser(self.httpclient)
+        for clip_url in parser.iter_playlist(url, latest_only):
+            if clip_url in parser.episodes:
+                self.episode_metadata[clip_url] = parser.episodes[clip_url]
+            yield clip_url
+
+    def sync_playlist(self, url: str, state: SeriesSyncState) -> list[str]:
+        """Add new clips on the playlist at url to state.
+
+        Returns the clips in state that haven't been downloaded yet.
+        """
+        if not self.supports_playlist_streaming or self.is_single_program(url):
+            state.add_episodes(self.get_playlist(url))
+            return state.pending()
+
+        parser = AreenaPlaylistParser(self.httpclient)
+        playlist = parser.sync(url, state)
+        self.episode_metadata.update(parser.episodes)
+        return playlist
+
+    def is_single_program(self, url: str) -> bool:
+        """Check from the preview API if url is a program page.
+
+        This avoids downloading the (large) HTML page of a program. Returns
+        False if url might be a series or a package, or if the URL is not
+        a plain program URL, and the HTML page needs to be checked.
+        """
+        m = PROGRAM_URL_RE.match(url)
+        if not m:
+            return False
+
+        pid = m.group(1)
+        preview = self.prefetched_previews.get(pid)
+        if preview is None:
+            try:
+                preview = self.preview_parser(pid, url, warn_if_not_found=False)
+            except RequestException as ex:
+                logger.debug(f'Preview API request failed: {ex}')
+                return False
+
+        if not preview.is_program():
+            logger.debug('Not a single program according to the preview API')
+            return False
+
+        logger.debug('Single program according to the preview API')
+        self.prefetched_previews[pid] = preview
+        return True
 
     def extract_clip(self, clip_url: str, origin_url: str) -> Clip:
         pid = self.program_id_from_url(clip_url)
         program_info = self.program_info_for_pid(
-            pid, clip_url, self.title_formatter, self.ffprobe
+            pid,
+            clip_url,
+            self.title_formatter,
+            self.ffprobe,
+            self.episode_metadata.get(clip_url),
         )
         return self.create_clip_or_failure(pid, program_info, clip_url, origin_url)
 
@@ -285,18 +402,21 @@ class AreenaExtractor:
             return []
 
         logger.debug('Probing for stream flavors')
-        return probe_flavors(hls_manifest_url, is_live, ffprobe)
+        return probe_flavors(hls_manifest_url, is_live, ffprobe, self.httpclient)
 
     def download_flavors(self, download_url: str, media_type: str, external_subtitles):
         path: str = urlparse(download_url)[2]
         ext = os.path.splitext(path)[1] or None
-        backend = VideoAndSubtitlesWgetBackend(download_url, external_subtitles, ext)
-        flavors = [StreamFlavor(media_type=media_type, streams=[backend])]
+        backends: list[BaseDownloader] = [
+            VideoAndSubtitlesWgetBackend(download_url, external_subtitles, ext),
+            VideoAndSubtitlesHttpBackend(download_url, external_subtitles, ext),
+        ]
+        flavors = [StreamFlavor(media_type=media_type, streams=backends)]
 
         if external_subtitles:
             subbackends: list[BaseDownloader] = [
                 WgetBackend(s.url, '.srt') for s in external_subtitles
-            ]
+            ] + [HttpRangeBackend(s.url, '.srt') for s in external_subtitles]
             flavors.append(StreamFlavor(media_type='subtitle', streams=subbackends))
 
         return flavors
@@ -325,11 +445,20 @@ class AreenaExtractor:
         ts = self.publish_event(program_info).get('startTime')
         return parse_areena_timestamp(ts)
 
-    def program_info_for_pid(self, pid, pageurl, title_formatter, ffprobe):
+    def program_info_for_pid(
+        self,
+        pid,
+        pageurl,
+        title_formatter,
+        ffprobe,
+        episode: Optional[EpisodeMetadata] = None,
+    ):
         if not pid:
             return None
 
-        preview = self.preview_parser(pid, pageurl)
+        preview = self.prefetched_previews.pop(pid, None)
+        if preview is None:
+            preview = self.preview_parser(pid, pageurl)
         publish_timestamp = preview.timestamp()
         titles = preview.title(self.language_chooser)
         title_params = {
@@ -340,8 +469,11 @@ class AreenaExtractor:
         title_params.update(titles)
         season_and_episode = preview.season_and_episode()
         if season_and_episode and 'season' not in season_and_episode:
-            logger.debug('Checking the webpage for a season number')
-            season_and_episode.update(self.extract_season_number(pageurl))
+            if episode and episode.season is not None:
+                season_and_episode['season'] = episode.season
+            else:
+                logger.debug('Checking the webpage for a season number')
+                season_and_episode.update(self.extract_season_number(pageurl))
         title_params.update(season_and_episode)
         title = title_formatter.format(**title_params) or 'areena'
         simple_formatter = TitleFormatter('${series_separator}${title}')
@@ -378,14 +510,18 @@ class AreenaExtractor:
             expired=preview.is_expired(),
         )
 
-    def preview_parser(self, pid, pageurl):
-        preview_headers = {'Referer': pageurl, 'Origin': 'https://areena.yle.fi'}
+    def preview_parser(self, pid, pageurl, warn_if_not_found=True):
         url = self.preview_url(pid)
         try:
-            preview_json = self.httpclient.download_json(url, preview_headers)
+            preview_json = self.httpclient.download_json(
+                url, self.preview_headers(pageurl)
+            )
         except HTTPError as ex:
             if ex.response.status_code == 404:
-                logger.warning(f'Preview API result not found: {url}')
+                if warn_if_not_found:
+                    logger.warning(f'Preview API result not found: {url}')
+                else:
+                    logger.debug(f'Preview API result not found: {url}')
                 preview_json = []
             else:
                 raise
@@ -393,6 +529,21 @@ class AreenaExtractor:
 
         return AreenaPreviewApiParser(preview_json)
 
+    def drop_cached_preview(self, clip_url: str) -> None:
+        """Forget the preview of clip_url so that it is downloaded again.
+
+        The preview contains the stream manifest URLs, which are useless
+        after they have expired.
+        """
+        pid = self.program_id_from_url(clip_url)
+        self.prefetched_previews.pop(pid, None)
+        self.httpclient.invalidate_cached(
+            self.preview_url(pid), self.preview_headers(clip_url)
+        )
+
+    def preview_headers(self, pageurl):
+        return {'Referer': pageurl, 'Origin': 'https://areena.yle.fi'}
+
     def preview_url(self, program_id):
         return (
             f'https://player.api.yle.fi/v1/preview/{program_id}.json?'
@@ -413,7 +564,8 @@ class AreenaExtractor:
         return None if (url and url.endswith('/')) else url
 
     def extract_season_number(self, pageurl):
-        # TODO: how to get the season number without downloading the HTML page?
+        # Used only if the clip was not found on a series playlist, which
+        # knows the season numbers.
         tree = self.httpclient.download_html_tree(pageurl)
         title_tag = tree.xpath('/html/head/title/text()')
         if len(title_tag) > 0:
@@ -429,6 +581,9 @@ class AreenaExtractor:
 
 
 class AreenaLiveTVExtractor(AreenaExtractor):
+    supports_download_archive = False
+    supports_playlist_streaming = False
+
     def get_playlist(self, url, latest_only=False):
         return [url]
 
@@ -446,6 +601,9 @@ class AreenaLiveTVExtractor(AreenaExtractor):
 
 
 class AreenaLiveRadioExtractor(AreenaExtractor):
+    supports_download_archive = False
+    supports_playlist_streaming = False
+
     def get_playlist(self, url, latest_only=False):
         return [url]
 
@@ -475,6 +633,8 @@ class AreenaLiveRadioExtractor(AreenaExtractor):
 
 
 class ElavaArkistoExtractor(AreenaExtractor):
+    supports_playlist_streaming = False
+
     def get_playlist(self, url, latest_only=False):
         ids = self.get_dataids(url)
 
@@ -20,13 +20,35 @@ import logging
 import os.path
 import re
 import subprocess
-from typing import Optional
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+from .cache import DiskCache
 from .errors import FfmpegNotFoundError
+from .subprocess import check_output_async
 from .utils import ffmpeg_loglevel
 
 
 logger = logging.getLogger('yledl')
 
+# How long (in seconds) ffprobe results are re-used
+FFPROBE_CACHE_TTL = 6 * 60 * 60
+FFPROBE_CACHE_MAX_SIZE_BYTES = 10 * 1024 * 1024
+
+# A file smaller than this fraction of the size computed from the nominal
+# bitrate is considered incomplete. HLS bitrates are peak values, so the
+# average is often clearly lower.
+MIN_FILE_SIZE_RATIO = 0.25
+
+# CDN access token query parameters. They change every time the manifest URL
+# is requested, but don't affect the content.
+URL_TOKEN_PARAMETERS = {'hdnea', 'hdnts', 'hdntl', 'token', 'exp', 'hmac'}
+
+# In-process tier of the ffprobe cache: normalized URL -> (timestamp, result)
+_probed_programs: dict[str, tuple[float, Any]] = {}
+_probed_programs_lock = threading.Lock()
+
 
 class Ffprobe:
     def __init__(
@@ -37,7 +59,22 @@ class Ffprobe:
         self.x_forwarded_for = x_forwarded_for
 
     def show_programs_for_url(self, url: str):
-        args = [
+        args = self._show_programs_args(url)
+        try:
+            return json.loads(subprocess.check_output(args, timeout=20).decode('utf-8'))
+        except FileNotFoundError:
+            raise FfmpegNotFoundError()
+
+    async def show_programs_for_url_async(self, url: str):
+        """Asyncio version of show_programs_for_url()."""
+        args = self._show_programs_args(url)
+        try:
+            return json.loads((await check_output_async(args, 20)).decode('utf-8'))
+        except FileNotFoundError:
+            raise FfmpegNotFoundError()
+
+    def _show_programs_args(self, url: str) -> list[str]:
+        return [
             self.ffprobe_binary,
             '-loglevel',
             ffmpeg_loglevel(logger.getEffectiveLevel()),
@@ -53,10 +90,6 @@ class Ffprobe:
             '-i',
             url,
         ]
-        try:
-            return json.loads(subprocess.check_output(args, timeout=20).decode('utf-8'))
-        except FileNotFoundError:
-            raise FfmpegNotFoundError()
 
     def duration_seconds_file(self, filename: str) -> float:
         args = [
@@ -93,13 +126,59 @@ class Ffprobe:
             + float(m.group(4)) / 100
         )
 
+    def duration_seconds_header(self, filename: str) -> float:
+        """Read the duration of a media file from the container metadata.
+
+        This is fast, because the file is not decoded. Raises ValueError if
+        the file doesn't declare its duration.
+        """
+        args = [
+            self.ffprobe_binary,
+            '-loglevel',
+            'error',
+            '-show_entries',
+            'format=duration:stream=duration',
+            '-print_format',
+            'json',
+            f'file:{filename}',
+        ]
+        try:
+            output = subprocess.check_output(args, timeout=60)
+        except FileNotFoundError:
+            raise FfmpegNotFoundError()
+        except subprocess.SubprocessError as ex:
+            raise ValueError(f'ffprobe failed: {ex}')
+
+        try:
+            probed = json.loads(output.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ValueError('Unexpected ffprobe output')
+
+        durations = [probed.get('format', {}).get('duration')]
+        durations.extend(s.get('duration') for s in probed.get('streams', []))
+        for duration in durations:
+            try:
+                if duration is not None:
+                    return float(duration)
+            except ValueError:
+                pass
+
+        raise ValueError('Duration not found in the file header')
+
     def full_stream_already_downloaded(
-        self, filename: str, expected_duration: Optional[float]
+        self,
+        filename: str,
+        expected_duration: Optional[float],
+        expected_bitrate: Optional[float] = None,
+        verify_full: bool = False,
     ) -> bool:
         """Returns True if a stream file called "filename" exists and is complete.
 
-        This calls ffprobe to analyze the file (or returns False if ffprobe is not
-        available).
+        The checks, from the cheapest to the most expensive:
+        1. The file size must be plausible for expected_bitrate (kbit/s).
+        2. The duration in the container header must match expected_duration.
+           If verify_full is True, the file is decoded completely instead to
+           find the real duration.
         """
         if not os.path.exists(filename):
             return False
@@ -111,8 +190,18 @@ class Ffprobe:
         if expected_duration is None or expected_duration <= 0:
             return False
 
+        if expected_bitrate and expected_bitrate > 0:
+            expected_size = expected_bitrate * 1000 / 8 * expected_duration
+            size = os.path.getsize(filename)
+            logger.debug(f'File size {size} bytes, expected about {expected_size:.0f}')
+            if size < MIN_FILE_SIZE_RATIO * expected_size:
+                return False
+
         try:
-            downloaded_duration = self.duration_seconds_file(filename)
+            if verify_full:
+                downloaded_duration = self.duration_seconds_file(filename)
+            else:
+                downloaded_duration = self.duration_seconds_header(filename)
         except ValueError as ex:
             logger.warning(f'Failed to get duration for the file {filename}: {ex}')
             return False
@@ -127,6 +216,95 @@ class Ffprobe:
         return downloaded_duration >= 0.98 * expected_duration
 
 
+class CachingFfprobe(Ffprobe):
+    """Ffprobe that memoizes the results of show_programs_for_url.
+
+    The results are cached in memory for the duration of the process and,
+    if cache_dir is given, on the disk for later runs. Entries are keyed by
+    the manifest URL without the access token parameters.
+    """
+
+    def __init__(
+        self,
+        ffprobe_binary: str,
+        ffmpeg_binary: str,
+        x_forwarded_for: Optional[str],
+        cache_dir: Optional[str] = None,
+    ):
+        super().__init__(ffprobe_binary, ffmpeg_binary, x_forwarded_for)
+        if cache_dir:
+            self.disk_cache: Optional[DiskCache] = DiskCache(
+                os.path.join(cache_dir, 'ffprobe'), FFPROBE_CACHE_MAX_SIZE_BYTES
+            )
+        else:
+            self.disk_cache = None
+
+    def show_programs_for_url(self, url: str):
+        key = normalize_manifest_url(url)
+        programs = self._cached_programs(key)
+        if programs is None:
+            logger.debug(f'ffprobe cache miss: {key}')
+            programs = super().show_programs_for_url(url)
+            self._store(key, programs)
+
+        return programs
+
+    async def show_programs_for_url_async(self, url: str):
+        key = normalize_manifest_url(url)
+        programs = self._cached_programs(key)
+        if programs is None:
+            logger.debug(f'ffprobe cache miss: {key}')
+            programs = await super().show_programs_for_url_async(url)
+            self._store(key, programs)
+
+        return programs
+
+    def _cached_programs(self, key: str):
+        with _probed_programs_lock:
+            cached = _probed_programs.get(key)
+        if cached is not None and time.time() - cached[0] < FFPROBE_CACHE_TTL:
+            logger.debug(f'ffprobe cache hit (memory): {key}')
+            return cached[1]
+
+        if self.disk_cache is not None:
+            entry = self.disk_cache.get(key)
+            if entry is not None and entry.age_seconds() < FFPROBE_CACHE_TTL:
+                logger.debug(f'ffprobe cache hit (disk): {key}')
+                programs = json.loads(entry.data.decode('utf-8'))
+                self._remember(key, programs, entry.stored_at)
+                return programs
+
+        return None
+
+    def _store(self, key: str, programs) -> None:
+        self._remember(key, programs, time.time())
+        if self.disk_cache is not None:
+            self.disk_cache.put(key, {}, json.dumps(programs).encode('utf-8'))
+
+    def _remember(self, key: str, programs, timestamp: float) -> None:
+        with _probed_programs_lock:
+            _probed_programs[key] = (timestamp, programs)
+
+
+def normalize_manifest_url(url: str) -> str:
+    parsed = urlparse(url)
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in URL_TOKEN_PARAMETERS
+    )
+    return urlunparse(
+        (
+            parsed.scheme.lower(),
+            parsed.netloc.lower(),
+            parsed.path,
+            '',
+            urlencode(query),
+            '',
+        )
+    )
+
+
 class NullProbe:
     """Null probe that doesn't do anything.
 
@@ -136,11 +314,21 @@ class NullProbe:
     def show_programs_for_url(self, _url: str):
         return {}
 
+    async def show_programs_for_url_async(self, _url: str):
+        return {}
+
     def duration_seconds_file(self, _filename: str) -> float:
         return 0
 
+    def duration_seconds_header(self, _filename: str) -> float:
+        return 0
+
     def full_stream_already_downloaded(
-        self, _filename: str, _expected_duration: Optional[float]
+        self,
+        _filename: str,
+        _expected_duration: Optional[float],
+        _expected_bitrate: Optional[float] = None,
+        _verify_full: bool = False,
     ) -> bool:
         return False
 
@@ -0,0 +1,255 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+"""Minimal parser for HLS playlists (RFC 8216)."""
+
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import urljoin
+
+VIDEO_CODEC_PREFIXES = ('avc', 'hvc', 'hev', 'vp0', 'vp8', 'vp9', 'av01', 'dvh')
+
+MPEGTS_PACKET_SIZE = 188
+MPEGTS_CLOCK_HZ = 90000
+
+
+@dataclass(frozen=True)
+class HlsVariant:
+    # The index of the variant in the master playlist. ffmpeg exposes each
+    # variant as a program with this ID.
+    program_id: int
+    uri: str
+    bandwidth: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    codecs: list[str] = field(default_factory=list)
+    # GROUP-ID of the alternative audio renditions
+    audio_group: Optional[str] = None
+
+    def has_video(self) -> Optional[bool]:
+        """Does the variant contain video?
+
+        Returns None if it can't be deduced from the playlist.
+        """
+        if self.width or self.height:
+            return True
+        if self.codecs:
+            return any(c.startswith(VIDEO_CODEC_PREFIXES) for c in self.codecs)
+        return None
+
+
+@dataclass(frozen=True)
+class HlsRendition:
+    uri: str
+    group_id: Optional[str] = None
+    language: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class HlsMasterPlaylist:
+    variants: list[HlsVariant]
+    # EXT-X-MEDIA renditions that have a separate media playlist
+    audio_renditions: list[HlsRendition]
+    subtitles: list[HlsRendition]
+
+    def has_separate_audio(self, variant: HlsVariant) -> bool:
+        """Is the audio of variant delivered in a separate media playlist?"""
+        return variant.audio_group is not None and any(
+            r.group_id == variant.audio_group for r in self.audio_renditions
+        )
+
+
+@dataclass(frozen=True)
+class HlsMediaPlaylist:
+    segment_uris: list[str]
+    encrypted: bool = False
+    # True, if the segments are fragmented MP4 rather than MPEG-TS
+    has_init_section: bool = False
+    has_byte_ranges: bool = False
+    # False, if more segments may be appended later (i.e. a live stream)
+    ended: bool = False
+
+
+def parse_master_playlist(content: str, base_url: str) -> HlsMasterPlaylist:
+    """Parse the variant streams and subtitle renditions of a master playlist.
+
+    Raises ValueError if content is not an HLS playlist.
+    """
+    lines = [line.strip() for line in content.splitlines() if line.strip()]
+    if not lines or lines[0] != '#EXTM3U':
+        raise ValueError('Not an HLS playlist')
+
+    variants = []
+    audio_renditions = []
+    subtitles = []
+    stream_inf: Optional[dict[str, str]] = None
+    for line in lines[1:]:
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            stream_inf = parse_attribute_list(line.split(':', 1)[1])
+        elif line.startswith('#EXT-X-MEDIA:'):
+            attrs = parse_attribute_list(line.split(':', 1)[1])
+            if attrs.get('URI'):
+                rendition = HlsRendition(
+                    uri=urljoin(base_url, attrs['URI']),
+                    group_id=attrs.get('GROUP-ID'),
+                    language=attrs.get('LANGUAGE'),
+                )
+                if attrs.get('TYPE') == 'AUDIO':
+                    audio_renditions.append(rendition)
+                elif attrs.get('TYPE') == 'SUBTITLES':
+                    subtitles.append(rendition)
+        elif line.startswith('#'):
+            continue
+        elif stream_inf is not None:
+            variants.append(
+                _create_variant(len(variants), urljoin(base_url, line), stream_inf)
+            )
+            stream_inf = None
+
+    return HlsMasterPlaylist(variants, audio_renditions, subtitles)
+
+
+def _create_variant(program_id: int, uri: str, attrs: dict[str, str]) -> HlsVariant:
+    width = height = None
+    resolution = re.match(r'^(\d+)x(\d+)$', attrs.get('RESOLUTION', ''))
+    if resolution:
+        width = int(resolution.group(1))
+        height = int(resolution.group(2))
+
+    bandwidth = attrs.get('BANDWIDTH')
+    codecs = [c.strip() for c in attrs.get('CODECS', '').split(',') if c.strip()]
+
+    return HlsVariant(
+        program_id=program_id,
+        uri=uri,
+        bandwidth=int(bandwidth) if bandwidth and bandwidth.isdigit() else None,
+        width=width,
+        height=height,
+        codecs=codecs,
+        audio_group=attrs.get('AUDIO'),
+    )
+
+
+def parse_attribute_list(attributes: str) -> dict[str, str]:
+    """Parse an HLS attribute list such as 'BANDWIDTH=1280000,CODECS="a,b"'."""
+    pattern = r'([A-Z0-9-]+)=("[^"]*"|[^,]*)'
+    return {m.group(1): m.group(2).strip('"') for m in re.finditer(pattern, attributes)}
+
+
+def parse_media_playlist(content: str, base_url: str) -> HlsMediaPlaylist:
+    """Parse the segment URIs and the segment format of a media playlist.
+
+    Raises ValueError if content is not an HLS playlist.
+    """
+    lines = [line.strip() for line in content.splitlines() if line.strip()]
+    if not lines or lines[0] != '#EXTM3U':
+        raise ValueError('Not an HLS playlist')
+
+    segment_uris = []
+    encrypted = has_init_section = has_byte_ranges = ended = False
+    for line in lines[1:]:
+        if line.startswith('#EXT-X-KEY:'):
+            method = parse_attribute_list(line.split(':', 1)[1]).get('METHOD')
+            encrypted = encrypted or method != 'NONE'
+        elif line.startswith('#EXT-X-MAP:'):
+            has_init_section = True
+        elif line.startswith('#EXT-X-BYTERANGE:'):
+            has_byte_ranges = True
+        elif line == '#EXT-X-ENDLIST':
+            ended = True
+        elif not line.startswith('#'):
+            segment_uris.append(urljoin(base_url, line))
+
+    return HlsMediaPlaylist(
+        segment_uris=segment_uris,
+        encrypted=encrypted,
+        has_init_section=has_init_section,
+        has_byte_ranges=has_byte_ranges,
+        ended=ended,
+    )
+
+
+def first_segment_uri(content: str, base_url: str) -> Optional[str]:
+    """Return the URI of the first segment of a media playlist.
+
+    Returns None if the segments are encrypted or are not MPEG-TS (i.e. the
+    playlist has an EXT-X-MAP initialization section).
+    """
+    try:
+        playlist = parse_media_playlist(content, base_url)
+    except ValueError:
+        return None
+
+    if playlist.encrypted or playlist.has_init_section or not playlist.segment_uris:
+        return None
+
+    return playlist.segment_uris[0]
+
+
+def mpegts_start_time(data: bytes) -> Optional[float]:
+    """Return the smallest presentation timestamp (in seconds) in MPEG-TS data.
+
+    Only the PES headers in the given bytes are examined. Returns None if
+    the data doesn't contain any timestamps.
+    """
+    timestamps = []
+    for offset in range(0, len(data) - MPEGTS_PACKET_SIZE + 1, MPEGTS_PACKET_SIZE):
+        packet = data[offset : offset + MPEGTS_PACKET_SIZE]
+        if packet[0] != 0x47:
+            return None
+
+        payload_unit_start = packet[1] & 0x40
+        adaptation_field_control = (packet[3] >> 4) & 0x03
+        if not payload_unit_start or not adaptation_field_control & 0x01:
+            continue
+
+        payload_start = 4
+        if adaptation_field_control & 0x02:
+            payload_start += 1 + packet[4]
+
+        pts = _pes_pts(packet[payload_start:])
+        if pts is not None:
+            timestamps.append(pts)
+
+    if timestamps:
+        return min(timestamps) / MPEGTS_CLOCK_HZ
+    else:
+        return None
+
+
+def _pes_pts(pes: bytes) -> Optional[int]:
+    if len(pes) < 14 or pes[:3] != b'\x00\x00\x01':
+        return None
+
+    stream_id = pes[3]
+    if stream_id in (0xBC, 0xBE, 0xBF):
+        # Streams without the optional PES header
+        return None
+
+    has_pts = pes[7] & 0x80
+    if not has_pts:
+        return None
+
+    b = pes[9:14]
+    return (
+        ((b[0] >> 1) & 0x07) << 30
+        | b[1] << 22
+        | (b[2] >> 1) << 15
+        | b[3] << 7
+        | b[4] >> 1
+    )
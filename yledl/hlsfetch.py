@@ -0,0 +1,228 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import os
+import requests
+from contextlib import closing
+from dataclasses import dataclass
+from typing import IO, Iterator, Mapping, Optional
+from .concurrency import ordered_map
+from .errors import TransientDownloadError, is_expired_url_status
+from .ffmpeg import normalize_manifest_url
+from .hls import HlsRendition, parse_master_playlist, parse_media_playlist
+from .http import HttpClient
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger('yledl')
+
+
+@dataclass(frozen=True)
+class SegmentedStream:
+    """An HLS variant that can be downloaded segment by segment."""
+
+    segment_uris: list[str]
+    subtitles: list[HlsRendition]
+
+
+def plan_segmented_download(
+    master_url: str,
+    program_id: int,
+    httpclient: HttpClient,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Optional[SegmentedStream]:
+    """Find the segments of a variant stream in an HLS master playlist.
+
+    program_id is the index of the variant in the master playlist.
+
+    Returns None if the variant can't be downloaded as a plain sequence of
+    MPEG-TS segments. That is the case if the segments are encrypted or
+    fragmented MP4, the audio is delivered as a separate rendition, or the
+    stream is live.
+    """
+    try:
+        master = parse_master_playlist(
+            httpclient.download_page(master_url, headers) or '', master_url
+        )
+        if not 0 <= program_id < len(master.variants):
+            logger.debug(f'Variant {program_id} not found in the master playlist')
+            return None
+
+        variant = master.variants[program_id]
+        if master.has_separate_audio(variant):
+            logger.debug('Audio is on a separate rendition')
+            return None
+
+        media = parse_media_playlist(
+            httpclient.download_page(variant.uri, headers) or '', variant.uri
+        )
+    except (requests.RequestException, ValueError) as ex:
+        logger.debug(f'Failed to parse the HLS playlist: {ex}')
+        return None
+
+    if media.encrypted or media.has_init_section or media.has_byte_ranges:
+        logger.debug('Unsupported HLS segment format')
+        return None
+
+    if not media.ended or not media.segment_uris:
+        logger.debug('Not a complete HLS playlist')
+        return None
+
+    return SegmentedStream(media.segment_uris, master.subtitles)
+
+
+def fetch_segments(
+    segment_uris: list[str],
+    httpclient: HttpClient,
+    connections: int,
+    headers: Optional[Mapping[str, str]] = None,
+    bucket: Optional[TokenBucket] = None,
+) -> Iterator[bytes]:
+    """Download segments over parallel connections and yield them in order.
+
+    At most 2 * connections segments are held in memory at a time. If bucket
+    is given, the download rate is limited by it.
+    Raises TransientDownloadError if a segment fails to download.
+    """
+
+    def fetch(uri: str) -> bytes:
+        try:
+            content = httpclient.get(uri, headers, timeout=30).content
+            if bucket:
+                bucket.consume(len(content))
+            return content
+        except requests.RequestException as ex:
+            status = ex.response.status_code if ex.response is not None else None
+            raise TransientDownloadError(
+                f'Failed to download an HLS segment: {ex}',
+                url_expired=is_expired_url_status(status),
+            )
+
+    return ordered_map(fetch, segment_uris, max_workers=connections)
+
+
+def write_segments(segments: Iterator[bytes], destination: IO[bytes]) -> None:
+    with closing(segments):
+        for data in segments:
+            destination.write(data)
+
+
+class SegmentJournal:
+    """Partially downloaded HLS stream that can be resumed later.
+
+    The segments are appended to <output>.part. After each segment, a line
+    "<segment index> <part file size>" is appended to the sidecar journal
+    <output>.part.journal. The journal starts with a header that identifies
+    the stream, so that a journal of a different stream is not resumed.
+    """
+
+    def __init__(self, output_name: str, segment_uris: list[str]):
+        self.part_filename = f'{output_name}.part'
+        self.journal_filename = f'{output_name}.part.journal'
+        self.num_segments = len(segment_uris)
+        first_segment = normalize_manifest_url(segment_uris[0]) if segment_uris else ''
+        self.header = f'# yle-dl segments {self.num_segments} {first_segment}'
+
+    def completed_segments(self) -> int:
+        """Return the number of segments that have been completely downloaded.
+
+        The part file is truncated to the end of the last complete segment.
+        Starts from scratch, if the journal is missing or doesn't match.
+        """
+        try:
+            with open(self.journal_filename, encoding='utf-8') as f:
+                # The last line is incomplete if the previous download was
+                # interrupted while writing it
+                lines = f.read().split('\n')[:-1]
+        except FileNotFoundError:
+            lines = []
+
+        completed = 0
+        part_size = 0
+        if lines and lines[0] == self.header:
+            for line in lines[1:]:
+                try:
+                    index, size = (int(x) for x in line.split())
+                except ValueError:
+                    break
+
+                if index != completed:
+                    break
+
+                completed = index + 1
+                part_size = size
+
+        if completed == 0 or not self._truncate_part_file(part_size):
+            self._start_new_journal()
+            return 0
+
+        return completed
+
+    def read_completed_segments(self, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """Yield the contents of the part file in chunks.
+
+        Call completed_segments() first to truncate the part file to the
+        completed segments.
+        """
+        with open(self.part_filename, 'rb') as part:
+            while True:
+                data = part.read(chunk_size)
+                if not data:
+                    break
+
+                yield data
+
+    def record_segments(
+        self, segments: Iterator[bytes], first_index: int
+    ) -> Iterator[bytes]:
+        """Append segments to the part file and record them in the journal.
+
+        Each segment is yielded after it has been recorded, so that the
+        segments can be passed on while they are being journaled.
+        """
+        with closing(segments), open(self.part_filename, 'ab') as part:
+            with open(self.journal_filename, 'a', encoding='utf-8') as journal:
+                for index, data in enumerate(segments, first_index):
+                    part.write(data)
+                    part.flush()
+                    journal.write(f'{index} {part.tell()}\n')
+                    journal.flush()
+
+                    yield data
+
+    def remove(self) -> None:
+        for filename in (self.part_filename, self.journal_filename):
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+
+    def _truncate_part_file(self, size: int) -> bool:
+        try:
+            if os.path.getsize(self.part_filename) < size:
+                return False
+
+            os.truncate(self.part_filename, size)
+            return True
+        except OSError:
+            return False
+
+    def _start_new_journal(self) -> None:
+        with open(self.journal_filename, 'w', encoding='utf-8') as f:
+            f.write(f'{self.header}\n')
+        with open(self.part_filename, 'wb'):
+            pass
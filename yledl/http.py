@@ -18,24 +18,54 @@
 import logging
 import lxml.html
 import lxml.etree
+import os.path
 import re
 import requests
 import sys
+import threading
 from typing import Mapping, Optional, Any
 from requests.adapters import HTTPAdapter
 from requests.structures import CaseInsensitiveDict
 from urllib.parse import urlencode, urlparse, urlunparse, parse_qs
 from urllib3.util import Retry
+from .cache import CacheEntry, DiskCache
 from .version import __version__
 
 logger = logging.getLogger('yledl')
 
+# How long (in seconds) responses from each endpoint are cached. URLs that do
+# not match any of the patterns are never cached.
+HTTP_CACHE_TTLS = [
+    # Preview JSON contains the stream manifest URLs, which expire eventually
+    (re.compile(r'^https://player\.api\.yle\.fi/v1/preview/'), 10 * 60),
+    # Programs API playlist pages
+    (re.compile(r'^https://areena\.api\.yle\.fi/'), 60 * 60),
+    # Series and episode HTML pages
+    (re.compile(r'^https://(areena|arenan)\.yle\.fi/'), 60 * 60),
+]
+# Endpoints that list the episodes of a series. They are revalidated on
+# every request in the --sync and --watch modes, so that new episodes are
+# noticed without waiting for the TTL to expire.
+HTTP_CACHE_LISTING_URL_RE = re.compile(
+    r'^https://(areena\.api\.yle\.fi|areena\.yle\.fi|arenan\.yle\.fi)/'
+)
+# Request headers that may change the response. They are part of the cache key.
+HTTP_CACHE_KEY_HEADERS = ('Referer', 'Origin', 'X-Forwarded-For')
+HTTP_CACHE_MAX_SIZE_BYTES = 100 * 1024 * 1024
+
 
 class HttpClient:
     def __init__(self, io):
-        self._session = self._create_session(io.proxy)
+        self._session = self._create_session(io.proxy, io.connections * io.jobs)
+        if io.cache_dir:
+            self._cache = HttpCache(
+                os.path.join(io.cache_dir, 'http'),
+                revalidate_listings=io.sync_dir is not None,
+            )
+        else:
+            self._cache = None
 
-    def _create_session(self, proxy: str) -> requests.Session:
+    def _create_session(self, proxy: str, connections: int) -> requests.Session:
         session = requests.Session()
 
         if proxy:
@@ -44,8 +74,12 @@ class HttpClient:
         retry = Retry(
             total=3, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504]
         )
-        session.mount('http://', HTTPAdapter(max_retries=retry))
-        session.mount('https://', HTTPAdapter(max_retries=retry))
+        # Keep enough connections open for fetching HLS segments in parallel
+        pool_size = max(10, connections)
+        session.mount('http://', HTTPAdapter(max_retries=retry, pool_maxsize=pool_size))
+        session.mount(
+            'https://', HTTPAdapter(max_retries=retry, pool_maxsize=pool_size)
+        )
 
         return session
 
@@ -63,35 +97,59 @@ class HttpClient:
         response = self.get(url, extra_headers, timeout=timeout)
         return response.json()
 
+    def download_html(
+        self, url: str, extra_headers: Optional[Mapping[str, str]] = None, timeout=60
+    ) -> tuple[bytes, str]:
+        """Downloads an HTML document.
+
+        Returns the raw contents and the character encoding of the document.
+        """
+        response = self.get(url, extra_headers, timeout=timeout)
+        encoding = html_meta_charset(response.content)
+        if encoding:
+            logger.debug(f'HTML meta charset: {encoding}')
+        else:
+            encoding = response.encoding or response.apparent_encoding or 'utf-8'
+
+        return response.content, encoding
+
     def download_html_tree(
         self, url: str, extra_headers: Optional[Mapping[str, str]] = None, timeout=60
     ):
         """Downloads an HTML document and returns it parsed as a lxml tree."""
-        response = self.get(url, extra_headers, timeout=timeout)
-        metacharset = html_meta_charset(response.content)
-        if metacharset:
-            logger.debug(f'HTML meta charset: {metacharset}')
-            response.encoding = metacharset
-
-        try:
-            page = response.text
-            return lxml.html.fromstring(page)
-        except lxml.etree.XMLSyntaxError as ex:
-            logger.warning(f'HTML syntax error: {str(ex)}')
-            return None
-        except lxml.etree.ParserError as ex:
-            logger.warning(f'HTML parsing error: {str(ex)}')
-            return None
+        content, encoding = self.download_html(url, extra_headers, timeout)
+        return parse_html_tree(decode_html(content, encoding))
 
     def download_to_file(self, url: str, destination_filename: str) -> None:
         enc = sys.getfilesystemencoding()
         encoded_filename = destination_filename.encode(enc, 'replace')
-        logger.debug(f'HTTP GET {url}')
         with open(encoded_filename, 'wb') as output:
-            r = requests.get(url, headers=yledl_headers(), stream=True, timeout=20)
+            with self.open_stream(url) as r:
+                for chunk in r.iter_content(chunk_size=64 * 1024):
+                    output.write(chunk)
+
+    def open_stream(
+        self, url: str, extra_headers: Optional[Mapping[str, str]] = None, timeout=20
+    ) -> requests.Response:
+        """Start a streaming GET request.
+
+        The body is not downloaded until it is read through the returned
+        response. The caller must close the response.
+        """
+        headers = yledl_headers()
+        if extra_headers:
+            headers.update(extra_headers)
+
+        logger.debug(f'HTTP GET (streaming) {url}')
+        r = self._session.get(url, headers=headers, stream=True, timeout=timeout)
+        logger.debug(f'HTTP status code: {r.status_code}')
+        try:
             r.raise_for_status()
-            for chunk in r.iter_content(chunk_size=4096):
-                output.write(chunk)
+        except requests.HTTPError:
+            r.close()
+            raise
+
+        return r
 
     def get(
         self, url: str, extra_headers: Optional[Mapping[str, str]] = None, timeout=60
@@ -105,6 +163,14 @@ class HttpClient:
         if extra_headers:
             headers.update(extra_headers)
 
+        if self._cache is None or self._cache.ttl(url) is None:
+            return self._get_from_network(url, headers, timeout)
+        else:
+            return self._get_cached(self._cache, url, headers, timeout)
+
+    def _get_from_network(
+        self, url: str, headers: Mapping[str, str], timeout
+    ) -> requests.Response:
         logger.debug(f'HTTP GET {url}')
         r = self._session.get(url, headers=headers, timeout=timeout)
         logger.debug(f'HTTP status code: {r.status_code}')
@@ -115,6 +181,50 @@ class HttpClient:
 
         return r
 
+    def _get_cached(
+        self, cache: 'HttpCache', url: str, headers: CaseInsensitiveDict[str], timeout
+    ) -> requests.Response:
+        key = cache.key(url, headers)
+        entry = cache.lookup(key)
+        if entry is not None and entry.age_seconds() < cache.ttl(url):
+            cache.record('hit', url)
+            return cached_response(url, entry)
+
+        if entry is not None:
+            headers.update(conditional_request_headers(entry))
+
+        r = self._get_from_network(url, headers, timeout)
+        if entry is not None and r.status_code == 304:
+            cache.record('revalidated', url)
+            cache.refresh(key, entry)
+            return cached_response(url, entry)
+
+        cache.record('miss', url)
+        if r.status_code == 200:
+            cache.store(key, r)
+
+        return r
+
+    def invalidate_cached(
+        self, url: str, extra_headers: Optional[Mapping[str, str]] = None
+    ) -> None:
+        """Drop the cached response of a GET request.
+
+        The next get() with the same URL and headers goes to the network.
+        """
+        if self._cache is None:
+            return
+
+        headers = yledl_headers()
+        if extra_headers:
+            headers.update(extra_headers)
+
+        self._cache.invalidate(self._cache.key(url, headers))
+
+    def log_cache_statistics(self) -> None:
+        if self._cache:
+            self._cache.log_statistics()
+
     def post(
         self,
         url: str,
@@ -137,6 +247,109 @@ class HttpClient:
         return r
 
 
+class HttpCache:
+    """Persistent cache for HTTP GET responses.
+
+    Fresh responses are served from the disk without touching the network.
+    Stale responses are revalidated with a conditional GET request
+    (If-None-Match or If-Modified-Since) and re-used if the server replies
+    304 Not Modified.
+
+    If revalidate_listings is True, the series listing endpoints are
+    revalidated on every request.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_size_bytes=HTTP_CACHE_MAX_SIZE_BYTES,
+        revalidate_listings: bool = False,
+    ):
+        self._storage = DiskCache(directory, max_size_bytes)
+        self._lock = threading.Lock()
+        self.revalidate_listings = revalidate_listings
+        self.stats = {'hit': 0, 'revalidated': 0, 'miss': 0}
+
+    def ttl(self, url: str) -> Optional[int]:
+        for pattern, ttl in HTTP_CACHE_TTLS:
+            if pattern.match(url):
+                if self.revalidate_listings and HTTP_CACHE_LISTING_URL_RE.match(url):
+                    return 0
+                return ttl
+        return None
+
+    def key(self, url: str, headers: Mapping[str, str]) -> str:
+        """The cache key of a request: the URL and the varying headers."""
+        header_lines = [
+            f'{name}: {headers[name]}'
+            for name in HTTP_CACHE_KEY_HEADERS
+            if headers.get(name)
+        ]
+        return '\n'.join([url] + header_lines)
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        return self._storage.get(key)
+
+    def store(self, key: str, response: requests.Response) -> None:
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        if 'no-store' in cache_control:
+            return
+
+        # The content has already been decoded, so the transfer headers
+        # would no longer describe it
+        headers = {
+            name: value
+            for name, value in response.headers.items()
+            if name.lower()
+            not in ('content-encoding', 'content-length', 'transfer-encoding')
+        }
+        metadata = {
+            'headers': headers,
+            'encoding': response.encoding,
+        }
+        self._storage.put(key, metadata, response.content)
+
+    def refresh(self, key: str, entry: CacheEntry) -> None:
+        self._storage.refresh(key, entry.metadata)
+
+    def invalidate(self, key: str) -> None:
+        self._storage.remove(key)
+
+    def record(self, outcome: str, url: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+        logger.debug(f'HTTP cache {outcome}: {url}')
+
+    def log_statistics(self) -> None:
+        with self._lock:
+            logger.debug(
+                f'HTTP cache: {self.stats["hit"]} hits, '
+                f'{self.stats["revalidated"]} revalidated, '
+                f'{self.stats["miss"]} misses'
+            )
+
+
+def conditional_request_headers(entry: CacheEntry) -> dict[str, str]:
+    cached_headers = CaseInsensitiveDict(entry.metadata.get('headers', {}))
+    headers = {}
+    if 'ETag' in cached_headers:
+        headers['If-None-Match'] = cached_headers['ETag']
+    if 'Last-Modified' in cached_headers:
+        headers['If-Modified-Since'] = cached_headers['Last-Modified']
+    return headers
+
+
+def cached_response(url: str, entry: CacheEntry) -> requests.Response:
+    """Reconstruct a requests.Response from a cache entry."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.headers = CaseInsensitiveDict(entry.metadata.get('headers', {}))
+    response.encoding = entry.metadata.get('encoding')
+    response._content = entry.data
+    return response
+
+
 def yledl_headers() -> CaseInsensitiveDict[str]:
     headers = requests.utils.default_headers()
     headers.update({'User-Agent': yledl_user_agent()})
@@ -148,6 +361,25 @@ def yledl_user_agent() -> str:
     return f'yle-dl/{major}'
 
 
+def decode_html(content: bytes, encoding: str) -> str:
+    try:
+        return str(content, encoding, errors='replace')
+    except LookupError:
+        return str(content, errors='replace')
+
+
+def parse_html_tree(page: str):
+    """Parse an HTML document into a lxml tree, or return None on errors."""
+    try:
+        return lxml.html.fromstring(page)
+    except lxml.etree.XMLSyntaxError as ex:
+        logger.warning(f'HTML syntax error: {str(ex)}')
+        return None
+    except lxml.etree.ParserError as ex:
+        logger.warning(f'HTML parsing error: {str(ex)}')
+        return None
+
+
 def html_meta_charset(html_bytes: bytes) -> Optional[str]:
     metacharset = re.search(rb'<meta [^>]*?charset="(.*?)"', html_bytes)
     if metacharset:
@@ -25,7 +25,9 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 from .errors import FfmpegNotFoundError
-from .ffmpeg import Ffprobe
+from .ffmpeg import CachingFfprobe
+from .http import HttpClient
+from .ratelimit import TokenBucket
 from .utils import sane_filename
 
 logger = logging.getLogger('yledl')
@@ -61,13 +63,19 @@ class IOContext:
     preferred_format: Optional[str] = None
     destdir: Optional[str] = None
     resume: bool = False
+    # Record HLS segments in a part file so that the download can be resumed
+    resumable_segments: bool = False
     overwrite: bool = True
+    # Decode existing output files completely when checking if they are complete
+    verify_full: bool = False
     download_limits: DownloadLimits = field(default_factory=DownloadLimits)
     excludechars: str = '*/|'
     proxy: Optional[str] = None
     x_forwarded_for: Optional[str] = None
     subtitles: str = 'all'
     metadata_language: Optional[str] = None
+    # Output format of --showmetadata: "json" or "ndjson"
+    metadata_format: str = 'json'
     postprocess_command: Optional[str] = None
     ffmpeg_binary: str = 'ffmpeg'
     ffprobe_binary: str = 'ffprobe'
@@ -75,12 +83,36 @@ class IOContext:
     create_dirs: bool = False
     xattr: bool = False
     subtitle_delay_s: Optional[float] = None
+    # Number of clips to process in parallel
+    jobs: int = 1
+    # Number of upcoming clips to extract while downloading the current one
+    prefetch: int = 1
+    # Number of parallel connections for downloading HLS segments
+    connections: int = 1
+    # File for recording the program IDs of completed downloads
+    download_archive: Optional[str] = None
+    # Directory for the --sync state files. None disables syncing.
+    sync_dir: Optional[str] = None
+    # Directory for the persistent HTTP and ffprobe caches. None disables the
+    # on-disk caches.
+    cache_dir: Optional[str] = None
+    # This download's share of the --ratelimit bandwidth. Set by
+    # YleDlDownloader while the download is running.
+    bandwidth: Optional[TokenBucket] = None
+    # HTTP client (and its connection pool) shared by the backends of all
+    # downloads. Set by YleDlDownloader while the download is running.
+    httpclient: Optional[HttpClient] = None
 
     def ffprobe(self):
         if self.ffprobe_binary is None:
             return None
 
-        return Ffprobe(self.ffprobe_binary, self.ffmpeg_binary, self.x_forwarded_for)
+        return CachingFfprobe(
+            self.ffprobe_binary,
+            self.ffmpeg_binary,
+            self.x_forwarded_for,
+            self.cache_dir,
+        )
 
     def ffmpeg_version(self) -> tuple[int, int]:
         """Get the ffmpeg application version.
@@ -145,7 +177,8 @@ class OutputFileNameGenerator:
                 raise RuntimeError(f'Directory "${dir}" does not exist')
 
             logger.info(f'Creating directory "{dir}"')
-            os.makedirs(dir)
+            # exist_ok, because a parallel download might have just created it
+            os.makedirs(dir, exist_ok=True)
 
         return path
 
@@ -0,0 +1,84 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import re
+from functools import cached_property
+from typing import Any, Optional
+from .http import decode_html, parse_html_tree
+
+# The opening tags of the scripts that contain the page state as JSON
+NEXT_DATA_SCRIPT_RE = re.compile(rb'<script\b[^>]*\bid=["\']__NEXT_DATA__["\'][^>]*>')
+INITIAL_STATE_SCRIPT_RE = re.compile(
+    rb'<script\b[^>]*\btype=["\']text/javascript["\'][^>]*>'
+    rb'\s*window\.__INITIAL__?STATE__\s*=\s*'
+)
+
+
+class ScannedPage:
+    """An HTML page and the JSON page states embedded in it.
+
+    The state scripts are located in the raw bytes without building a DOM
+    for the whole page. Their contents are parsed on the first access to
+    next_data or initial_state. The lxml tree is needed only on some old
+    page types, and it is built on the first call to tree().
+    """
+
+    def __init__(self, content: bytes, encoding: str):
+        self.content = content
+        self.encoding = encoding
+        self._tree: Any = None
+        self._tree_parsed = False
+
+    def contains(self, marker: bytes) -> bool:
+        """Quick check if marker occurs anywhere on the page."""
+        return marker in self.content
+
+    def tree(self):
+        """The page parsed as a lxml tree, or None if the page is invalid."""
+        if not self._tree_parsed:
+            self._tree = parse_html_tree(decode_html(self.content, self.encoding))
+            self._tree_parsed = True
+
+        return self._tree
+
+    @cached_property
+    def next_data(self) -> Optional[Any]:
+        """The Next.js state of an Areena page."""
+        script = self._script_text(NEXT_DATA_SCRIPT_RE)
+        return json.loads(script) if script is not None else None
+
+    @cached_property
+    def initial_state(self) -> Optional[Any]:
+        """The state on a Yle article page."""
+        # The assignment might be followed by a semicolon or other statements
+        script = self._script_text(INITIAL_STATE_SCRIPT_RE)
+        if script is None:
+            return None
+
+        return json.JSONDecoder().raw_decode(script)[0]
+
+    def _script_text(self, start_re: re.Pattern) -> Optional[str]:
+        m = start_re.search(self.content)
+        if m is None:
+            return None
+
+        end = self.content.find(b'</script>', m.end())
+        if end < 0:
+            return None
+
+        return decode_html(self.content[m.end() : end], self.encoding)
@@ -15,8 +15,8 @@
 # You should have received a copy of the GNU General Public License
 # along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
 
-from dataclasses import dataclass
-from typing import Generator, Mapping
+from dataclasses import dataclass, field
+from typing import Generator, Mapping, Optional
 from .http import update_url_query
 
 
@@ -28,6 +28,9 @@ class PlaylistData:
     # parameters to be appended to base_url for that season.
     # If empty, a playlist is downloaded from the plain base_url.
     season_parameters: list[Mapping[str, str]]
+    # Season numbers parsed from the season titles. Parallel to
+    # season_parameters. None if a title doesn't contain a number.
+    season_numbers: list[Optional[int]] = field(default_factory=list)
 
     def season_playlist_urls(self) -> Generator[str, None, None]:
         if self.season_parameters:
@@ -35,3 +38,10 @@ class PlaylistData:
                 yield update_url_query(self.base_url, season_query)
         else:
             yield self.base_url
+
+    def season_number(self, season_index: int) -> Optional[int]:
+        """The season number of the season_index-th season (starting from 1)."""
+        if 0 < season_index <= len(self.season_numbers):
+            return self.season_numbers[season_index - 1]
+        else:
+            return None
@@ -0,0 +1,274 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import os
+import re
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import IO, Mapping, Optional
+import requests
+from .errors import TransientDownloadError, is_expired_url_status
+from .exitcodes import RD_FAILED, RD_INCOMPLETE, RD_SUCCESS
+from .http import HttpClient
+from .ratelimit import TokenBucket
+from .subprocess import is_interrupted
+
+logger = logging.getLogger('yledl')
+
+RANGE_SIZE = 8 * 1024 * 1024
+READ_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ByteRange:
+    start: int
+    # Inclusive, like in the HTTP Range header
+    end: int
+
+
+@dataclass(frozen=True)
+class RemoteFile:
+    size: Optional[int]
+    accepts_ranges: bool
+
+
+class DownloadStopped(Exception):
+    pass
+
+
+class RangeJournal:
+    """Record of the byte ranges that have been completely downloaded.
+
+    The ranges are written directly to their final position in the output
+    file. The sidecar file <output>.ranges lists the start offsets of the
+    completed ranges, one per line. It is removed when the download is
+    complete.
+    """
+
+    def __init__(self, output_name: str, file_size: int):
+        self.output_name = output_name
+        self.journal_filename = f'{output_name}.ranges'
+        self.header = f'# yle-dl ranges {file_size} {RANGE_SIZE}'
+        self.ranges = [
+            ByteRange(start, min(start + RANGE_SIZE, file_size) - 1)
+            for start in range(0, file_size, RANGE_SIZE)
+        ]
+        self._lock = threading.Lock()
+
+    def pending_ranges(self, resume: bool) -> list[ByteRange]:
+        """Return the ranges that still need to be downloaded.
+
+        If resume is False or there is nothing to resume, starts from scratch.
+        """
+        completed = self._completed_starts() if resume else None
+        if completed is None:
+            completed = self._completed_prefix() if resume else set()
+            self._start_new_journal(completed)
+
+        return [r for r in self.ranges if r.start not in completed]
+
+    def mark_completed(self, byte_range: ByteRange) -> None:
+        with self._lock:
+            with open(self.journal_filename, 'a', encoding='utf-8') as f:
+                f.write(f'{byte_range.start}\n')
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.journal_filename)
+        except FileNotFoundError:
+            pass
+
+    def _completed_starts(self) -> Optional[set[int]]:
+        try:
+            with open(self.journal_filename, encoding='utf-8') as f:
+                lines = f.read().split('\n')[:-1]
+        except FileNotFoundError:
+            return None
+
+        if not lines or lines[0] != self.header:
+            return None
+
+        return {int(line) for line in lines[1:] if line.isdigit()}
+
+    def _completed_prefix(self) -> set[int]:
+        # The output file might be a partial download from a sequential
+        # downloader (such as wget) that doesn't leave a journal.
+        try:
+            prefix_size = os.path.getsize(self.output_name)
+        except OSError:
+            prefix_size = 0
+
+        return {r.start for r in self.ranges if r.end < prefix_size}
+
+    def _start_new_journal(self, completed: set[int]) -> None:
+        with open(self.journal_filename, 'w', encoding='utf-8') as f:
+            f.write(f'{self.header}\n')
+            for start in sorted(completed):
+                f.write(f'{start}\n')
+
+
+class RangeDownload:
+    """Download a file in byte ranges over parallel HTTP connections."""
+
+    def __init__(
+        self,
+        httpclient: HttpClient,
+        url: str,
+        connections: int,
+        bucket: Optional[TokenBucket] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        self.httpclient = httpclient
+        self.url = url
+        self.connections = connections
+        self.bucket = bucket
+        self.headers = dict(headers or {})
+        self._stop = threading.Event()
+
+    def save(self, output_name: str, resume: bool) -> int:
+        try:
+            remote = self._probe()
+            if remote.size is None or not remote.accepts_ranges:
+                logger.debug('The server does not support ranges')
+                return self._save_sequentially(output_name, resume)
+
+            return self._save_ranges(output_name, remote.size, resume)
+        except DownloadStopped:
+            return RD_INCOMPLETE
+        except requests.HTTPError as ex:
+            return self._http_error_status(ex)
+        except requests.RequestException as ex:
+            raise TransientDownloadError(f'http: Network failure: {ex}')
+        except OSError as ex:
+            raise TransientDownloadError(f'http: File I/O error: {ex.strerror}')
+
+    def pipe(self, destination: IO[bytes]) -> int:
+        try:
+            with self.httpclient.open_stream(self.url, self.headers) as r:
+                self._copy_body(r, destination)
+            return RD_SUCCESS
+        except DownloadStopped:
+            return RD_INCOMPLETE
+        except requests.HTTPError as ex:
+            return self._http_error_status(ex)
+        except requests.RequestException as ex:
+            raise TransientDownloadError(f'http: Network failure: {ex}')
+
+    def _probe(self) -> RemoteFile:
+        headers = dict(self.headers, Range='bytes=0-0')
+        with self.httpclient.open_stream(self.url, headers) as r:
+            if r.status_code == 206:
+                m = re.match(r'bytes 0-0/(\d+)$', r.headers.get('Content-Range', ''))
+                if m:
+                    return RemoteFile(int(m.group(1)), True)
+
+            length = r.headers.get('Content-Length')
+            size = int(length) if length and length.isdigit() else None
+            return RemoteFile(size, False)
+
+    def _save_sequentially(self, output_name: str, resume: bool) -> int:
+        # Without ranges there is no way to continue from the middle
+        if resume and os.path.exists(output_name) and os.path.getsize(output_name):
+            logger.info(
+                'The server does not support resuming, downloading the whole file again'
+            )
+
+        with open(output_name, 'wb') as output:
+            with self.httpclient.open_stream(self.url, self.headers) as r:
+                self._copy_body(r, output)
+
+        return RD_SUCCESS
+
+    def _save_ranges(self, output_name: str, size: int, resume: bool) -> int:
+        journal = RangeJournal(output_name, size)
+        pending = journal.pending_ranges(resume)
+        if len(pending) < len(journal.ranges):
+            done = len(journal.ranges) - len(pending)
+            logger.info(f'Resuming from range {done + 1}/{len(journal.ranges)}')
+
+        mode = 'r+b' if os.path.exists(output_name) else 'wb'
+        with open(output_name, mode) as f:
+            f.truncate(size)
+
+        with ThreadPoolExecutor(
+            max_workers=self.connections, thread_name_prefix='yledl-http'
+        ) as executor:
+            futures = [
+                executor.submit(self._save_range, output_name, byte_range, journal)
+                for byte_range in pending
+            ]
+            try:
+                wait(futures, return_when=FIRST_EXCEPTION)
+            except KeyboardInterrupt:
+                self._stop.set()
+                executor.shutdown(wait=True, cancel_futures=True)
+                return RD_INCOMPLETE
+
+            # Stop the other workers if one of them failed
+            self._stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        errors = [f.exception() for f in futures if not f.cancelled() and f.exception()]
+        # Report the error that caused the other workers to stop
+        for error in errors:
+            if not isinstance(error, DownloadStopped):
+                raise error
+        if errors:
+            raise DownloadStopped()
+
+        journal.remove()
+        return RD_SUCCESS
+
+    def _save_range(
+        self, output_name: str, byte_range: ByteRange, journal: RangeJournal
+    ) -> None:
+        headers = dict(self.headers, Range=f'bytes={byte_range.start}-{byte_range.end}')
+        with self.httpclient.open_stream(self.url, headers) as r:
+            if r.status_code != 206:
+                raise requests.ConnectionError(
+                    f'Expected a partial response, got status {r.status_code}'
+                )
+
+            with open(output_name, 'r+b') as output:
+                output.seek(byte_range.start)
+                self._copy_body(r, output)
+
+        journal.mark_completed(byte_range)
+
+    def _copy_body(self, response: requests.Response, destination: IO[bytes]):
+        for chunk in response.iter_content(chunk_size=READ_SIZE):
+            if self._stop.is_set() or is_interrupted():
+                raise DownloadStopped()
+
+            if self.bucket:
+                self.bucket.consume(len(chunk))
+            destination.write(chunk)
+
+    def _http_error_status(self, ex: requests.HTTPError) -> int:
+        status = ex.response.status_code if ex.response is not None else None
+        if status is not None and status >= 500:
+            raise TransientDownloadError(f'http: Server error {status}')
+        elif is_expired_url_status(status):
+            raise TransientDownloadError(
+                f'http: Access denied ({status}), the URL may have expired',
+                url_expired=True,
+            )
+
+        logger.error(f'HTTP request failed: {ex}')
+        return RD_FAILED
@@ -0,0 +1,136 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+# The minimum bandwidth (bytes/s) of a download when a bandwidth limit is
+# shared by concurrent downloads
+MIN_JOB_RATE = 32 * 1024
+
+
+class TokenBucket:
+    """Thread-safe token bucket for limiting the transfer rate.
+
+    rate is the number of tokens (bytes) added per second. Up to capacity
+    tokens (default: one second worth) can accumulate while idle.
+    consume() may take more tokens than are available, and then sleeps
+    until the debt has been paid back.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._capacity_follows_rate = capacity is None
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def consume(self, amount: int) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            debt = -self._tokens
+            rate = self.rate
+
+        if debt > 0:
+            self._sleep(debt / rate)
+
+    def set_rate(self, rate: float) -> None:
+        """Change the rate. The tokens accumulated so far are kept."""
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            if self._capacity_follows_rate:
+                self.capacity = rate
+                self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+
+class BandwidthManager:
+    """Split a bandwidth limit fairly between concurrent downloads.
+
+    Each download gets its own TokenBucket from job(). When downloads start
+    and finish, the buckets are rebalanced so that each active download gets
+    an equal share of rate, but at least min_job_rate. The total can exceed
+    rate if there are so many downloads that the minimums don't fit in it.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_job_rate: float = MIN_JOB_RATE,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+
+        self.rate = rate
+        self.min_job_rate = min(min_job_rate, rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets: list[TokenBucket] = []
+
+    @contextmanager
+    def job(self) -> Iterator[TokenBucket]:
+        """Register a download for the duration of the with block."""
+        with self._lock:
+            bucket = TokenBucket(
+                self._job_rate(len(self._buckets) + 1),
+                clock=self._clock,
+                sleep=self._sleep,
+            )
+            self._buckets.append(bucket)
+            self._rebalance()
+
+        try:
+            yield bucket
+        finally:
+            with self._lock:
+                self._buckets.remove(bucket)
+                self._rebalance()
+
+    def _job_rate(self, num_jobs: int) -> float:
+        return max(self.rate / max(num_jobs, 1), self.min_job_rate)
+
+    def _rebalance(self) -> None:
+        rate = self._job_rate(len(self._buckets))
+        for bucket in self._buckets:
+            bucket.set_rate(rate)
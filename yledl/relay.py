@@ -0,0 +1,179 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import select
+import socket
+import socketserver
+import threading
+from typing import Optional
+from urllib.parse import urlsplit
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger('yledl')
+
+MAX_HEADER_SIZE = 64 * 1024
+READ_SIZE = 64 * 1024
+
+
+class RateLimitedRelay:
+    """Local HTTP proxy that limits the download rate of a subprocess.
+
+    ffmpeg has no option for limiting its bandwidth, but it can be told to
+    connect through an HTTP proxy. The relay listens on a random port on the
+    loopback interface. It supports CONNECT tunnels (used for HTTPS) and
+    plain HTTP requests. The data received from the servers is throttled by
+    bucket.
+
+    If upstream_proxy is given, the connections are forwarded to it as is,
+    so that the relay can be chained with the --proxy option.
+
+    Usage:
+
+    with RateLimitedRelay(bucket) as relay:
+        run ffmpeg with -http_proxy relay.address
+    """
+
+    def __init__(self, bucket: TokenBucket, upstream_proxy: Optional[str] = None):
+        self.bucket = bucket
+        self.upstream = parse_proxy_address(upstream_proxy) if upstream_proxy else None
+        self._server: Optional[socketserver.ThreadingTCPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        if self._server is None:
+            raise RuntimeError('The relay is not running')
+
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self) -> 'RateLimitedRelay':
+        relay = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                relay._handle(self.request)
+
+        server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        server.daemon_threads = True
+        self._server = server
+        # A short poll interval makes stopping the relay quick
+        self._thread = threading.Thread(
+            target=server.serve_forever,
+            kwargs={'poll_interval': 0.1},
+            name='yledl-relay',
+            daemon=True,
+        )
+        self._thread.start()
+        logger.debug(f'Rate limiting relay listening on {self.address}')
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _handle(self, client: socket.socket) -> None:
+        try:
+            if self.upstream:
+                target = self.upstream
+                initial_data = b''
+            else:
+                connection = self._open_proxy_request(client)
+                if connection is None:
+                    return
+                target, initial_data = connection
+
+            with socket.create_connection(target, timeout=30) as server:
+                if initial_data:
+                    server.sendall(initial_data)
+                self._pump(client, server)
+        except OSError as ex:
+            logger.debug(f'Relay connection failed: {ex}')
+
+    def _open_proxy_request(
+        self, client: socket.socket
+    ) -> Optional[tuple[tuple[str, int], bytes]]:
+        """Read a proxy request from the client.
+
+        Returns the target address and the data to be sent to it, or None
+        if the request is invalid.
+        """
+        data = b''
+        while b'\r\n\r\n' not in data:
+            chunk = client.recv(READ_SIZE)
+            if not chunk or len(data) > MAX_HEADER_SIZE:
+                return None
+            data += chunk
+
+        request_line = data.split(b'\r\n', 1)[0]
+        parts = request_line.decode('latin-1').split(' ')
+        if len(parts) != 3:
+            client.sendall(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+            return None
+
+        method, uri, version = parts
+        if method == 'CONNECT':
+            host, _, port = uri.rpartition(':')
+            if not host or not port.isdigit():
+                client.sendall(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+                return None
+
+            client.sendall(b'HTTP/1.1 200 Connection established\r\n\r\n')
+            # Anything after the CONNECT request belongs to the tunnel
+            return (host.strip('[]'), int(port)), data.split(b'\r\n\r\n', 1)[1]
+
+        url = urlsplit(uri)
+        if url.scheme != 'http' or not url.hostname:
+            client.sendall(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+            return None
+
+        path = url.path or '/'
+        if url.query:
+            path = f'{path}?{url.query}'
+        origin_request_line = f'{method} {path} {version}'.encode('latin-1')
+        target = (url.hostname, url.port or 80)
+        return target, origin_request_line + data[len(request_line) :]
+
+    def _pump(self, client: socket.socket, server: socket.socket) -> None:
+        sockets = [client, server]
+        while True:
+            readable, _, _ = select.select(sockets, [], [], 60)
+            if not readable:
+                return
+
+            for sock in readable:
+                data = sock.recv(READ_SIZE)
+                if not data:
+                    return
+
+                if sock is server:
+                    self.bucket.consume(len(data))
+                    client.sendall(data)
+                else:
+                    server.sendall(data)
+
+
+def parse_proxy_address(proxy: str) -> tuple[str, int]:
+    """Parse the host and the port from a proxy address like localhost:8118."""
+    url = urlsplit(proxy if '://' in proxy else f'http://{proxy}')
+    if not url.hostname:
+        raise ValueError(f'Invalid proxy address: {proxy}')
+
+    return url.hostname, url.port or 80
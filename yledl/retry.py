@@ -0,0 +1,72 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+from .clip import Clip
+
+logger = logging.getLogger('yledl')
+
+
+@dataclass(frozen=True)
+class DownloadAttempt:
+    """The outcome of one attempt to download a clip."""
+
+    status: int
+    # True if the attempt failed on a transient error and can be retried
+    retry: bool = False
+    # The clip to reuse on the next attempt. None if the clip needs to be
+    # extracted again, for example because the stream URLs have expired.
+    clip: Optional[Clip] = None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for retrying failed downloads.
+
+    The delay before the retry attempt n (starting from 1) is drawn
+    uniformly from [0, min(max_delay, base_delay * 2**(n - 1))] seconds.
+    The randomization keeps parallel downloads that failed at the same
+    time from retrying all at once.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep,
+        uniform: Callable[[float, float], float] = random.uniform,
+    ):
+        self.max_retries = max(max_retries, 0)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._uniform = uniform
+
+    def delay(self, attempt: int) -> float:
+        upper = min(self.max_delay, self.base_delay * 2 ** max(attempt - 1, 0))
+        return self._uniform(0, upper) if upper > 0 else 0.0
+
+    def wait(self, attempt: int) -> None:
+        """Sleep before the retry attempt number attempt."""
+        delay = self.delay(attempt)
+        if delay > 0:
+            logger.debug(f'Waiting {delay:.1f} seconds before retrying')
+            self._sleep(delay)
@@ -16,6 +16,7 @@
 # along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
 
 import logging
+import requests
 from typing import Optional
 from .backends import (
     BaseDownloader,
@@ -23,15 +24,39 @@ from .backends import (
     HLSAudioBackend,
     HLSSubtitlesBackend,
 )
-from .ffmpeg import Ffprobe
+from .ffmpeg import Ffprobe, NullProbe
+from .hls import (
+    HlsMasterPlaylist,
+    first_segment_uri,
+    mpegts_start_time,
+    parse_master_playlist,
+)
+from .http import HttpClient
 from .streamflavor import StreamFlavor, failed_flavor
 
 logger = logging.getLogger('yledl')
 
+# Number of bytes to download from the beginning of the first media segment
+# when looking for the stream start time
+SEGMENT_HEAD_BYTES = 64 * 1024
+
 
 def probe_flavors(
-    manifest_url: str, is_live: bool, ffprobe: Ffprobe
+    manifest_url: str,
+    is_live: bool,
+    ffprobe: Ffprobe,
+    httpclient: Optional[HttpClient] = None,
 ) -> list[StreamFlavor]:
+    # Parsing the master playlist is much faster than probing the stream
+    # with ffprobe. NullProbe means that the caller doesn't need stream
+    # data at all, so don't download anything in that case.
+    if httpclient is not None and not isinstance(ffprobe, NullProbe):
+        flavors = manifest_to_stream_flavors(manifest_url, is_live, httpclient)
+        if flavors is not None:
+            return flavors
+
+        logger.debug('Falling back to ffprobe')
+
     try:
         programs = ffprobe.show_programs_for_url(manifest_url)
         return programs_to_stream_flavors(programs, manifest_url, is_live)
@@ -92,6 +117,97 @@ def programs_to_stream_flavors(
     return sorted(res, key=lambda x: (x.height or 0, x.bitrate or 0))
 
 
+def manifest_to_stream_flavors(
+    manifest_url: str, is_live: bool, httpclient: HttpClient
+) -> Optional[list[StreamFlavor]]:
+    """Extract stream flavors from the HLS master playlist.
+
+    Returns the same flavors as programs_to_stream_flavors() would for the
+    ffprobe output. Returns None if the flavors can't be determined reliably
+    from the playlist alone.
+    """
+    try:
+        manifest = httpclient.download_page(manifest_url) or ''
+        master = parse_master_playlist(manifest, manifest_url)
+    except (requests.RequestException, ValueError) as ex:
+        logger.debug(f'Failed to parse the HLS master playlist: {ex}')
+        return None
+
+    if not master.variants:
+        logger.debug('No variant streams in the HLS playlist')
+        return None
+
+    if any(v.has_video() is None for v in master.variants):
+        logger.debug('Unknown stream types in the HLS master playlist')
+        return None
+
+    # The start time is only needed for synchronizing subtitles
+    start_time = None
+    if master.subtitles:
+        start_time = _probe_start_time(master, httpclient)
+        if start_time is None:
+            return None
+
+    res: list[StreamFlavor] = []
+    for variant in master.variants:
+        audio_only_stream = not variant.has_video()
+
+        backend: BaseDownloader
+        if audio_only_stream:
+            backend = HLSAudioBackend(manifest_url)
+        else:
+            backend = DASHHLSBackend(
+                manifest_url,
+                program_id=variant.program_id,
+                is_live=is_live,
+            )
+
+        res.append(
+            StreamFlavor(
+                media_type='audio' if audio_only_stream else 'video',
+                height=variant.height,
+                width=variant.width,
+                bitrate=variant.bandwidth / 1000 if variant.bandwidth else None,
+                start_time=start_time,
+                streams=[backend],
+            )
+        )
+
+    if master.subtitles:
+        res.append(
+            StreamFlavor(
+                media_type='subtitle',
+                start_time=start_time,
+                streams=[HLSSubtitlesBackend(manifest_url)],
+            )
+        )
+
+    res = _drop_duplicates(res)
+    return sorted(res, key=lambda x: (x.height or 0, x.bitrate or 0))
+
+
+def _probe_start_time(
+    master: HlsMasterPlaylist, httpclient: HttpClient
+) -> Optional[float]:
+    variant = min(master.variants, key=lambda v: v.bandwidth or 0)
+    try:
+        media_playlist = httpclient.download_page(variant.uri) or ''
+        segment_uri = first_segment_uri(media_playlist, variant.uri)
+        if segment_uri is None:
+            logger.debug('Unsupported HLS segment format')
+            return None
+
+        range_header = {'Range': f'bytes=0-{SEGMENT_HEAD_BYTES - 1}'}
+        segment_head = httpclient.get(segment_uri, range_header, timeout=20).content
+    except requests.RequestException as ex:
+        logger.debug(f'Failed to download the first HLS segment: {ex}')
+        return None
+
+    start_time = mpegts_start_time(segment_head[:SEGMENT_HEAD_BYTES])
+    logger.debug(f'HLS stream start time: {start_time}')
+    return start_time
+
+
 def _get_embedded_subtitles(programs: dict) -> tuple[bool, Optional[float]]:
     for program in programs.get('programs', []):
         for stream in program.get('streams', []):
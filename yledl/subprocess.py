@@ -15,6 +15,7 @@
 # You should have received a copy of the GNU General Public License
 # along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
 import ctypes
 import ctypes.util
 import logging
@@ -24,13 +25,23 @@ import platform
 import signal
 import shlex
 import subprocess
+import threading
 from subprocess import Popen
-from typing import Sequence, Mapping, Optional
+from typing import IO, Callable, Iterator, Sequence, Mapping, Optional, Union
 from .errors import ExternalApplicationNotFoundError
 from .exitcodes import RD_SUCCESS, RD_INCOMPLETE
 
 logger = logging.getLogger('yledl')
 
+# Processes started by execute_pipe() that haven't finished yet
+_running_processes: set[Popen] = set()
+_running_processes_lock = threading.Lock()
+_interrupted = threading.Event()
+
+# How long (in seconds) an asyncio subprocess gets to exit after SIGINT
+# before it is killed
+TERMINATE_TIMEOUT = 5.0
+
 
 def execute_pipe(
     commands: Sequence[Sequence[str]],
@@ -47,12 +58,16 @@ def execute_pipe(
     if not commands:
         return RD_SUCCESS
 
+    if _interrupted.is_set():
+        return RD_INCOMPLETE
+
     logger.debug('Executing:')
     shell_command_string = ' | '.join(shlex.join(args) for args in commands)
     logger.debug(shell_command_string)
 
     env = _combine_envs(extra_environment)
-    process = _start_process(commands, env)
+    processes = _start_process(commands, env)
+    process = processes[0]
     try:
         return process.wait()
     except KeyboardInterrupt:
@@ -69,6 +84,358 @@ def execute_pipe(
         raise ExternalApplicationNotFoundError(
             f'Failed to execute {shell_command_string}'
         )
+    finally:
+        _unregister_processes(processes)
+
+
+def execute_with_input(
+    command: Sequence[str],
+    write_input: Callable[[IO[bytes]], None],
+    extra_environment: Optional[Mapping[str, str]] = None,
+) -> int:
+    """Start an external process, feed its standard input and wait completion.
+
+    write_input is called with the standard input of the process. The input
+    is closed after write_input returns, and the exit status of the process
+    is returned. If write_input raises an exception, the process is
+    interrupted and the exception is re-raised.
+    """
+    if _interrupted.is_set():
+        return RD_INCOMPLETE
+
+    logger.debug('Executing:')
+    shell_command_string = shlex.join(command)
+    logger.debug(shell_command_string)
+
+    env = _combine_envs(extra_environment)
+    preexec_fn = _sigterm_when_parent_dies if platform.system() != 'Windows' else None
+    try:
+        process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, env=env, preexec_fn=preexec_fn
+        )
+    except OSError as exc:
+        logger.error(f'Failed to execute {shell_command_string}')
+        logger.error(exc.strerror)
+        raise ExternalApplicationNotFoundError(
+            f'Failed to execute {shell_command_string}'
+        )
+
+    _register_processes([process])
+    try:
+        try:
+            if process.stdin:
+                write_input(process.stdin)
+        except BrokenPipeError:
+            # The process exited without reading all input. The exit status
+            # tells if that was an error.
+            pass
+        finally:
+            _close_quietly(process.stdin)
+
+        return process.wait()
+    except KeyboardInterrupt:
+        _interrupt_process(process)
+        process.wait()
+        return RD_INCOMPLETE
+    except BaseException:
+        _interrupt_process(process)
+        process.wait()
+        raise
+    finally:
+        _unregister_processes([process])
+
+
+async def execute_pipe_async(
+    commands: Sequence[Sequence[str]],
+    extra_environment: Optional[Mapping[str, str]] = None,
+) -> int:
+    """Asyncio version of execute_pipe().
+
+    If the calling task is cancelled, the processes are interrupted and
+    waited for (killed, if they don't exit in TERMINATE_TIMEOUT seconds)
+    before CancelledError is re-raised.
+    """
+    if not commands:
+        return RD_SUCCESS
+
+    if _interrupted.is_set():
+        return RD_INCOMPLETE
+
+    logger.debug('Executing:')
+    shell_command_string = ' | '.join(shlex.join(args) for args in commands)
+    logger.debug(shell_command_string)
+
+    env = _combine_envs(extra_environment)
+    try:
+        processes = await _start_process_async(commands, env)
+    except OSError as exc:
+        logger.error(f'Failed to execute {shell_command_string}')
+        logger.error(exc.strerror)
+        raise ExternalApplicationNotFoundError(
+            f'Failed to execute {shell_command_string}'
+        )
+
+    try:
+        returncodes = await asyncio.gather(*(p.wait() for p in processes))
+        return returncodes[0]
+    except BaseException:
+        await _terminate_processes_async(processes)
+        raise
+
+
+async def execute_with_input_async(
+    command: Sequence[str],
+    chunks: Iterator[bytes],
+    extra_environment: Optional[Mapping[str, str]] = None,
+) -> int:
+    """Asyncio version of execute_with_input().
+
+    The chunks are written to the standard input of the process. They are
+    generated in worker threads, so producing a chunk may block (to
+    download it, for example). chunks is closed when the input ends.
+
+    If the calling task is cancelled, the process is interrupted and waited
+    for as in execute_pipe_async() before CancelledError is re-raised.
+    """
+    if _interrupted.is_set():
+        return RD_INCOMPLETE
+
+    logger.debug('Executing:')
+    shell_command_string = shlex.join(command)
+    logger.debug(shell_command_string)
+
+    env = _combine_envs(extra_environment)
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command, stdin=asyncio.subprocess.PIPE, env=env, preexec_fn=_preexec_fn()
+        )
+    except OSError as exc:
+        logger.error(f'Failed to execute {shell_command_string}')
+        logger.error(exc.strerror)
+        raise ExternalApplicationNotFoundError(
+            f'Failed to execute {shell_command_string}'
+        )
+
+    try:
+        if process.stdin:
+            try:
+                await _write_chunks_async(chunks, process.stdin)
+            except (BrokenPipeError, ConnectionResetError):
+                # The process exited without reading all input. The exit
+                # status tells if that was an error.
+                pass
+            finally:
+                process.stdin.close()
+
+        return await process.wait()
+    except BaseException:
+        await _terminate_processes_async([process])
+        raise
+
+
+async def _write_chunks_async(
+    chunks: Iterator[bytes], destination: asyncio.StreamWriter
+) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        next_chunk = loop.run_in_executor(None, next, chunks, None)
+        try:
+            data = await asyncio.shield(next_chunk)
+        except asyncio.CancelledError:
+            # A generator can't be closed while it is running in a worker
+            # thread. Close it when the chunk in progress is ready.
+            next_chunk.add_done_callback(
+                lambda _: loop.run_in_executor(None, _close_chunks, chunks)
+            )
+            raise
+        except BaseException:
+            await asyncio.to_thread(_close_chunks, chunks)
+            raise
+
+        if data is None:
+            await asyncio.to_thread(_close_chunks, chunks)
+            return
+
+        try:
+            destination.write(data)
+            await destination.drain()
+        except BaseException:
+            await asyncio.shield(asyncio.to_thread(_close_chunks, chunks))
+            raise
+
+
+def _close_chunks(chunks: Iterator[bytes]) -> None:
+    close = getattr(chunks, 'close', None)
+    if close is not None:
+        close()
+
+
+async def check_output_async(args: Sequence[str], timeout: Optional[float]) -> bytes:
+    """Asyncio version of subprocess.check_output().
+
+    Raises subprocess.CalledProcessError if the process exits with a
+    non-zero status and subprocess.TimeoutExpired if it doesn't finish in
+    timeout seconds. The process is killed on timeout and cancellation.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.PIPE, preexec_fn=_preexec_fn()
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        await _kill_process_async(process)
+        raise subprocess.TimeoutExpired(list(args), timeout or 0)
+    except BaseException:
+        await _kill_process_async(process)
+        raise
+
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, list(args), stdout)
+
+    return stdout
+
+
+async def _start_process_async(
+    commands: Sequence[Sequence[str]], env: Optional[Mapping[str, str]]
+) -> list[asyncio.subprocess.Process]:
+    """Start all commands as asyncio subprocesses connected with pipes.
+
+    Returns the started processes. The first process is the head of the pipe.
+    """
+    processes: list[asyncio.subprocess.Process] = []
+    stdin = None
+    try:
+        for i, args in enumerate(commands):
+            if i == len(commands) - 1:
+                read_fd, write_fd = None, None
+            else:
+                read_fd, write_fd = os.pipe()
+
+            try:
+                processes.append(
+                    await asyncio.create_subprocess_exec(
+                        *args,
+                        stdin=stdin,
+                        stdout=write_fd,
+                        env=env,
+                        preexec_fn=_preexec_fn() if i == 0 else None,
+                    )
+                )
+            except BaseException:
+                if read_fd is not None:
+                    os.close(read_fd)
+                raise
+            finally:
+                # The child processes have their own copies of the pipe ends
+                if stdin is not None:
+                    os.close(stdin)
+                if write_fd is not None:
+                    os.close(write_fd)
+
+            stdin = read_fd
+    except BaseException:
+        await _terminate_processes_async(processes)
+        raise
+
+    return processes
+
+
+async def _terminate_processes_async(
+    processes: Sequence[asyncio.subprocess.Process],
+) -> None:
+    for p in processes:
+        _interrupt_process(p)
+
+    for p in processes:
+        try:
+            await asyncio.shield(asyncio.wait_for(p.wait(), TERMINATE_TIMEOUT))
+        except asyncio.TimeoutError:
+            await _kill_process_async(p)
+        except asyncio.CancelledError:
+            # Cancelled again while waiting. Don't leave the process behind.
+            _kill_process(p)
+            raise
+
+
+async def _kill_process_async(process: asyncio.subprocess.Process) -> None:
+    _kill_process(process)
+    await process.wait()
+
+
+def _kill_process(process: asyncio.subprocess.Process) -> None:
+    try:
+        process.kill()
+    except ProcessLookupError:
+        # The process died before we killed it.
+        pass
+
+
+def _preexec_fn() -> Optional[Callable[[], None]]:
+    if platform.system() != 'Windows':
+        return _sigterm_when_parent_dies
+    else:
+        return None
+
+
+def _close_quietly(stream: Optional[IO[bytes]]) -> None:
+    if stream is None:
+        return
+
+    try:
+        stream.close()
+    except BrokenPipeError:
+        pass
+
+
+def interrupt_running_processes() -> None:
+    """Send SIGINT to all processes started by execute_pipe().
+
+    This is used for stopping parallel downloads. execute_pipe() won't start
+    new processes until allow_new_processes() is called.
+    """
+    _interrupted.set()
+    with _running_processes_lock:
+        processes = list(_running_processes)
+
+    for p in processes:
+        _interrupt_process(p)
+
+
+def allow_new_processes() -> None:
+    _interrupted.clear()
+
+
+def is_interrupted() -> bool:
+    """Has interrupt_running_processes() been called?
+
+    Long-running downloads that don't run in an external process should
+    check this periodically and stop if it returns True.
+    """
+    return _interrupted.is_set()
+
+
+def _interrupt_process(process: Union[Popen, asyncio.subprocess.Process]) -> None:
+    try:
+        os.kill(process.pid, signal.SIGINT)
+    except OSError:
+        # The process died before we killed it.
+        pass
+
+
+def _register_processes(processes: Sequence[Popen]) -> None:
+    with _running_processes_lock:
+        _running_processes.update(processes)
+
+    # interrupt_running_processes() might have been called while we were
+    # starting the processes
+    if _interrupted.is_set():
+        for p in processes:
+            _interrupt_process(p)
+
+
+def _unregister_processes(processes: Sequence[Popen]) -> None:
+    with _running_processes_lock:
+        _running_processes.difference_update(processes)
 
 
 def _combine_envs(
@@ -84,8 +451,11 @@ def _combine_envs(
 
 def _start_process(
     commands: Sequence[Sequence[str]], env: Optional[Mapping[str, str]]
-) -> Popen:
-    """Start all commands and setup pipes."""
+) -> list[Popen]:
+    """Start all commands and setup pipes.
+
+    Returns the started processes. The first process is the head of the pipe.
+    """
     if not commands:
         raise ValueError('command required')
 
@@ -110,7 +480,9 @@ def _start_process(
         if p.stdout:
             p.stdout.close()
 
-    return processes[0]
+    _register_processes(processes)
+
+    return processes
 
 
 def _sigterm_when_parent_dies() -> None:
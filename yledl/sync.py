@@ -0,0 +1,202 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import logging
+import os
+import os.path
+import tempfile
+import threading
+from typing import Iterable
+
+logger = logging.getLogger('yledl')
+
+SYNC_STATE_VERSION = 1
+
+# The state is saved after this many downloaded episodes, and when flushed
+SYNC_SAVE_INTERVAL = 10
+
+# An episode is no longer downloaded after it has failed on this many syncs
+SYNC_MAX_FAILURES = 3
+
+_open_states: dict[str, 'SeriesSyncState'] = {}
+_open_states_lock = threading.Lock()
+
+
+def default_sync_dir() -> str:
+    xdg_state_home = os.getenv('XDG_STATE_HOME') or os.path.expanduser('~/.local/state')
+    return os.path.join(xdg_state_home, 'yle-dl', 'sync')
+
+
+class SeriesSyncState:
+    """The episodes of a series that have been found and downloaded.
+
+    The state is stored as a JSON file in the sync directory, one file per
+    series URL. It records the episode URLs in the playlist order, the
+    episodes that have been completely downloaded, the number of failed
+    download attempts of each episode and the number of episodes in each
+    season on the latest sync. Episodes that have failed SYNC_MAX_FAILURES
+    times are not downloaded anymore.
+
+    Downloaded episodes are saved in batches of save_interval episodes.
+    Call flush() to save the rest.
+    """
+
+    def __init__(
+        self, filename: str, series_url: str, save_interval: int = SYNC_SAVE_INTERVAL
+    ):
+        self.filename = filename
+        self.series_url = series_url
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        # Number of episodes marked downloaded since the last save
+        self._unsaved = 0
+        # Number of episodes in a season, keyed by the season playlist URL
+        self.season_counts: dict[str, int] = {}
+        self.episodes: list[str] = []
+        self.downloaded: set[str] = set()
+        # Number of failed downloads, keyed by the episode URL
+        self.failures: dict[str, int] = {}
+        self._known: set[str] = set()
+        self._load()
+
+    def is_known(self, episode_url: str) -> bool:
+        return episode_url in self._known
+
+    def pending(self) -> list[str]:
+        """The known episodes that haven't been downloaded, in playlist order.
+
+        Episodes that have failed too many times are excluded.
+        """
+        return [
+            x
+            for x in self.episodes
+            if x not in self.downloaded and self.failures.get(x, 0) < SYNC_MAX_FAILURES
+        ]
+
+    def add_episodes(self, episode_urls: Iterable[str]) -> None:
+        """Append new episodes and save the state, including season_counts."""
+        with self._lock:
+            for url in episode_urls:
+                if url not in self._known:
+                    self.episodes.append(url)
+                    self._known.add(url)
+
+            self._save()
+
+    def mark_downloaded(self, episode_url: str) -> None:
+        with self._lock:
+            if episode_url in self.downloaded:
+                return
+
+            self.downloaded.add(episode_url)
+            self._unsaved += 1
+            if self._unsaved >= self.save_interval:
+                self._save()
+
+    def mark_failed(self, episode_url: str) -> None:
+        with self._lock:
+            num_failures = self.failures.get(episode_url, 0) + 1
+            self.failures[episode_url] = num_failures
+            if num_failures == SYNC_MAX_FAILURES:
+                logger.warning(
+                    f'Giving up on {episode_url} after {num_failures} failed '
+                    'downloads. It will be skipped on future syncs'
+                )
+
+            self._unsaved += 1
+            if self._unsaved >= self.save_interval:
+                self._save()
+
+    def flush(self) -> None:
+        """Save the downloaded episodes that haven't been saved yet."""
+        with self._lock:
+            if self._unsaved > 0:
+                self._save()
+
+    def _load(self) -> None:
+        try:
+            with open(self.filename, encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.warning(f'Ignoring an invalid sync state {self.filename}: {exc}')
+            return
+
+        if (
+            state.get('version') != SYNC_STATE_VERSION
+            or state.get('url') != self.series_url
+        ):
+            return
+
+        self.season_counts = dict(state.get('seasons', {}))
+        self.episodes = list(state.get('episodes', []))
+        self.downloaded = set(state.get('downloaded', []))
+        self.failures = dict(state.get('failures', {}))
+        self._known = set(self.episodes)
+
+    def _save(self) -> None:
+        self._unsaved = 0
+        state = {
+            'version': SYNC_STATE_VERSION,
+            'url': self.series_url,
+            'seasons': self.season_counts,
+            'episodes': self.episodes,
+            'downloaded': [x for x in self.episodes if x in self.downloaded],
+            'failures': self.failures,
+        }
+        directory = os.path.dirname(self.filename)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.filename)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except OSError as exc:
+            logger.warning(
+                f'Failed to write the sync state {self.filename}: {exc.strerror}'
+            )
+
+
+def open_sync_state(sync_dir: str, series_url: str) -> SeriesSyncState:
+    """Open the sync state of a series.
+
+    The state is loaded only once. Subsequent calls with the same series URL
+    return the same SeriesSyncState instance.
+    """
+    digest = hashlib.sha256(series_url.encode('utf-8')).hexdigest()
+    filename = os.path.join(sync_dir, f'{digest}.json')
+    with _open_states_lock:
+        key = os.path.abspath(filename)
+        state = _open_states.get(key)
+        if state is None:
+            state = SeriesSyncState(filename, series_url)
+            logger.debug(
+                f'Loaded the sync state of {series_url}: '
+                f'{len(state.episodes)} episodes, '
+                f'{len(state.downloaded)} downloaded'
+            )
+            _open_states[key] = state
+
+        return state
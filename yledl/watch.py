@@ -0,0 +1,93 @@
+# This file is part of yle-dl.
+#
+# Copyright 2010-2026 Antti Ajanki and others
+#
+# Yle-dl is free software: you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Yle-dl is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with yle-dl. If not, see <https://www.gnu.org/licenses/>.
+
+import heapq
+import logging
+import random
+import requests
+import time
+from typing import Callable, Iterable, Optional
+from .errors import TransientDownloadError
+
+logger = logging.getLogger('yledl')
+
+# The polling interval is randomized by this fraction in both directions
+WATCH_JITTER = 0.1
+# Errors that might go away by the next poll. Other errors, such as a missing
+# ffmpeg, stop watching.
+RETRIABLE_POLL_ERRORS = (requests.RequestException, TransientDownloadError)
+
+
+class SeriesWatcher:
+    """Poll URLs for new episodes at regular intervals.
+
+    poll is called with a URL each time the URL is due. The polls of a URL
+    are interval seconds apart, randomized by +-10%, so that the polls of
+    many series spread out over time instead of all happening at once.
+
+    A poll that fails on a network or a download error is retried on the
+    next interval. Other exceptions are propagated to the caller of run().
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        interval: float,
+        poll: Callable[[str], object],
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        uniform: Callable[[float, float], float] = random.uniform,
+    ):
+        if interval <= 0:
+            raise ValueError('interval must be positive')
+
+        self.urls = list(dict.fromkeys(urls))
+        self.interval = interval
+        self._poll = poll
+        self._clock = clock
+        self._sleep = sleep
+        self._uniform = uniform
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        """Poll the URLs until interrupted, or max_polls polls have been made.
+
+        The first polls happen one interval after the start.
+        """
+        now = self._clock()
+        queue = [(now + self._next_delay(), i, url) for i, url in enumerate(self.urls)]
+        heapq.heapify(queue)
+
+        num_polls = 0
+        while queue and (max_polls is None or num_polls < max_polls):
+            due, i, url = heapq.heappop(queue)
+            wait = due - self._clock()
+            if wait > 0:
+                logger.debug(f'Next poll in {wait:.0f} seconds: {url}')
+                self._sleep(wait)
+
+            try:
+                self._poll(url)
+            except RETRIABLE_POLL_ERRORS as ex:
+                # Keep watching the other URLs. The next poll might succeed.
+                logger.error(f'Failed to check {url} for new episodes: {ex}')
+                logger.debug('Traceback of the failed check:', exc_info=True)
+            num_polls += 1
+
+            heapq.heappush(queue, (self._clock() + self._next_delay(), i, url))
+
+    def _next_delay(self) -> float:
+        return self.interval * self._uniform(1 - WATCH_JITTER, 1 + WATCH_JITTER)
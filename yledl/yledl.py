@@ -32,19 +32,22 @@ import logging
 import os
 import os.path
 from argparse import Namespace
-from typing import Iterable
+from typing import Iterable, Optional
 from urllib.parse import urlparse, urlunparse, parse_qs, quote
 from .backends import Backends
-from .downloader import YleDlDownloader
+from .cache import default_cache_dir
+from .downloader import ClipRegistry, YleDlDownloader, combine_exit_status
 from .errors import FfmpegNotFoundError
 from .exitcodes import RD_SUCCESS, RD_FAILED
 from .geolocation import AreenaGeoLocation
 from .http import HttpClient
 from .io import IOContext, DownloadLimits, random_elisa_ipv4, get_filesystem_type
 from .streamfilters import StreamFilters
+from .sync import default_sync_dir
 from .titleformatter import TitleFormatter
 from .utils import print_enc
 from .version import __version__
+from .watch import SeriesWatcher
 
 
 class PlainInfoFormatter(logging.Formatter):
@@ -126,7 +129,32 @@ def _add_downloader_arguments(parser):
         type=str,
         default='ffmpeg,wget',
         help='Downloaders that are tried until one of them succeeds '
-        '(a comma-separated list). Possible values: "wget", "ffmpeg"',
+        '(a comma-separated list). Possible values: "wget", "ffmpeg", "http" '
+        '(built-in downloader for plain files)',
+    )
+    dl_group.add_argument(
+        '--jobs',
+        metavar='N',
+        type=positive_int,
+        default=1,
+        help='Process up to N episodes of a playlist in parallel (default: 1). '
+        'Applies to downloading and to --showurl, --showtitle and --showmetadata',
+    )
+    dl_group.add_argument(
+        '--prefetch',
+        metavar='N',
+        type=non_negative_int,
+        default=1,
+        help='When downloading a playlist, prepare up to N upcoming episodes '
+        'while the current one is downloading (default: 1). 0 disables prefetching',
+    )
+    dl_group.add_argument(
+        '--connections',
+        metavar='N',
+        type=positive_int,
+        default=1,
+        help='Download HLS video segments (or with --backend http, parts of '
+        'files) over N parallel connections (default: 1)',
     )
     dl_group.add_argument(
         '--ffmpeg',
@@ -230,7 +258,40 @@ def _add_resume_arguments(io_group):
         '--no-resume',
         action='store_false',
         dest='resume',
-        help="Don't resume partial files, download the whole stream again",
+        help="Don't resume partial files, download the whole stream again. "
+        'Partial files are resumed on the wget and http backends, and on HLS '
+        'streams with --resumable-segments',
+    )
+    io_group.add_argument(
+        '--resumable-segments',
+        action='store_true',
+        help='Keep a copy of the downloaded HLS segments in OUTPUT.part so '
+        'that an interrupted download continues from the first missing '
+        'segment. The copy takes as much disk space as the video',
+    )
+
+
+def _add_cache_arguments(io_group):
+    cache_group = io_group.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        '--cache',
+        action='store_true',
+        dest='cache',
+        default=False,
+        help='Cache web pages, API responses and stream probe results on the disk '
+        'for faster repeated runs',
+    )
+    cache_group.add_argument(
+        '--no-cache',
+        action='store_false',
+        dest='cache',
+        help="Don't use the HTTP cache (default)",
+    )
+    io_group.add_argument(
+        '--cache-dir',
+        metavar='DIR',
+        type=str,
+        help='Cache directory (default: $XDG_CACHE_HOME/yle-dl)',
     )
 
 
@@ -271,6 +332,17 @@ def _add_io_arguments(parser):
 
     _add_action_group_arguments(io_group)
 
+    io_group.add_argument(
+        '--metadata-format',
+        metavar='FORMAT',
+        type=str,
+        choices=['json', 'ndjson'],
+        default='json',
+        help='Output format of --showmetadata: "json" (default) prints a list '
+        'after all clips have been processed, "ndjson" prints one JSON object '
+        'per line as soon as each clip has been extracted',
+    )
+
     io_group.add_argument(
         '--output-template',
         metavar='TEMPLATE',
@@ -348,11 +420,51 @@ def _add_io_arguments(parser):
         dest='overwrite',
         help='Quit if a file already exists',
     )
+    io_group.add_argument(
+        '--verify-full',
+        action='store_true',
+        help='Decode an existing output file completely when checking if it '
+        'has already been downloaded. Slow, but detects damaged files',
+    )
+    io_group.add_argument(
+        '--download-archive',
+        metavar='FILE',
+        type=str,
+        help='Record the program IDs of downloaded episodes in FILE, and skip '
+        'episodes that are already recorded there',
+    )
+    io_group.add_argument(
+        '--sync',
+        action='store_true',
+        help='Remember the episodes of a series between runs, and download '
+        'only the episodes that have been published since the previous run',
+    )
+    io_group.add_argument(
+        '--sync-dir',
+        metavar='DIR',
+        type=str,
+        help='Directory for the --sync state (default: $XDG_STATE_HOME/yle-dl/sync)',
+    )
+    io_group.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and check the URLs for new episodes periodically. '
+        'Implies --sync',
+    )
+    io_group.add_argument(
+        '--watch-interval',
+        metavar='S',
+        type=int,
+        default=600,
+        help='Seconds between checks in --watch mode (default: 600)',
+    )
+    _add_cache_arguments(io_group)
     io_group.add_argument(
         '--ratelimit',
         metavar='BR',
         type=int,
-        help='Maximum bandwidth consumption, integer in kB/s',
+        help='Maximum bandwidth consumption, integer in kB/s. '
+        'The limit is shared by parallel downloads',
     )
     io_group.add_argument(
         '--proxy',
@@ -450,6 +562,20 @@ def float_with_dot_or_comma(s: str) -> float:
         return float(s.replace(',', '.'))
 
 
+def positive_int(s: str) -> int:
+    value = int(s)
+    if value < 1:
+        raise ValueError(f'Expected a positive integer: {s}')
+    return value
+
+
+def non_negative_int(s: str) -> int:
+    value = int(s)
+    if value < 0:
+        raise ValueError(f'Expected a non-negative integer: {s}')
+    return value
+
+
 def execute_action(
     url: str,
     action: int,
@@ -457,6 +583,7 @@ def execute_action(
     httpclient: HttpClient,
     title_formatter: TitleFormatter,
     stream_filters: StreamFilters,
+    clip_registry: Optional[ClipRegistry] = None,
 ) -> int:
     """Parse a web page and download the enclosed stream.
 
@@ -469,8 +596,16 @@ def execute_action(
     RD_FAIL is no stream was detected or the download failed, or
     RD_INCOMPLETE if a stream was downloaded partially but the
     download was interrupted.
+
+    clip_registry is shared by all URLs on a run so that each program is
+    downloaded only once.
     """
-    dl = YleDlDownloader(AreenaGeoLocation(httpclient), title_formatter, httpclient)
+    dl = YleDlDownloader(
+        AreenaGeoLocation(httpclient),
+        title_formatter,
+        httpclient,
+        clip_registry=clip_registry,
+    )
 
     if action == StreamAction.PRINT_EPISODE_PAGES:
         print_lines(dl.get_playlist(url, io))
@@ -481,6 +616,12 @@ def execute_action(
     elif action == StreamAction.PRINT_STREAM_TITLE:
         print_lines(dl.get_titles(url, io, stream_filters.latest_only))
         return RD_SUCCESS
+    elif action == StreamAction.PRINT_METADATA and io.metadata_format == 'ndjson':
+        print_lines(
+            json.dumps(metadata, ensure_ascii=False, separators=(',', ':'))
+            for metadata in dl.iter_metadata(url, io, stream_filters)
+        )
+        return RD_SUCCESS
     elif action == StreamAction.PRINT_METADATA:
         metadata = dl.get_metadata(url, io, stream_filters)
         print_enc(json.dumps(metadata, indent=2, ensure_ascii=False))
@@ -568,6 +709,12 @@ def expanduser(args: Namespace) -> Namespace:
         args.ffprobe = os.path.expanduser(args.ffprobe)
     if args.wget is not None:
         args.wget = os.path.expanduser(args.wget)
+    if args.download_archive is not None:
+        args.download_archive = os.path.expanduser(args.download_archive)
+    if args.cache_dir is not None:
+        args.cache_dir = os.path.expanduser(args.cache_dir)
+    if args.sync_dir is not None:
+        args.sync_dir = os.path.expanduser(args.sync_dir)
 
     return args
 
@@ -650,13 +797,16 @@ def main():
         preferred_format=preferformat,
         destdir=args.destdir,
         resume=args.resume,
+        resumable_segments=args.resumable_segments,
         overwrite=args.overwrite,
+        verify_full=args.verify_full,
         download_limits=dl_limits,
         excludechars=excludechars,
         proxy=args.proxy,
         x_forwarded_for=random_elisa_ipv4(),
         subtitles=args.sublang,
         metadata_language=args.metadatalang,
+        metadata_format=args.metadata_format,
         postprocess_command=args.postprocess,
         ffmpeg_binary=args.ffmpeg or 'ffmpeg',
         ffprobe_binary=args.ffprobe or 'ffprobe',
@@ -664,9 +814,26 @@ def main():
         create_dirs=args.create_dirs,
         xattr=args.xattrs,
         subtitle_delay_s=args.subdelay,
+        jobs=args.jobs,
+        prefetch=args.prefetch,
+        connections=args.connections,
+        download_archive=args.download_archive,
+        sync_dir=(
+            (args.sync_dir or default_sync_dir()) if args.sync or args.watch else None
+        ),
+        cache_dir=(args.cache_dir or default_cache_dir()) if args.cache else None,
     )
 
     action = _parse_action(args)
+    if args.watch and action != StreamAction.DOWNLOAD:
+        logger.error('--watch can be used only when downloading')
+        sys.exit(RD_FAILED)
+    if (args.sync or args.watch) and args.latestepisode:
+        logger.error('--latestepisode can not be combined with --sync or --watch')
+        sys.exit(RD_FAILED)
+    if args.watch and args.watch_interval <= 0:
+        logger.error('--watch-interval must be positive')
+        sys.exit(RD_FAILED)
 
     if logger.isEnabledFor(logging.INFO) and action not in [
         StreamAction.PIPE,
@@ -695,6 +862,17 @@ def main():
         exit_status = handle_urls(
             action, args, httpclient, io, stream_filters, title_formatter, urls
         )
+
+        if args.watch:
+            watch_status = watch_urls(
+                args.watch_interval,
+                httpclient,
+                io,
+                stream_filters,
+                title_formatter,
+                urls,
+            )
+            exit_status = combine_exit_status(exit_status, watch_status)
     except FfmpegNotFoundError:
         logger.error('ffmpeg or ffprobe not found on PATH.')
         logger.error(
@@ -704,6 +882,8 @@ def main():
         logger.error('or use "--backend wget".')
         exit_status = RD_FAILED
 
+    httpclient.log_cache_statistics()
+
     return exit_status
 
 
@@ -733,6 +913,7 @@ def handle_urls(
     urls: list[str],
 ) -> int:
     exit_status = RD_SUCCESS
+    clip_registry = ClipRegistry()
 
     for i, url in enumerate(urls):
         if len(urls) > 1:
@@ -751,6 +932,7 @@ def handle_urls(
             httpclient=httpclient,
             title_formatter=title_formatter,
             stream_filters=stream_filters,
+            clip_registry=clip_registry,
         )
 
         if res != RD_SUCCESS:
@@ -758,5 +940,50 @@ def handle_urls(
     return exit_status
 
 
+def watch_urls(
+    interval: int,
+    httpclient: HttpClient,
+    io: IOContext,
+    stream_filters: StreamFilters,
+    title_formatter: TitleFormatter,
+    urls: list[str],
+) -> int:
+    """Download new episodes from urls until interrupted.
+
+    The same HttpClient (and its connection pool) is used for all checks.
+    New episodes are detected from the sync state in io.sync_dir.
+    """
+
+    def poll(url: str) -> int:
+        logger.info('')
+        logger.info(f'Checking {url} for new episodes')
+        return execute_action(
+            url,
+            action=StreamAction.DOWNLOAD,
+            io=io,
+            httpclient=httpclient,
+            title_formatter=title_formatter,
+            stream_filters=stream_filters,
+        )
+
+    logger.info('')
+    logger.info(
+        f'Watching {len(urls)} URLs for new episodes every {interval} seconds. '
+        'Press Ctrl-C to stop'
+    )
+    try:
+        SeriesWatcher(urls, interval, poll).run()
+    except KeyboardInterrupt:
+        logger.info('Stopped watching')
+    except FfmpegNotFoundError:
+        raise
+    except Exception as ex:
+        logger.error(f'Stopped watching because of an error: {ex}')
+        logger.debug('Traceback of the error:', exc_info=True)
+        return RD_FAILED
+
+    return RD_SUCCESS
+
+
 if __name__ == '__main__':
     sys.exit(main())